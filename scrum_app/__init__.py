@@ -5,18 +5,45 @@ from flask_login import LoginManager
 db = SQLAlchemy()
 login_manager = LoginManager()
 
-def create_app():
+def create_app(config_name=None, config=None):
     app = Flask(__name__)
-    app.config['SECRET_KEY'] = 'chave_super_secreta'
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///scrum.db'
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    from .config import load_config, configure_engine
+    from .commands import LazyCommands
+    load_config(app, config_name, config)
     db.init_app(app)
     login_manager.init_app(app)
     login_manager.login_view = 'main.login'
-    from .models import User, Project, Sprint, Task, UserStory
     from .routes import main
+    from .api import api
+    from . import activity, assets, fragments, jobs
     app.register_blueprint(main)
+    app.register_blueprint(api)
+    fragments.init_app(app)
+    jobs.init_app(app)
+    activity.init_app(app)
+    assets.init_app(app)
+
+    app.cli = LazyCommands(app.name)
+    app.cli.defer('migrations', app, db)
+    app.cli.defer('analytics', app)
+    app.cli.defer('archive', app)
+    app.cli.defer('assets', app, setup='init_cli')
+    app.cli.defer('changefeed', app)
+    app.cli.defer('jobs', app, setup='init_cli')
+    app.cli.defer('ranking', app)
+    app.cli.defer('search', app, db)
+    app.cli.defer('stress', app)
+    app.cli.defer('benchmark', app)
+
     with app.app_context():
-        db.create_all()
+        configure_engine(app, db.engine)
+        if app.config['METRICS_ENABLED']:
+            from . import metrics
+            metrics.init_app(app, db.engine)
+        # Em produção o esquema é responsabilidade de `flask db-upgrade`,
+        # rodado uma vez no deploy, e não de cada worker que sobe.
+        if app.config['AUTO_MIGRATE']:
+            from . import migrations
+            migrations.ensure_current(db)
 
     return app
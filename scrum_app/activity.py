@@ -0,0 +1,141 @@
+import atexit
+import json
+import threading
+from datetime import date, datetime
+from flask import current_app, has_request_context
+from flask_login import current_user
+from sqlalchemy import insert, inspect
+from . import db
+from .models import ActivityEntry
+
+# Registro de atividade dos projetos (quem fez o quê).
+#
+# As rotas chamam record() depois do commit da ação, então só entram no log
+# ações que de fato foram gravadas. A entrada não vira um INSERT na hora: vai
+# para um buffer do processo, e uma thread grava o buffer inteiro numa única
+# transação quando ele chega a ACTIVITY_BATCH_SIZE entradas ou a cada
+# ACTIVITY_FLUSH_INTERVAL segundos, o que vier primeiro. Assim cada ação
+# continua custando uma transação de escrita no SQLite, e o log custa uma
+# por lote. O que estiver no buffer é gravado na saída do processo; uma queda
+# brusca perde no máximo o último intervalo.
+
+# Tipos de item das rotas (kind no plural) para o item_type do log.
+ITEM_TYPES = {
+    "tasks": "task",
+    "stories": "story",
+}
+
+
+class ActivityWriter:
+    def __init__(self, app):
+        self.app = app
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, entry):
+        config = self.app.config
+        with self._lock:
+            self._buffer.append(entry)
+            size = len(self._buffer)
+
+        if not config['ACTIVITY_FLUSH_INTERVAL']:
+            self.flush()
+        elif size >= config['ACTIVITY_BATCH_SIZE']:
+            self._wake.set()
+        if config['ACTIVITY_FLUSH_INTERVAL'] and self._thread is None:
+            self._start()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, name="activity-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.app.config['ACTIVITY_FLUSH_INTERVAL'])
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+            try:
+                with self.app.app_context():
+                    with db.engine.begin() as conn:
+                        conn.execute(insert(ActivityEntry), batch)
+            except Exception:
+                self.app.logger.exception("falha ao gravar %d entradas de atividade", len(batch))
+                self._requeue(batch)
+                return 0
+            return len(batch)
+
+    def _requeue(self, batch):
+        # Volta para a frente do buffer para a próxima tentativa; se o banco
+        # ficar indisponível por muito tempo, descarta as entradas mais antigas.
+        limit = self.app.config['ACTIVITY_MAX_BUFFER']
+        with self._lock:
+            self._buffer[:0] = batch
+            dropped = len(self._buffer) - limit
+            if dropped > 0:
+                del self._buffer[:dropped]
+                self.app.logger.warning("%d entradas de atividade descartadas", dropped)
+
+    def pending(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self.flush()
+
+
+def record(action, project_id, item_type=None, item_id=None, detail=None, user_id=None):
+    if user_id is None and has_request_context() and current_user.is_authenticated:
+        user_id = current_user.id
+    current_app.extensions['activity'].add({
+        "project_id": project_id,
+        "user_id": user_id,
+        "action": action,
+        "item_type": item_type,
+        "item_id": item_id,
+        "detail": json.dumps(detail or {}, separators=(",", ":"), default=_plain),
+        "created_at": datetime.utcnow(),
+    })
+
+
+def changes(obj):
+    # Campos alterados de um objeto do ORM ainda não gravado, como
+    # {"campo": [antes, depois]}. Precisa rodar antes do flush.
+    state = inspect(obj)
+    result = {}
+    for attr in state.mapper.column_attrs:
+        history = state.attrs[attr.key].history
+        if history.added or history.deleted:
+            before = history.deleted[0] if history.deleted else None
+            after = history.added[0] if history.added else None
+            if before != after:
+                result[attr.key] = [before, after]
+    return result
+
+
+def _plain(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"valor não serializável: {value!r}")
+
+
+def init_app(app):
+    app.extensions['activity'] = ActivityWriter(app)
@@ -0,0 +1,223 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+import click
+from sqlalchemy import case, func, update
+from . import db
+from .models import Sprint, Task, UserStory, StatusTransition, SprintSnapshot, ArchivedTask, ArchivedStory
+
+# Burndown e velocidade a partir de snapshots diários por sprint.
+#
+# record_changes() recebe as mudanças registradas por tracking.track() antes
+# do commit. Cada mudança vira uma linha em status_transitions (quando o
+# status muda) e um delta no snapshot do dia da sprint afetada. Se a sprint
+# ainda não tem snapshot no dia, a linha nasce copiando o último snapshot
+# anterior; se nunca teve, é contada uma vez a partir do estado atual, que já
+# inclui as mudanças do request.
+
+DONE = "Done"
+
+
+def record_changes(changes):
+    now = datetime.utcnow()
+    deltas = defaultdict(lambda: [0, 0, 0, 0])
+
+    transitions = []
+    for change in changes:
+        if change.old_status != change.new_status and change.new_status is not None:
+            transitions.append({
+                "item_type": change.kind,
+                "item_id": change.item_id,
+                "project_id": change.project_id,
+                "sprint_id": change.new_sprint,
+                "from_status": change.old_status,
+                "to_status": change.new_status,
+                "changed_at": now,
+            })
+
+        offset = 0 if change.kind == "task" else 2
+        if change.old_sprint is not None:
+            delta = deltas[change.old_sprint]
+            delta[offset] -= 1
+            delta[offset + 1] -= int(change.old_status == DONE)
+        if change.new_sprint is not None and change.new_status is not None:
+            delta = deltas[change.new_sprint]
+            delta[offset] += 1
+            delta[offset + 1] += int(change.new_status == DONE)
+
+    if transitions:
+        # Insert do Core: o bulk do ORM quebra o executemany em vários
+        # INSERTs quando sprint_id alterna entre nulo e preenchido.
+        db.session.execute(StatusTransition.__table__.insert(), transitions)
+
+    today = now.date()
+    for sprint_id, delta in deltas.items():
+        if any(delta):
+            _apply_delta(sprint_id, today, delta)
+
+
+def _apply_delta(sprint_id, day, delta):
+    existing = db.session.query(SprintSnapshot.id).filter_by(sprint_id=sprint_id, day=day).scalar()
+    if existing is not None:
+        db.session.execute(
+            update(SprintSnapshot)
+            .where(SprintSnapshot.id == existing)
+            .values(
+                tasks_total=SprintSnapshot.tasks_total + delta[0],
+                tasks_done=SprintSnapshot.tasks_done + delta[1],
+                stories_total=SprintSnapshot.stories_total + delta[2],
+                stories_done=SprintSnapshot.stories_done + delta[3],
+            )
+        )
+        return
+
+    previous = (
+        SprintSnapshot.query
+        .filter(SprintSnapshot.sprint_id == sprint_id, SprintSnapshot.day < day)
+        .order_by(SprintSnapshot.day.desc())
+        .first()
+    )
+    if previous is None:
+        # Primeiro snapshot da sprint: a contagem já reflete o request atual.
+        db.session.add(SprintSnapshot(sprint_id=sprint_id, day=day, **_count(sprint_id)))
+        return
+
+    db.session.add(SprintSnapshot(
+        sprint_id=sprint_id,
+        day=day,
+        tasks_total=previous.tasks_total + delta[0],
+        tasks_done=previous.tasks_done + delta[1],
+        stories_total=previous.stories_total + delta[2],
+        stories_done=previous.stories_done + delta[3],
+    ))
+
+
+def _count(sprint_id):
+    # Itens arquivados continuam fazendo parte da sprint.
+    tasks_total, tasks_done = _count_model(Task, sprint_id, ArchivedTask)
+    stories_total, stories_done = _count_model(UserStory, sprint_id, ArchivedStory)
+    return {
+        "tasks_total": tasks_total,
+        "tasks_done": tasks_done,
+        "stories_total": stories_total,
+        "stories_done": stories_done,
+    }
+
+
+def _count_model(model, sprint_id, archived):
+    total = done = 0
+    for source in (model, archived):
+        source_total, source_done = db.session.query(
+            func.count(source.id),
+            func.coalesce(func.sum(case((source.status == DONE, 1), else_=0)), 0)
+        ).filter(source.sprint_id == sprint_id).one()
+        total += source_total
+        done += source_done
+    return total, done
+
+
+def snapshot_all(day=None, project_id=None):
+    day = day or date.today()
+    query = db.session.query(Sprint.id)
+    if project_id is not None:
+        query = query.filter(Sprint.project_id == project_id)
+    sprint_ids = [row.id for row in query]
+    for sprint_id in sprint_ids:
+        counts = _count(sprint_id)
+        row = SprintSnapshot.query.filter_by(sprint_id=sprint_id, day=day).first()
+        if row is None:
+            db.session.add(SprintSnapshot(sprint_id=sprint_id, day=day, **counts))
+        else:
+            for name, value in counts.items():
+                setattr(row, name, value)
+    db.session.commit()
+    return len(sprint_ids)
+
+
+def burndown(sprint):
+    rows = (
+        SprintSnapshot.query
+        .filter_by(sprint_id=sprint.id)
+        .order_by(SprintSnapshot.day)
+        .all()
+    )
+    if not rows:
+        rows = [SprintSnapshot(sprint_id=sprint.id, day=date.today(), **_count(sprint.id))]
+
+    first = sprint.start_date or rows[0].day
+    last = min(sprint.end_date or date.today(), date.today())
+    last = max(last, first)
+
+    # Dias sem mudança repetem o último snapshot conhecido.
+    points = []
+    current = None
+    index = 0
+    day = first
+    while day <= last:
+        while index < len(rows) and rows[index].day <= day:
+            current = rows[index]
+            index += 1
+        points.append(_point(day, current))
+        day += timedelta(days=1)
+    return points
+
+
+def _point(day, row):
+    tasks_total = row.tasks_total if row else 0
+    tasks_done = row.tasks_done if row else 0
+    stories_total = row.stories_total if row else 0
+    stories_done = row.stories_done if row else 0
+    return {
+        "day": day.isoformat(),
+        "tasks_total": tasks_total,
+        "tasks_done": tasks_done,
+        "tasks_remaining": tasks_total - tasks_done,
+        "stories_total": stories_total,
+        "stories_done": stories_done,
+        "stories_remaining": stories_total - stories_done,
+    }
+
+
+def velocity(project_id):
+    # Último snapshot de cada sprint até a data de término (ou hoje).
+    cutoff = func.coalesce(Sprint.end_date, date.today())
+    latest = (
+        db.session.query(
+            SprintSnapshot.sprint_id,
+            func.max(SprintSnapshot.day).label("day")
+        )
+        .join(Sprint, Sprint.id == SprintSnapshot.sprint_id)
+        .filter(Sprint.project_id == project_id, SprintSnapshot.day <= cutoff)
+        .group_by(SprintSnapshot.sprint_id)
+        .subquery()
+    )
+    rows = (
+        db.session.query(Sprint, SprintSnapshot)
+        .outerjoin(latest, latest.c.sprint_id == Sprint.id)
+        .outerjoin(
+            SprintSnapshot,
+            (SprintSnapshot.sprint_id == latest.c.sprint_id) & (SprintSnapshot.day == latest.c.day)
+        )
+        .filter(Sprint.project_id == project_id)
+        .order_by(Sprint.start_date, Sprint.id)
+        .all()
+    )
+    return [
+        {
+            "sprint_id": sprint.id,
+            "name": sprint.name,
+            "start_date": sprint.start_date.isoformat() if sprint.start_date else None,
+            "end_date": sprint.end_date.isoformat() if sprint.end_date else None,
+            "tasks_done": snap.tasks_done if snap else 0,
+            "tasks_total": snap.tasks_total if snap else 0,
+            "stories_done": snap.stories_done if snap else 0,
+            "stories_total": snap.stories_total if snap else 0,
+        }
+        for sprint, snap in rows
+    ]
+
+
+def init_app(app):
+    @app.cli.command('analytics-snapshot')
+    def analytics_snapshot():
+        """Recalcula o snapshot de hoje de todas as sprints."""
+        click.echo(f"{snapshot_all()} sprints atualizadas")
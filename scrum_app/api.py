@@ -0,0 +1,675 @@
+import base64
+import json
+from datetime import date, datetime
+from flask import Blueprint, Response, jsonify, request, send_from_directory, stream_with_context
+from flask_login import current_user
+from sqlalchemy import select, tuple_
+from . import activity, archive, db, jobs, ranking, transfer
+from .models import (
+    Project, Sprint, Task, UserStory, ArchivedTask, ArchivedStory, Job, ActivityEntry, User,
+    STORY_STATUSES
+)
+from .analytics import burndown, velocity
+from .bulk import BulkError, parse_ids, plan_stories, task_values, update_tasks
+from .concurrency import ConflictError, guarded
+from .search import search
+from .permissions import user_has_access, is_project_owner
+from .queries import user_project_ids
+from .tracking import story_change, task_change, track
+from .versioning import bump
+
+# API JSON versionada. As listagens usam paginação por cursor (keyset) e são
+# montadas com select() de colunas, sem instanciar objetos do ORM.
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+PROJECT_FIELDS = {
+    "id": Project.id,
+    "name": Project.name,
+    "description": Project.description,
+    "owner_id": Project.owner_id,
+}
+
+SPRINT_FIELDS = {
+    "id": Sprint.id,
+    "name": Sprint.name,
+    "goal": Sprint.goal,
+    "start_date": Sprint.start_date,
+    "end_date": Sprint.end_date,
+    "project_id": Sprint.project_id,
+    "version": Sprint.version,
+}
+
+STORY_FIELDS = {
+    "id": UserStory.id,
+    "title": UserStory.title,
+    "description": UserStory.description,
+    "status": UserStory.status,
+    "project_id": UserStory.project_id,
+    "sprint_id": UserStory.sprint_id,
+    "rank": UserStory.rank,
+    "version": UserStory.version,
+}
+
+TASK_FIELDS = {
+    "id": Task.id,
+    "title": Task.title,
+    "description": Task.description,
+    "status": Task.status,
+    "created_at": Task.created_at,
+    "project_id": Task.project_id,
+    "sprint_id": Task.sprint_id,
+    "assigned_to": Task.assigned_to,
+    "rank": Task.rank,
+    "version": Task.version,
+}
+
+ARCHIVE_FIELDS = {
+    "tasks": {
+        **{name: getattr(ArchivedTask, name) for name in TASK_FIELDS},
+        "archived_at": ArchivedTask.archived_at,
+    },
+    "stories": {
+        **{name: getattr(ArchivedStory, name) for name in STORY_FIELDS},
+        "archived_at": ArchivedStory.archived_at,
+    },
+}
+
+# Campos devolvidos nas edições e no 409 de conflito de versão.
+ITEM_FIELDS = {
+    Task: TASK_FIELDS,
+    UserStory: STORY_FIELDS,
+    Sprint: SPRINT_FIELDS,
+}
+
+ACTIVITY_FIELDS = {
+    "id": ActivityEntry.id,
+    "action": ActivityEntry.action,
+    "item_type": ActivityEntry.item_type,
+    "item_id": ActivityEntry.item_id,
+    "user_id": ActivityEntry.user_id,
+    "username": User.username,
+    "detail": ActivityEntry.detail,
+    "created_at": ActivityEntry.created_at,
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@api.errorhandler(ApiError)
+def handle_api_error(error):
+    return jsonify({"error": error.message}), error.status
+
+
+@api.errorhandler(ConflictError)
+def handle_conflict(error):
+    # 409 com o estado atual para o cliente refazer a alteração sobre ele.
+    current = error.current
+    if current is not None:
+        current = _item(current, ITEM_FIELDS[type(current)])
+    return jsonify({"error": str(error), "current": current}), 409
+
+
+@api.before_request
+def require_login():
+    if not current_user.is_authenticated:
+        raise ApiError(401, "autenticação necessária")
+
+
+@api.route('/projects')
+def list_projects():
+    ids = user_project_ids(current_user.id)
+    query = select().select_from(Project).join(ids, ids.c.project_id == Project.id)
+    return jsonify(_paginate(query, PROJECT_FIELDS, (Project.id,)))
+
+
+@api.route('/projects/<int:project_id>')
+def get_project(project_id):
+    project = _project_or_404(project_id)
+    return jsonify({name: _encode(getattr(project, name)) for name in _fields(PROJECT_FIELDS)})
+
+
+@api.route('/projects/<int:project_id>/sprints')
+def list_sprints(project_id):
+    _project_or_404(project_id)
+    query = select().where(Sprint.project_id == project_id)
+    return jsonify(_paginate(query, SPRINT_FIELDS, (Sprint.id,)))
+
+
+@api.route('/projects/<int:project_id>/stories')
+def list_stories(project_id):
+    _project_or_404(project_id)
+    query = select().where(UserStory.project_id == project_id)
+    query = _filter(query, UserStory.status, 'status')
+    query = _filter(query, UserStory.sprint_id, 'sprint_id', int)
+    key = _order({"id": (UserStory.id,), "rank": (UserStory.rank, UserStory.id)})
+    return jsonify(_paginate(query, STORY_FIELDS, key))
+
+
+@api.route('/projects/<int:project_id>/tasks')
+def list_tasks(project_id):
+    _project_or_404(project_id)
+    query = select().where(Task.project_id == project_id)
+    query = _filter(query, Task.status, 'status')
+    query = _filter(query, Task.sprint_id, 'sprint_id', int)
+    query = _filter(query, Task.assigned_to, 'assigned_to', int)
+    key = _order({"created": (Task.created_at, Task.id), "rank": (Task.rank, Task.id)})
+    return jsonify(_paginate(query, TASK_FIELDS, key))
+
+
+@api.route('/projects/<int:project_id>/sprints/<int:sprint_id>', methods=['PATCH'])
+def update_sprint(project_id, sprint_id):
+    project = _project_or_404(project_id)
+    sprint = _item_or_404(Sprint, project.id, sprint_id)
+    payload = _json_body()
+    version = _version(payload)
+
+    for name in ('name', 'goal'):
+        if name in payload:
+            setattr(sprint, name, _text(payload, name, required=(name == 'name')))
+    for name in ('start_date', 'end_date'):
+        if name in payload:
+            setattr(sprint, name, _date(payload, name))
+
+    detail = activity.changes(sprint)
+    with guarded(sprint, version):
+        bump(project_id)
+        db.session.commit()
+    activity.record("sprint.updated", project_id, "sprint", sprint_id, detail)
+    return jsonify(_item(sprint, SPRINT_FIELDS))
+
+
+@api.route('/projects/<int:project_id>/stories/<int:story_id>', methods=['PATCH'])
+def update_story(project_id, story_id):
+    project = _project_or_404(project_id)
+    if not is_project_owner(project):
+        raise ApiError(403, "apenas o dono do projeto pode editar user stories")
+    story = _item_or_404(UserStory, project_id, story_id)
+    payload = _json_body()
+    version = _version(payload)
+
+    old_status = story.status
+    if 'title' in payload:
+        story.title = _text(payload, 'title', required=True)
+    if 'description' in payload:
+        story.description = _text(payload, 'description') or ''
+    if 'status' in payload:
+        if payload['status'] not in STORY_STATUSES:
+            raise ApiError(400, "status inválido")
+        story.status = payload['status']
+
+    detail = activity.changes(story)
+    with guarded(story, version):
+        track([story_change(story, story.sprint_id, old_status)])
+        db.session.commit()
+    activity.record("story.updated", project_id, "story", story_id, detail)
+    return jsonify(_item(story, STORY_FIELDS))
+
+
+@api.route('/projects/<int:project_id>/tasks/<int:task_id>', methods=['PATCH'])
+def update_task(project_id, task_id):
+    project = _project_or_404(project_id)
+    task = _item_or_404(Task, project_id, task_id)
+    payload = _json_body()
+    version = _version(payload)
+
+    # Mesma regra do lote: status é de qualquer membro, o resto é do dono.
+    if set(payload) - {'status', 'version'} and not is_project_owner(project):
+        raise ApiError(403, "apenas o dono do projeto pode editar tasks")
+    try:
+        values = task_values(project_id, payload)
+    except BulkError as error:
+        raise ApiError(400, str(error))
+
+    old_sprint, old_status = task.sprint_id, task.status
+    if 'title' in payload:
+        task.title = _text(payload, 'title', required=True)
+    if 'description' in payload:
+        task.description = _text(payload, 'description')
+    for name, value in values.items():
+        setattr(task, name, value)
+
+    detail = activity.changes(task)
+    with guarded(task, version):
+        track([task_change(task, old_sprint, old_status)])
+        db.session.commit()
+    activity.record("task.updated", project_id, "task", task_id, detail)
+    return jsonify(_item(task, TASK_FIELDS))
+
+
+@api.route('/projects/<int:project_id>/search')
+def search_items(project_id):
+    _project_or_404(project_id)
+    query = request.args.get('q', '').strip()
+    if not query:
+        raise ApiError(400, "parâmetro q é obrigatório")
+    page = max(request.args.get('page', 1, type=int), 1)
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    results, has_next = search(project_id, query, page, limit)
+    for result in results:
+        result["snippet"] = str(result["snippet"])
+    return jsonify({"data": results, "page": page, "has_next": has_next})
+
+
+@api.route('/sprints/<int:sprint_id>/burndown')
+def sprint_burndown(sprint_id):
+    sprint = db.session.get(Sprint, sprint_id)
+    if sprint is None:
+        raise ApiError(404, "sprint não encontrada")
+    _project_or_404(sprint.project_id)
+    return jsonify({"sprint_id": sprint.id, "days": burndown(sprint)})
+
+
+@api.route('/projects/<int:project_id>/velocity')
+def project_velocity(project_id):
+    _project_or_404(project_id)
+    return jsonify({"project_id": project_id, "sprints": velocity(project_id)})
+
+
+@api.route('/projects/<int:project_id>/tasks/bulk', methods=['POST'])
+def bulk_update_tasks(project_id):
+    project = _project_or_404(project_id)
+    payload = _json_body()
+    values = {k: payload[k] for k in ('status', 'sprint_id', 'assigned_to') if k in payload}
+
+    # Mudar status é permitido a qualquer membro (como no Kanban); mudar
+    # sprint ou responsável segue a regra de edit_task e exige ser o dono.
+    if set(values) - {'status'} and not is_project_owner(project):
+        raise ApiError(403, "apenas o dono do projeto pode replanejar tasks")
+
+    try:
+        results = update_tasks(project_id, parse_ids(payload.get('ids')), values)
+    except BulkError as error:
+        raise ApiError(400, str(error))
+    _record_bulk("task.bulk_updated", project_id, results, values)
+    return jsonify(_bulk_response(results))
+
+
+@api.route('/projects/<int:project_id>/stories/bulk', methods=['POST'])
+def bulk_plan_stories(project_id):
+    project = _project_or_404(project_id)
+    if not is_project_owner(project):
+        raise ApiError(403, "apenas o dono do projeto pode planejar sprints")
+
+    payload = _json_body()
+    if 'sprint_id' not in payload:
+        raise ApiError(400, "sprint_id é obrigatório (use null para remover da sprint)")
+
+    try:
+        results = plan_stories(project_id, parse_ids(payload.get('ids')), payload['sprint_id'])
+    except BulkError as error:
+        raise ApiError(400, str(error))
+    _record_bulk("story.planned", project_id, results, {"sprint_id": payload['sprint_id']})
+    return jsonify(_bulk_response(results))
+
+
+@api.route('/projects/<int:project_id>/export/<kind>')
+def export_items(project_id, kind):
+    _project_or_404(project_id)
+    fmt = request.args.get('format', 'ndjson')
+    try:
+        transfer.check(kind, fmt)
+    except transfer.TransferError as error:
+        raise ApiError(400, str(error))
+    return Response(
+        stream_with_context(transfer.export(project_id, kind, fmt)),
+        mimetype=transfer.FORMATS[fmt]
+    )
+
+
+@api.route('/projects/<int:project_id>/import/<kind>', methods=['POST'])
+def import_items(project_id, kind):
+    _project_or_404(project_id)
+    upload = request.files.get('file')
+    fmt = request.args.get('format') or (upload.filename.rsplit('.', 1)[-1].lower() if upload else 'ndjson')
+    dry_run = request.args.get('dry_run', '').lower() in ('1', 'true', 'yes')
+
+    # Aceita upload multipart (campo "file") ou o arquivo direto no corpo.
+    try:
+        transfer.check(kind, fmt)
+        stream = upload.stream if upload else request.stream
+        report = transfer.import_file(project_id, kind, fmt, stream, dry_run=dry_run)
+    except transfer.TransferError as error:
+        raise ApiError(400, str(error))
+    if report["inserted"]:
+        activity.record(f"{activity.ITEM_TYPES[kind]}.imported", project_id,
+                        detail={"inserted": report["inserted"]})
+    return jsonify(report), (200 if dry_run else 201)
+
+
+@api.route('/projects/<int:project_id>/archive/<kind>')
+def list_archived(project_id, kind):
+    _project_or_404(project_id)
+    if kind not in archive.SOURCES:
+        raise ApiError(404, "tipo de item desconhecido")
+    archived = archive.SOURCES[kind][1]
+    query = select().where(archived.project_id == project_id)
+    return jsonify(_paginate(query, ARCHIVE_FIELDS[kind], (archived.id,)))
+
+
+@api.route('/projects/<int:project_id>/archive/<kind>/restore', methods=['POST'])
+def restore_archived(project_id, kind):
+    project = _project_or_404(project_id)
+    if not is_project_owner(project):
+        raise ApiError(403, "apenas o dono do projeto pode restaurar itens")
+    if kind not in archive.SOURCES:
+        raise ApiError(404, "tipo de item desconhecido")
+
+    try:
+        ids = parse_ids(_json_body().get('ids'))
+    except BulkError as error:
+        raise ApiError(400, str(error))
+    results = archive.restore(project_id, kind, ids)
+    restored = [i for i, r in results.items() if r.startswith("restored")]
+    if restored:
+        activity.record(f"{activity.ITEM_TYPES[kind]}.restored", project_id, detail={"ids": restored})
+    return jsonify({
+        "restored": len(restored),
+        "results": {str(i): r for i, r in results.items()},
+    })
+
+
+@api.route('/projects/<int:project_id>/<kind>/<int:item_id>/move', methods=['POST'])
+def move_item(project_id, kind, item_id):
+    project = _project_or_404(project_id)
+    if not is_project_owner(project):
+        raise ApiError(403, "apenas o dono do projeto pode reordenar o backlog")
+    if kind not in ranking.SOURCES:
+        raise ApiError(404, "tipo de item desconhecido")
+
+    payload = _json_body()
+    try:
+        rank = ranking.move(
+            kind, project_id, item_id,
+            after_id=_optional_id(payload, 'after_id'),
+            before_id=_optional_id(payload, 'before_id')
+        )
+    except ranking.RankError as error:
+        db.session.rollback()
+        raise ApiError(400, str(error))
+    bump(project_id)
+    db.session.commit()
+    item_type = activity.ITEM_TYPES[kind]
+    activity.record(f"{item_type}.moved", project_id, item_type, item_id, {"rank": rank})
+    return jsonify({"id": item_id, "rank": rank})
+
+
+# Jobs que um usuário pode pedir para um projeto, e se exigem ser o dono.
+PROJECT_JOBS = {
+    "export": False,
+    "analytics-snapshot": False,
+    "archive": True,
+}
+
+
+@api.route('/projects/<int:project_id>/jobs', methods=['POST'])
+def enqueue_job(project_id):
+    project = _project_or_404(project_id)
+    payload = _json_body()
+    kind = payload.pop('kind', None)
+    if kind not in PROJECT_JOBS:
+        raise ApiError(400, "kind deve ser um de: " + ", ".join(PROJECT_JOBS))
+    if PROJECT_JOBS[kind] and not is_project_owner(project):
+        raise ApiError(403, "apenas o dono do projeto pode agendar este job")
+
+    if kind == "export":
+        payload = {"items": payload.get("items"), "fmt": payload.get("format", "ndjson")}
+        try:
+            transfer.check(payload["items"], payload["fmt"])
+        except transfer.TransferError as error:
+            raise ApiError(400, str(error))
+    elif kind == "archive":
+        payload = {"days": _optional_id(payload, 'days')}
+    else:
+        payload = {}
+
+    job = jobs.enqueue(kind, project_id, current_user.id, **payload)
+    db.session.commit()
+    activity.record("job.enqueued", project_id, detail={"job": job.id, "kind": kind})
+    return jsonify(jobs.as_dict(job)), 202
+
+
+@api.route('/projects/<int:project_id>/jobs')
+def list_jobs(project_id):
+    _project_or_404(project_id)
+    rows = db.session.scalars(
+        select(Job).where(Job.project_id == project_id).order_by(Job.id.desc()).limit(50)
+    ).all()
+    return jsonify({"data": [jobs.as_dict(job) for job in rows]})
+
+
+@api.route('/jobs/<int:job_id>')
+def get_job(job_id):
+    return jsonify(jobs.as_dict(_job_or_404(job_id)))
+
+
+@api.route('/jobs/<int:job_id>/download')
+def download_job(job_id):
+    job = _job_or_404(job_id)
+    if job.kind != "export" or job.status != jobs.DONE:
+        raise ApiError(409, "exportação ainda não concluída")
+    name = json.loads(job.result)["file"]
+    return send_from_directory(jobs.export_dir(), name, as_attachment=True)
+
+
+@api.route('/projects/<int:project_id>/activity')
+def list_activity(project_id):
+    _project_or_404(project_id)
+    query = (
+        select()
+        .select_from(ActivityEntry)
+        .outerjoin(User, User.id == ActivityEntry.user_id)
+        .where(ActivityEntry.project_id == project_id)
+    )
+    query = _filter(query, ActivityEntry.action, 'action')
+    query = _filter(query, ActivityEntry.item_type, 'item_type')
+    query = _filter(query, ActivityEntry.user_id, 'user_id', int)
+    # Mais recentes primeiro; o índice (project_id, id) atende filtro e ordem.
+    page = _paginate(query, ACTIVITY_FIELDS, (ActivityEntry.id,), descending=True)
+    for entry in page["data"]:
+        if "detail" in entry:
+            entry["detail"] = json.loads(entry["detail"])
+    return jsonify(page)
+
+
+def _job_or_404(job_id):
+    job = db.session.get(Job, job_id)
+    if job is None:
+        raise ApiError(404, "job não encontrado")
+    if job.project_id is not None:
+        _project_or_404(job.project_id)
+    elif job.user_id != current_user.id:
+        raise ApiError(403, "acesso negado")
+    return job
+
+
+def _item_or_404(model, project_id, item_id):
+    item = db.session.get(model, item_id)
+    if item is None or item.project_id != project_id:
+        raise ApiError(404, "item não encontrado")
+    return item
+
+
+def _item(item, available):
+    return {name: _encode(getattr(item, name)) for name in available}
+
+
+def _version(payload):
+    # Edições exigem a versão que o cliente leu (compare-and-swap).
+    version = _optional_id(payload, 'version')
+    if version is None:
+        raise ApiError(400, "version é obrigatório")
+    return version
+
+
+def _text(payload, name, required=False):
+    value = payload[name]
+    if value is None and not required:
+        return None
+    if not isinstance(value, str) or (required and not value.strip()):
+        raise ApiError(400, f"valor inválido para {name}")
+    return value.strip()
+
+
+def _date(payload, name):
+    value = payload[name]
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"data inválida para {name} (use YYYY-MM-DD)")
+
+
+def _json_body():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        raise ApiError(400, "corpo JSON esperado")
+    return payload
+
+
+def _optional_id(payload, name):
+    value = payload.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"valor inválido para {name}")
+
+
+def _record_bulk(action, project_id, results, detail):
+    updated = [i for i, r in results.items() if r == "updated"]
+    if updated:
+        activity.record(action, project_id, detail={"ids": updated, **detail})
+
+
+def _bulk_response(results):
+    return {
+        "updated": sum(1 for r in results.values() if r == "updated"),
+        "results": {str(i): r for i, r in results.items()},
+    }
+
+
+def _project_or_404(project_id):
+    project = db.session.get(Project, project_id)
+    if project is None:
+        raise ApiError(404, "projeto não encontrado")
+    if not user_has_access(project):
+        raise ApiError(403, "acesso negado")
+    return project
+
+
+def _filter(query, column, arg, convert=str):
+    raw = request.args.get(arg)
+    if raw is None:
+        return query
+    if raw in ('', 'null', 'none'):
+        return query.where(column.is_(None))
+    try:
+        return query.where(column == convert(raw))
+    except ValueError:
+        raise ApiError(400, f"valor inválido para {arg}")
+
+
+def _order(keys):
+    # A primeira chave é a ordem padrão; o cursor só vale para a mesma ordem.
+    name = request.args.get('order', next(iter(keys)))
+    if name not in keys:
+        raise ApiError(400, "ordem desconhecida: " + name)
+    return keys[name]
+
+
+def _fields(available):
+    raw = request.args.get('fields')
+    if not raw:
+        return list(available)
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ApiError(400, "campos desconhecidos: " + ", ".join(unknown))
+    return names
+
+
+def _paginate(query, available, key, descending=False):
+    limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+    limit = max(1, min(limit, MAX_LIMIT))
+    names = _fields(available)
+
+    # As colunas da chave de paginação sempre vão no SELECT para montar o
+    # próximo cursor, mesmo que o cliente não as tenha pedido.
+    key_labels = [f"_key{i}" for i in range(len(key))]
+    query = query.add_columns(*[available[name].label(name) for name in names])
+    query = query.add_columns(*[column.label(label) for column, label in zip(key, key_labels)])
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        query = query.where(_after(key, _decode_cursor(cursor, key), descending))
+
+    # rank e created_at aceitam NULL (linhas antigas, inserts em lote): NULL
+    # conta como o menor valor em qualquer banco.
+    query = query.order_by(*[
+        column.desc().nulls_last() if descending else column.asc().nulls_first() for column in key
+    ])
+    query = query.limit(limit + 1)
+    rows = db.session.execute(query).mappings().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor([rows[-1][label] for label in key_labels])
+
+    return {
+        "data": [{name: _encode(row[name]) for name in names} for row in rows],
+        "next_cursor": next_cursor,
+    }
+
+
+def _after(key, values, descending):
+    # Só a primeira coluna da chave pode ser NULL (a última é sempre o id).
+    # Com valor no cursor, a comparação de tuplas usa o índice e já exclui as
+    # linhas NULL, que vêm antes no ASC; no DESC elas vêm depois e entram à parte.
+    first, rest = key[0], key[1:]
+    if not rest:
+        return first < values[0] if descending else first > values[0]
+    if values[0] is None:
+        tail = tuple_(*rest) < tuple_(*values[1:]) if descending else tuple_(*rest) > tuple_(*values[1:])
+        if descending:
+            return first.is_(None) & tail
+        return (first.is_(None) & tail) | first.is_not(None)
+    if descending:
+        return (tuple_(*key) < tuple_(*values)) | first.is_(None)
+    return tuple_(*key) > tuple_(*values)
+
+
+def _encode(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _encode_cursor(values):
+    raw = json.dumps([_encode(v) for v in values]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(cursor, key):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if len(values) != len(key):
+            raise ValueError
+        return [
+            datetime.fromisoformat(v) if v is not None and isinstance(column.type, db.DateTime) else v
+            for column, v in zip(key, values)
+        ]
+    except (ValueError, TypeError):
+        raise ApiError(400, "cursor inválido")
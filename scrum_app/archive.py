@@ -0,0 +1,176 @@
+from datetime import date, datetime, timedelta
+import click
+from flask import current_app
+from sqlalchemy import delete, func, literal, or_, select
+from . import db, changefeed, versioning
+from .models import Sprint, Task, UserStory, StatusTransition, ArchivedTask, ArchivedStory
+from .tracking import Change
+
+# Arquivamento de trabalho concluído.
+#
+# Tasks e user stories Done de sprints já encerradas, ou Done há mais de
+# ARCHIVE_DONE_AFTER_DAYS dias, saem de task/user_stories e vão para
+# archived_tasks/archived_user_stories com o mesmo id. Assim as consultas do
+# dia a dia (projeto, Kanban, busca, API) só enxergam itens ativos. O arquivo
+# tem leitura própria (load_archive) e os itens podem ser restaurados.
+#
+# task e user_stories usam AUTOINCREMENT (migração 15, que também põe a
+# sequência acima do maior id arquivado), então um id arquivado nunca volta a
+# ser dado a um item novo e a restauração devolve o item com o id original.
+#
+# Itens que ainda não estão Done nunca são arquivados, mesmo em sprints
+# encerradas: continuam sendo trabalho pendente. Os snapshots de burndown não
+# mudam, porque analytics conta as tabelas de arquivo junto com as ativas.
+# Um item restaurado que continue Done numa sprint encerrada volta para o
+# arquivo na próxima execução; a restauração serve para reabrir ou replanejar.
+
+DONE = "Done"
+BATCH = 500
+
+SOURCES = {
+    "tasks": (Task, ArchivedTask, "task"),
+    "stories": (UserStory, ArchivedStory, "story"),
+}
+
+
+def candidates(kind, project_id=None, today=None, done_after_days=None):
+    model, _, item_type = SOURCES[kind]
+    today = today or date.today()
+    if done_after_days is None:
+        done_after_days = current_app.config['ARCHIVE_DONE_AFTER_DAYS']
+    cutoff = datetime.combine(today, datetime.min.time()) - timedelta(days=done_after_days)
+
+    sprint_ended = db.exists().where(
+        (Sprint.id == model.sprint_id) & (Sprint.end_date < today)
+    )
+    done_at = (
+        select(func.max(StatusTransition.changed_at))
+        .where(
+            StatusTransition.item_type == item_type,
+            StatusTransition.item_id == model.id,
+            StatusTransition.to_status == DONE
+        )
+        .scalar_subquery()
+    )
+    # Task sem histórico de status (anterior ao analytics) usa created_at.
+    if model is Task:
+        done_at = func.coalesce(done_at, Task.created_at)
+
+    query = select(model.id).where(model.status == DONE, or_(sprint_ended, done_at < cutoff))
+    if project_id is not None:
+        query = query.where(model.project_id == project_id)
+    return query.order_by(model.id)
+
+
+def archive(project_id=None, today=None, done_after_days=None):
+    moved = {}
+    for kind in SOURCES:
+        query = candidates(kind, project_id, today, done_after_days).limit(BATCH)
+        moved[kind] = 0
+        while True:
+            ids = db.session.scalars(query).all()
+            if not ids:
+                break
+            _move_to_archive(kind, ids)
+            db.session.commit()
+            moved[kind] += len(ids)
+    return moved
+
+
+def _move_to_archive(kind, ids):
+    model, archived, item_type = SOURCES[kind]
+    columns = [column.name for column in model.__table__.columns]
+    rows = db.session.execute(
+        select(model.id, model.project_id, model.sprint_id, model.status).where(model.id.in_(ids))
+    ).all()
+
+    # Só bancos com ids reaproveitados antes da migração 15 podem ter o id
+    # já ocupado no arquivo; nesse caso a cópia arquivada recebe um id novo.
+    taken = set(db.session.scalars(select(archived.id).where(archived.id.in_(ids))))
+    now = literal(datetime.utcnow())
+    free = [i for i in ids if i not in taken]
+    if free:
+        db.session.execute(
+            archived.__table__.insert().from_select(
+                columns + ["archived_at"],
+                select(*model.__table__.columns, now).where(model.id.in_(free))
+            )
+        )
+    if taken:
+        rest = [c for c in model.__table__.columns if c.name != "id"]
+        db.session.execute(
+            archived.__table__.insert().from_select(
+                [c.name for c in rest] + ["archived_at"],
+                select(*rest, now).where(model.id.in_(taken))
+            )
+        )
+    db.session.execute(
+        delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False)
+    )
+
+    # Sem tracking.track(): para o burndown o item continua existindo. Só o
+    # feed do Kanban (remove o card) e a versão do projeto precisam saber.
+    changefeed.record_changes([
+        Change(item_type, row.id, row.project_id, row.sprint_id, None, row.status, None)
+        for row in rows
+    ])
+    versioning.bump(*{row.project_id for row in rows})
+
+
+def restore(project_id, kind, ids):
+    model, archived, item_type = SOURCES[kind]
+    rows = db.session.scalars(
+        select(archived).where(archived.project_id == project_id, archived.id.in_(ids))
+    ).all()
+    if not rows:
+        return {i: "not_found" for i in ids}
+
+    sprint_ids = set(db.session.scalars(select(Sprint.id).where(Sprint.project_id == project_id)))
+    taken = set(db.session.scalars(select(model.id).where(model.id.in_([r.id for r in rows]))))
+    columns = [column.name for column in model.__table__.columns]
+
+    results = {i: "not_found" for i in ids}
+    changes = []
+    for row in rows:
+        values = {name: getattr(row, name) for name in columns}
+        if values["sprint_id"] not in sprint_ids:
+            values["sprint_id"] = None
+        # Mesmo caso de _move_to_archive: id ocupado só em bancos anteriores
+        # à migração 15.
+        if row.id in taken:
+            del values["id"]
+        new_id = db.session.execute(
+            model.__table__.insert().returning(model.__table__.c.id), values
+        ).scalar_one()
+        results[row.id] = "restored" if new_id == row.id else f"restored as {new_id}"
+        changes.append(Change(item_type, new_id, project_id, None, values["sprint_id"], None, row.status))
+
+    db.session.execute(
+        delete(archived)
+        .where(archived.id.in_([row.id for row in rows]))
+        .execution_options(synchronize_session=False)
+    )
+    changefeed.record_changes(changes)
+    versioning.bump(project_id)
+    db.session.commit()
+    return results
+
+
+def load_archive(project_id, kind, page_size, before_id=None):
+    archived = SOURCES[kind][1]
+    query = archived.query.filter_by(project_id=project_id)
+    if before_id:
+        query = query.filter(archived.id < before_id)
+    rows = query.order_by(archived.id.desc()).limit(page_size + 1).all()
+    next_cursor = rows[page_size - 1].id if len(rows) > page_size else None
+    return rows[:page_size], next_cursor
+
+
+def init_app(app):
+    @app.cli.command('archive')
+    @click.option('--project', type=int, default=None, help='Arquiva só este projeto.')
+    @click.option('--days', type=int, default=None, help='Dias em Done antes de arquivar.')
+    def archive_command(project, days):
+        """Move tasks e user stories concluídas para o arquivo."""
+        moved = archive(project, done_after_days=days)
+        click.echo(f"{moved['tasks']} tasks e {moved['stories']} user stories arquivadas")
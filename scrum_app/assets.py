@@ -0,0 +1,244 @@
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+import click
+from flask import Blueprint, abort, current_app, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+# CSS/JS servidos pelo próprio app, sem CDN.
+#
+# As dependências de terceiros ficam versionadas em scrum_app/vendor/, com o
+# hash SRI fixado em VENDOR. Só `flask assets-vendor`, rodado por quem mantém
+# o projeto ao trocar de versão, acessa a rede. `flask assets-build`, parte do
+# deploy, funciona offline: confere vendor/ contra os hashes e minifica cada
+# asset, grava em static/dist/ com o hash do conteúdo no nome, junto com as
+# versões .gz (e .br, se o módulo brotli estiver instalado), e escreve o
+# manifest.json com nome lógico -> arquivo. Os templates usam asset_url(nome),
+# que resolve pelo manifest; como o nome muda quando o conteúdo muda, esses
+# arquivos são servidos com Cache-Control immutable de um ano, já comprimidos.
+# Sem o build (desenvolvimento), os arquivos de origem são servidos como
+# estão em /assets/src/; o CDN só entra se o arquivo de vendor/ faltar. Com
+# ASSETS_REQUIRE_BUILD (produção) o app não sobe sem o manifest completo.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+VENDOR_DIR = os.path.join(ROOT, "vendor")
+DIST_DIR = os.path.join(ROOT, "static", "dist")
+MANIFEST = os.path.join(DIST_DIR, "manifest.json")
+
+# Dependências de terceiros: arquivo em vendor/ -> (URL, integridade SRI).
+VENDOR = {
+    "bootstrap.min.css": (
+        "https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css",
+        "sha384-9ndCyUaIbzAi2FUVXJi0CjmCapSmO7SnpJef0486qhLnuZ2cdeRhO02iuK6FUUVM",
+    ),
+}
+
+# Nome lógico usado nos templates -> arquivo de origem (relativo ao pacote).
+ASSETS = {
+    "bootstrap.css": "vendor/bootstrap.min.css",
+    "style.css": "static/style.css",
+}
+
+# Último recurso do desenvolvimento, se o arquivo de vendor/ não existir.
+FALLBACK = {
+    "bootstrap.css": VENDOR["bootstrap.min.css"][0],
+}
+
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+assets = Blueprint("assets", __name__)
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def asset_url(name):
+    built = current_app.extensions["assets"].get(name)
+    if built:
+        return url_for("assets.asset", filename=built)
+    source = os.path.join(ROOT, ASSETS[name])
+    if not os.path.exists(source) and current_app.config["ASSETS_CDN_FALLBACK"] and name in FALLBACK:
+        return FALLBACK[name]
+    return url_for("assets.source", name=name)
+
+
+@assets.route("/assets/src/<name>")
+def source(name):
+    # Arquivo de origem, sem build: nome fixo, então sem cache longo.
+    if name not in ASSETS:
+        abort(404)
+    directory, path = os.path.split(os.path.join(ROOT, ASSETS[name]))
+    response = send_from_directory(directory, path, max_age=0)
+    response.headers.pop("Content-Disposition", None)
+    return response
+
+
+@assets.route("/assets/<path:filename>")
+def asset(filename):
+    # Só os arquivos com hash do build; a versão comprimida que o cliente
+    # aceitar vai no lugar do original, com Content-Encoding.
+    if filename not in current_app.extensions["assets"].values():
+        abort(404)
+    accepted = request.accept_encodings
+    for encoding, suffix in ENCODINGS:
+        if accepted[encoding] and os.path.exists(os.path.join(DIST_DIR, filename + suffix)):
+            response = _send(filename + suffix, filename)
+            response.headers["Content-Encoding"] = encoding
+            break
+    else:
+        response = _send(filename, filename)
+    response.vary.add("Accept-Encoding")
+    response.cache_control.immutable = True
+    return response
+
+
+def _send(path, filename):
+    mimetype = "text/css" if filename.endswith(".css") else "text/javascript"
+    response = send_from_directory(
+        DIST_DIR, path, mimetype=mimetype, max_age=current_app.config["ASSETS_MAX_AGE"]
+    )
+    # send_from_directory nomeia o arquivo enviado (".css.gz"); o recurso é o .css.
+    response.headers.pop("Content-Disposition", None)
+    return response
+
+
+def vendor(names=None):
+    from urllib.request import urlopen
+    os.makedirs(VENDOR_DIR, exist_ok=True)
+    fetched = []
+    for name in names or VENDOR:
+        url, integrity = VENDOR[name]
+        with urlopen(url, timeout=30) as response:
+            data = response.read()
+        actual = _integrity(integrity, data)
+        if actual != integrity:
+            raise click.ClickException(f"{name}: integridade não confere ({actual})")
+        with open(os.path.join(VENDOR_DIR, name), "wb") as f:
+            f.write(data)
+        fetched.append(name)
+    return fetched
+
+
+def check_vendor():
+    # Offline: o build usa só o que está versionado em vendor/.
+    for name, (url, integrity) in VENDOR.items():
+        path = os.path.join(VENDOR_DIR, name)
+        if not os.path.exists(path):
+            raise click.ClickException(
+                f"vendor/{name} não está no repositório; quem mantém o projeto deve rodar "
+                f"`flask assets-vendor` (com rede) e versionar o arquivo"
+            )
+        with open(path, "rb") as f:
+            actual = _integrity(integrity, f.read())
+        if actual != integrity:
+            raise click.ClickException(f"vendor/{name}: integridade não confere ({actual})")
+
+
+def _integrity(expected, data):
+    algorithm = expected.split("-", 1)[0]
+    return f"{algorithm}-{base64.b64encode(hashlib.new(algorithm, data).digest()).decode()}"
+
+
+def build(clean=False):
+    check_vendor()
+    os.makedirs(DIST_DIR, exist_ok=True)
+    manifest = {}
+    for name, source in ASSETS.items():
+        path = os.path.join(ROOT, source)
+        if not os.path.exists(path):
+            raise click.ClickException(f"{source} não encontrado")
+        with open(path, "rb") as f:
+            data = minify(source, f.read())
+
+        stem, ext = os.path.splitext(name)
+        built = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+        _write(built, data)
+        _write(built + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write(built + ".br", brotli.compress(data, quality=11))
+        manifest[name] = built
+
+    _write("manifest.json", json.dumps(manifest, indent=2, sort_keys=True).encode())
+    # Sem --clean os arquivos de builds anteriores ficam: páginas em cache
+    # (ou workers ainda na versão anterior) podem continuar pedindo por eles.
+    if clean:
+        keep = {"manifest.json"} | {
+            built + suffix for built in manifest.values() for suffix in ("", ".gz", ".br")
+        }
+        for name in os.listdir(DIST_DIR):
+            if name not in keep:
+                os.remove(os.path.join(DIST_DIR, name))
+    return manifest
+
+
+def minify(source, data):
+    if ".min." in source:
+        return data
+    if source.endswith(".css"):
+        return _minify_css(data.decode("utf-8")).encode("utf-8")
+    if source.endswith(".js") and rjsmin is not None:
+        return rjsmin.jsmin(data.decode("utf-8")).encode("utf-8")
+    return data
+
+
+def _minify_css(text):
+    # Conservador: tira comentários (menos /*! licenças */) e espaços em
+    # volta de { } ; , >. Não mexe em ":" porque "a :hover" != "a:hover".
+    text = re.sub(r"/\*(?!!).*?\*/", "", text, flags=re.S)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+    return text.replace(";}", "}").strip()
+
+
+def _write(name, data):
+    path = os.path.join(DIST_DIR, name)
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+
+
+def init_app(app):
+    app.extensions["assets"] = load_manifest()
+    missing = sorted(set(ASSETS) - set(app.extensions["assets"]))
+    if missing and app.config["ASSETS_REQUIRE_BUILD"]:
+        raise RuntimeError(
+            f"static/dist/manifest.json sem {', '.join(missing)}: rode `flask assets-build` no deploy"
+        )
+    if missing and not app.config["ASSETS_CDN_FALLBACK"]:
+        app.logger.warning("static/dist/manifest.json incompleto: rode `flask assets-build`")
+    app.register_blueprint(assets)
+    app.add_template_global(asset_url)
+
+
+def init_cli(app):
+    @app.cli.command("assets-vendor")
+    def assets_vendor():
+        """Baixa (com rede) as dependências de terceiros para scrum_app/vendor/, a versionar."""
+        for name in vendor():
+            click.echo(f"vendor/{name}")
+
+    @app.cli.command("assets-build")
+    @click.option("--clean", is_flag=True, help="Remove arquivos de builds anteriores.")
+    def assets_build(clean):
+        """Confere vendor/, minifica, gera nomes com hash e pré-comprime os assets (offline)."""
+        for name, built in build(clean).items():
+            click.echo(f"{name} -> dist/{built}")
+        if brotli is None:
+            click.echo("módulo brotli ausente: só versões .gz geradas")
@@ -0,0 +1,359 @@
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import click
+from sqlalchemy import event
+
+# Benchmark das rotas do blueprint main. Cria um banco SQLite temporário com
+# seeding.seed(), sobe o app nele e chama cada rota pelo test client do Flask,
+# medindo latência (p50/p95/p99) e número de statements SQL por request.
+# Com um baseline salvo, o modo de regressão falha quando alguma rota passa
+# do p95 ou do número de queries registrados (com tolerância).
+#
+# run_startup() mede o boot de um worker: cada amostra é um processo Python
+# novo que importa o pacote e chama create_app() num banco já migrado,
+# reportando o tempo até o app ficar pronto, o pico de memória residente e
+# quantos módulos foram carregados.
+
+STARTUP_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from scrum_app import create_app
+app = create_app(sys.argv[1], {"SQLALCHEMY_DATABASE_URI": sys.argv[2], "ASSETS_REQUIRE_BUILD": False})
+seconds = time.perf_counter() - started
+try:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+except ImportError:
+    rss_kb = None
+print(json.dumps({"seconds": seconds, "rss_kb": rss_kb, "modules": len(sys.modules)}))
+"""
+
+
+# Rotas do blueprint main que o benchmark não mede, com o motivo. Qualquer
+# outra rota sem caso aparece como "sem caso" no relatório.
+SKIPPED = {
+    "main.logout": "encerra a sessão do cliente usado pelas outras rotas",
+    "main.kanban_stream": "SSE de longa duração; o custo por evento é o de kanban_changes",
+}
+
+
+def build_cases(s, make):
+    # Cada caso é (endpoint, método, request). request() devolve (url, dados)
+    # e roda fora da medição, então pode criar com make() o item que a rota
+    # vai excluir, restaurar ou adicionar em cada iteração.
+    from .models import ArchivedTask, ProjectMembership, Sprint, Task, User, UserStory
+
+    p, sp, us, t = s.project_id, s.sprint_id, s.story_id, s.task_id
+    # O seed põe a primeira metade das tasks, em ordem de id, no projeto foco.
+    neighbour = t + 1
+    statuses = ["Doing", "Done", "To Do"]
+    counter = {"n": 0}
+
+    def next_n():
+        counter["n"] += 1
+        return counter["n"]
+
+    def next_status():
+        return statuses[next_n() % len(statuses)]
+
+    def fixed(url, data=None):
+        return lambda: (url, data)
+
+    def new_user():
+        return make(User, username=f"bench-{next_n():06d}", password="-")
+
+    def restore():
+        archived = make(ArchivedTask, title="Arquivada", status="Done", project_id=p)
+        return f"/project/{p}/archive/restore", {"kind": "tasks", "ids": str(archived)}
+
+    def add_member():
+        return f"/project/{p}/members/add", {"user_id": str(new_user()), "role": "Developer"}
+
+    def delete_member():
+        membership = make(ProjectMembership, user_id=new_user(), project_id=p, role="Developer")
+        return f"/project/{p}/members/{membership}/delete", None
+
+    def import_csv():
+        body = "title,description,status\n" + "".join(
+            f"Importada {n},Criada pelo benchmark,To Do\n" for n in range(20)
+        )
+        return f"/project/{p}/import", {
+            "kind": "tasks", "format": "csv", "file": (io.BytesIO(body.encode()), "tasks.csv")
+        }
+
+    task_form = {"title": "Task medida", "description": "Editada pelo benchmark", "status": "Doing"}
+    story_form = {"title": "Story medida", "description": "Editada pelo benchmark", "status": "To Do"}
+    sprint_form = {"name": "Sprint medida", "goal": "Benchmark", "start_date": "", "end_date": ""}
+
+    return [
+        ("main.home", "GET", fixed("/")),
+        ("main.login", "GET", fixed("/login")),
+        ("main.register", "GET", fixed("/register")),
+        ("main.dashboard", "GET", fixed("/dashboard")),
+        ("main.new_project", "POST", lambda: ("/project/new", {"name": f"Projeto medido {next_n()}"})),
+        ("main.view_project", "GET", fixed(f"/project/{p}")),
+        ("main.search_project", "GET", fixed(f"/project/{p}/search?q=sprint")),
+        ("main.export_items", "GET", fixed(f"/project/{p}/export/tasks.csv")),
+        ("main.import_items", "POST", import_csv),
+        ("main.project_archive", "GET", fixed(f"/project/{p}/archive?kind=tasks")),
+        ("main.run_archive", "POST", fixed(f"/project/{p}/archive/run")),
+        ("main.restore_archived", "POST", restore),
+        ("main.new_sprint", "GET", fixed(f"/project/{p}/sprint/new")),
+        ("main.new_sprint", "POST", fixed(f"/project/{p}/sprint/new", sprint_form)),
+        ("main.edit_sprint", "GET", fixed(f"/sprint/{sp}/edit")),
+        ("main.edit_sprint", "POST", fixed(f"/sprint/{sp}/edit", sprint_form)),
+        ("main.sprint_details", "GET", fixed(f"/sprint/{sp}")),
+        ("main.delete_sprint", "POST",
+         lambda: (f"/sprint/{make(Sprint, name='Descartável', project_id=p)}/delete", None)),
+        ("main.new_userstory", "GET", fixed(f"/project/{p}/userstory/new")),
+        ("main.new_userstory", "POST", fixed(f"/project/{p}/userstory/new", story_form)),
+        ("main.edit_userstory", "GET", fixed(f"/project/{p}/userstory/{us}/edit")),
+        ("main.edit_userstory", "POST", fixed(f"/project/{p}/userstory/{us}/edit", story_form)),
+        ("main.delete_userstory", "POST", lambda: (
+            f"/project/{p}/userstory/{make(UserStory, title='Descartável', description='', project_id=p)}"
+            "/delete", None)),
+        ("main.new_task", "GET", fixed(f"/project/{p}/task/new")),
+        ("main.new_task", "POST", fixed(f"/project/{p}/task/new", task_form)),
+        ("main.edit_task", "GET", fixed(f"/project/{p}/task/{t}/edit")),
+        ("main.edit_task", "POST", fixed(f"/project/{p}/task/{t}/edit", task_form)),
+        ("main.delete_task", "POST",
+         lambda: (f"/project/{p}/task/{make(Task, title='Descartável', project_id=p)}/delete", None)),
+        ("main.move_item", "POST", fixed(f"/project/{p}/tasks/{t}/move", {"after_id": str(neighbour)})),
+        ("main.kanban_board", "GET", fixed(f"/project/{p}/board")),
+        ("main.kanban_column", "GET", fixed(f"/project/{p}/board/column?status=Done")),
+        ("main.kanban_changes", "GET", fixed(f"/project/{p}/board/changes?since=0")),
+        ("main.project_members", "GET", fixed(f"/project/{p}/members")),
+        ("main.search_project_users", "GET", fixed(f"/project/{p}/users/search?q=user0")),
+        ("main.add_project_member", "POST", add_member),
+        ("main.delete_project_member", "POST", delete_member),
+        ("main.update_task_status", "POST", lambda: (f"/task/{t}/status/{next_status()}", None)),
+        ("main.add_us_to_sprint", "POST", fixed(f"/sprint/{sp}/add_us", {"userstory_id": str(us)})),
+        ("main.remove_us_from_sprint", "POST", lambda: (
+            f"/sprint/{sp}/remove_us/"
+            f"{make(UserStory, title='Planejada', description='', project_id=p, sprint_id=sp)}", None)),
+    ]
+
+
+def run(scale_name="small", iterations=20, seed_value=42, cache=False, routes=None, keep=False):
+    from . import create_app, db, migrations
+    from .seeding import SCALES, seed
+
+    scale = SCALES[scale_name]
+    workdir = tempfile.mkdtemp(prefix="scrum-bench-")
+    uri = "sqlite:///" + os.path.join(workdir, "bench.db")
+
+    try:
+        app = create_app("production", {
+            "SQLALCHEMY_DATABASE_URI": uri,
+            "FRAGMENT_CACHE_ENABLED": cache,
+            "FRAGMENT_CACHE_SHARED_PATH": None,
+            "PERMISSION_CACHE_TTL": 0,
+            "JOBS_MODE": "manual",
+            # O benchmark não pede CSS: roda com ou sem `flask assets-build`.
+            "ASSETS_REQUIRE_BUILD": False,
+        })
+
+        with app.app_context():
+            migrations.install(db)
+            started = time.perf_counter()
+            seeded = seed(scale, seed_value)
+            seed_seconds = time.perf_counter() - started
+
+            statements = {"n": 0}
+
+            def count(*args, **kwargs):
+                statements["n"] += 1
+
+            event.listen(db.engine, "before_cursor_execute", count)
+
+        def make(model, **values):
+            with app.app_context():
+                item = model(**values)
+                db.session.add(item)
+                db.session.commit()
+                return item.id
+
+        client = app.test_client()
+        client.post("/login", data={"username": seeded.owner, "password": seeded.password})
+
+        results = {}
+        cases = build_cases(seeded, make)
+        for endpoint, method, request in cases:
+            name = endpoint if method == "GET" else f"{endpoint} {method}"
+            if routes and endpoint not in routes and name not in routes:
+                continue
+            latencies, queries, status = [], [], None
+            # Uma chamada de aquecimento (templates compilados, caches de plano).
+            _call(client, method, *request())
+            for _ in range(iterations):
+                url, data = request()
+                statements["n"] = 0
+                begin = time.perf_counter()
+                status = _call(client, method, url, data)
+                latencies.append((time.perf_counter() - begin) * 1000)
+                queries.append(statements["n"])
+            results[name] = _summary(latencies, queries, status)
+
+        covered = {endpoint for endpoint, _, _ in cases}
+        uncovered = sorted(
+            rule.endpoint for rule in app.url_map.iter_rules()
+            if rule.endpoint.startswith("main.") and rule.endpoint not in covered | set(SKIPPED)
+        )
+
+        app.extensions['activity'].close()
+        with app.app_context():
+            db.engine.dispose()
+
+        return {
+            "scale": scale_name,
+            "seed": seed_value,
+            "iterations": iterations,
+            "cache": cache,
+            "seed_seconds": round(seed_seconds, 2),
+            "counts": seeded.counts,
+            "routes": results,
+            "skipped": SKIPPED,
+            "uncovered": sorted(set(uncovered)),
+        }
+    finally:
+        if not keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run_startup(workers=5, config_name="production"):
+    from . import create_app, db, migrations
+
+    workdir = tempfile.mkdtemp(prefix="scrum-startup-")
+    uri = "sqlite:///" + os.path.join(workdir, "startup.db")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    try:
+        app = create_app("production", {"SQLALCHEMY_DATABASE_URI": uri, "ASSETS_REQUIRE_BUILD": False})
+        with app.app_context():
+            migrations.install(db)
+            db.engine.dispose()
+
+        samples = []
+        for _ in range(workers):
+            output = subprocess.run(
+                [sys.executable, "-c", STARTUP_PROBE, config_name, uri],
+                cwd=root, capture_output=True, text=True, check=True
+            ).stdout
+            samples.append(json.loads(output.strip().splitlines()[-1]))
+
+        seconds = sorted(s["seconds"] * 1000 for s in samples)
+        rss = [s["rss_kb"] for s in samples if s["rss_kb"] is not None]
+        return {
+            "config": config_name,
+            "workers": workers,
+            "p50_ms": round(seconds[len(seconds) // 2], 1),
+            "max_ms": round(seconds[-1], 1),
+            "rss_kb": max(rss) if rss else None,
+            "modules": max(s["modules"] for s in samples),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _call(client, method, url, data):
+    # O corpo é lido aqui: exportações são streams e só rodam quando lidas.
+    response = client.open(url, method=method, data=data, headers={"Referer": "/dashboard"})
+    response.get_data()
+    response.close()
+    return response.status_code
+
+
+def _summary(latencies, queries, status):
+    ordered = sorted(latencies)
+
+    def percentile(p):
+        return round(ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))], 3)
+
+    return {
+        "status": status,
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+        "queries": max(queries),
+    }
+
+
+def compare(report, baseline, tolerance=0.25, slack_ms=5.0, query_slack=0):
+    failures = []
+    for endpoint, current in report["routes"].items():
+        expected = baseline.get("routes", {}).get(endpoint)
+        if not expected:
+            continue
+        # Folga absoluta além da relativa: rotas de poucos ms variam muito
+        # entre execuções e não devem falhar por ruído.
+        limit_ms = expected["p95_ms"] * (1 + tolerance) + slack_ms
+        if current["p95_ms"] > limit_ms:
+            failures.append(f"{endpoint}: p95 {current['p95_ms']:.1f} ms > {limit_ms:.1f} ms")
+        if current["queries"] > expected["queries"] + query_slack:
+            failures.append(f"{endpoint}: {current['queries']} queries > {expected['queries']}")
+    return failures
+
+
+def init_app(app):
+    @app.cli.command("bench")
+    @click.option("--scale", type=click.Choice(["tiny", "small", "medium", "large"]), default="small", show_default=True)
+    @click.option("--iterations", default=20, show_default=True)
+    @click.option("--seed", "seed_value", default=42, show_default=True)
+    @click.option("--cache/--no-cache", default=False, help="Liga o cache de fragmentos.")
+    @click.option("--route", "routes", multiple=True,
+                  help="Mede só este endpoint (repetível; ex.: main.edit_task ou \"main.edit_task POST\").")
+    @click.option("--baseline", type=click.Path(dir_okay=False), default=None, help="Arquivo JSON de baseline.")
+    @click.option("--save-baseline", is_flag=True, help="Grava o resultado como novo baseline.")
+    @click.option("--tolerance", default=0.25, show_default=True, help="Folga relativa no p95.")
+    @click.option("--slack-ms", default=5.0, show_default=True, help="Folga absoluta no p95, em ms.")
+    @click.option("--output", type=click.Path(dir_okay=False), default=None, help="Grava o relatório em JSON.")
+    def bench(scale, iterations, seed_value, cache, routes, baseline, save_baseline, tolerance, slack_ms, output):
+        """Mede latência e queries das rotas num banco sintético temporário."""
+        report = run(scale, iterations, seed_value, cache, set(routes) or None)
+
+        click.echo(f"escala {scale}: {report['counts']} (seed em {report['seed_seconds']}s)")
+        click.echo(f"{'endpoint':38} {'status':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8}")
+        for endpoint, r in report["routes"].items():
+            click.echo(f"{endpoint:38} {r['status']:>6} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+                       f"{r['p99_ms']:>9.2f} {r['queries']:>8}")
+        for endpoint, reason in report["skipped"].items():
+            click.echo(f"não medida: {endpoint} ({reason})")
+        for endpoint in report["uncovered"]:
+            click.echo(f"sem caso: {endpoint}", err=True)
+
+        if output:
+            with open(output, "w") as f:
+                json.dump(report, f, indent=2)
+
+        if baseline and save_baseline:
+            with open(baseline, "w") as f:
+                json.dump(report, f, indent=2)
+            click.echo(f"baseline gravado em {baseline}")
+        elif baseline:
+            with open(baseline) as f:
+                failures = compare(report, json.load(f), tolerance, slack_ms)
+            if failures:
+                for failure in failures:
+                    click.echo(f"REGRESSÃO {failure}", err=True)
+                raise click.ClickException(f"{len(failures)} rotas acima do baseline")
+            click.echo("sem regressões em relação ao baseline")
+
+    @app.cli.command("bench-startup")
+    @click.option("--workers", default=5, show_default=True, help="Processos medidos, um de cada vez.")
+    @click.option("--config", "config_name", default="production", show_default=True)
+    @click.option("--output", type=click.Path(dir_okay=False), default=None, help="Grava o relatório em JSON.")
+    def bench_startup(workers, config_name, output):
+        """Mede tempo de boot e memória de um worker em processos novos."""
+        report = run_startup(workers, config_name)
+        rss = f"{report['rss_kb'] / 1024:.1f} MB" if report["rss_kb"] else "n/d"
+        click.echo(f"{report['workers']} workers ({report['config']}): p50 {report['p50_ms']} ms, "
+                   f"máx {report['max_ms']} ms, RSS {rss}, {report['modules']} módulos")
+        if output:
+            with open(output, "w") as f:
+                json.dump(report, f, indent=2)
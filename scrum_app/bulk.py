@@ -0,0 +1,128 @@
+from sqlalchemy import update
+from . import db
+from .models import Task, UserStory, Sprint, KANBAN_STATUSES
+from .permissions import has_membership
+from .tracking import Change, track
+
+# Operações em lote: cada chamada valida os ids com uma consulta, aplica um
+# único UPDATE para todos os itens válidos e confirma tudo numa transação só.
+# O retorno traz o resultado de cada id ("updated" ou o motivo da recusa).
+# Os itens alterados têm a versão incrementada, como num UPDATE do ORM (ver
+# concurrency.py).
+
+
+class BulkError(ValueError):
+    pass
+
+
+def update_tasks(project_id, task_ids, values):
+    changes = task_values(project_id, values)
+    if not changes:
+        raise BulkError("nenhuma alteração informada")
+
+    found = _existing(Task, project_id, task_ids)
+    if found:
+        db.session.execute(
+            update(Task)
+            .where(Task.project_id == project_id, Task.id.in_(found))
+            .values(**changes, version=Task.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        track(_changes("task", project_id, found, changes))
+    db.session.commit()
+    return _results(task_ids, found)
+
+
+def task_values(project_id, values):
+    # Valida status, sprint e responsável de uma task; usado também na
+    # edição de uma task só pela API.
+    changes = {}
+
+    if 'status' in values:
+        if values['status'] not in KANBAN_STATUSES:
+            raise BulkError("status inválido")
+        changes['status'] = values['status']
+
+    if 'sprint_id' in values:
+        sprint_id = _optional_int(values['sprint_id'], "sprint_id")
+        if sprint_id is not None and not _sprint_in_project(sprint_id, project_id):
+            raise BulkError("sprint não pertence ao projeto")
+        changes['sprint_id'] = sprint_id
+
+    if 'assigned_to' in values:
+        assigned_to = _optional_int(values['assigned_to'], "assigned_to")
+        if assigned_to is not None and not has_membership(project_id, assigned_to):
+            raise BulkError("responsável precisa ser membro do projeto")
+        changes['assigned_to'] = assigned_to
+
+    return changes
+
+
+def plan_stories(project_id, story_ids, sprint_id):
+    sprint_id = _optional_int(sprint_id, "sprint_id")
+    if sprint_id is not None and not _sprint_in_project(sprint_id, project_id):
+        raise BulkError("sprint não pertence ao projeto")
+
+    found = _existing(UserStory, project_id, story_ids)
+    if found:
+        db.session.execute(
+            update(UserStory)
+            .where(UserStory.project_id == project_id, UserStory.id.in_(found))
+            .values(sprint_id=sprint_id, version=UserStory.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        track(_changes("story", project_id, found, {"sprint_id": sprint_id}))
+    db.session.commit()
+    return _results(story_ids, found)
+
+
+def parse_ids(raw):
+    try:
+        ids = [int(i) for i in raw]
+    except (TypeError, ValueError):
+        raise BulkError("lista de ids inválida")
+    if not ids:
+        raise BulkError("nenhum item selecionado")
+    return list(dict.fromkeys(ids))
+
+
+def _optional_int(value, name):
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise BulkError(f"valor inválido para {name}")
+
+
+def _existing(model, project_id, ids):
+    rows = db.session.query(model.id, model.sprint_id, model.status).filter(
+        model.project_id == project_id,
+        model.id.in_(ids)
+    )
+    return {row.id: row for row in rows}
+
+
+def _changes(kind, project_id, found, values):
+    return [
+        Change(
+            kind,
+            row.id,
+            project_id,
+            row.sprint_id,
+            values.get("sprint_id", row.sprint_id),
+            row.status,
+            values.get("status", row.status)
+        )
+        for row in found.values()
+    ]
+
+
+def _sprint_in_project(sprint_id, project_id):
+    return db.session.query(
+        db.exists().where((Sprint.id == sprint_id) & (Sprint.project_id == project_id))
+    ).scalar()
+
+
+def _results(ids, found):
+    return {i: ("updated" if i in found else "not_found") for i in ids}
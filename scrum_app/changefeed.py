@@ -0,0 +1,139 @@
+import json
+import time
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from . import db
+from .models import Task, ChangefeedState, ProjectChange
+
+# Feed de mudanças por projeto para o Kanban ao vivo.
+#
+# Cada mudança em task grava uma linha em project_changes com o estado
+# compacto do card. O id da linha é a versão: cresce sempre, então
+# "mudanças desde a versão N" é um range scan em (project_id, id). Como o
+# feed mora no banco, qualquer worker enxerga as mudanças dos outros.
+#
+# A limpeza (prune) remove sempre um prefixo de ids e grava em
+# changefeed_state o maior id removido. Uma versão abaixo dessa marca perdeu
+# mudanças; com AUTOINCREMENT os ids não voltam, então uma versão acima do
+# maior id já emitido também é de antes de um reset. Nos dois casos o cliente
+# recarrega o board (410 no catch-up, evento "reload" no stream).
+
+CARD_FIELDS = ("id", "title", "description", "status", "sprint_id", "assigned_to", "version")
+
+
+def record_changes(changes):
+    task_changes = [c for c in changes if c.kind == "task"]
+    if not task_changes:
+        return
+
+    ids = {c.item_id for c in task_changes}
+    cards = {
+        row.id: dict(row._mapping)
+        for row in db.session.query(*[getattr(Task, f) for f in CARD_FIELDS]).filter(Task.id.in_(ids))
+    }
+
+    now = datetime.utcnow()
+    rows = []
+    for change in task_changes:
+        card = cards.get(change.item_id)
+        rows.append({
+            "project_id": change.project_id,
+            "item_type": "task",
+            "item_id": change.item_id,
+            "op": "upsert" if card else "delete",
+            "payload": json.dumps(card or {"id": change.item_id}, separators=(",", ":")),
+            "created_at": now,
+        })
+    db.session.execute(db.insert(ProjectChange), rows)
+
+
+def latest_version(project_id):
+    return db.session.query(db.func.max(ProjectChange.id)).filter(
+        ProjectChange.project_id == project_id
+    ).scalar() or 0
+
+
+def changes_since(project_id, version, limit=500):
+    rows = (
+        db.session.query(ProjectChange.id, ProjectChange.op, ProjectChange.payload)
+        .filter(ProjectChange.project_id == project_id, ProjectChange.id > version)
+        .order_by(ProjectChange.id)
+        .limit(limit)
+        .all()
+    )
+    return [_delta(row) for row in rows]
+
+
+def is_expired(version):
+    pruned, newest = db.session.query(
+        db.select(db.func.coalesce(db.func.max(ChangefeedState.pruned_through), 0)).scalar_subquery(),
+        db.select(db.func.max(ProjectChange.id)).scalar_subquery(),
+    ).one()
+    return version < pruned or version > max(newest or 0, pruned)
+
+
+def _delta(row):
+    return {"version": row.id, "op": row.op, "task": json.loads(row.payload)}
+
+
+def stream(project_id, version):
+    config = current_app.config
+    interval = config['CHANGEFEED_POLL_INTERVAL']
+    heartbeat = config['CHANGEFEED_HEARTBEAT']
+    deadline = time.monotonic() + config['CHANGEFEED_STREAM_SECONDS']
+
+    yield f"retry: {int(interval * 1000)}\n\n"
+    last_sent = time.monotonic()
+    while time.monotonic() < deadline:
+        # A limpeza pode passar da versão do cliente durante a conexão.
+        if is_expired(version):
+            db.session.close()
+            yield "event: reload\ndata: {}\n\n"
+            return
+        deltas = changes_since(project_id, version)
+        # Fecha a transação de leitura entre as consultas para não segurar
+        # o snapshot do WAL nem uma conexão do pool enquanto espera.
+        db.session.close()
+
+        for delta in deltas:
+            version = delta["version"]
+            yield f"id: {version}\ndata: {json.dumps(delta, separators=(',', ':'))}\n\n"
+            last_sent = time.monotonic()
+
+        if time.monotonic() - last_sent >= heartbeat:
+            yield ": ping\n\n"
+            last_sent = time.monotonic()
+
+        if not deltas:
+            time.sleep(interval)
+
+
+def prune(days):
+    # Remove por id (tudo até a última mudança anterior ao corte), para que a
+    # marca em changefeed_state descreva exatamente o que sumiu.
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    through = db.session.query(db.func.max(ProjectChange.id)).filter(
+        ProjectChange.created_at < cutoff
+    ).scalar()
+    if through is None:
+        return 0
+    removed = ProjectChange.query.filter(ProjectChange.id <= through).delete(
+        synchronize_session=False
+    )
+    state = db.session.get(ChangefeedState, 1)
+    if state is None:
+        db.session.add(ChangefeedState(id=1, pruned_through=through))
+    else:
+        state.pruned_through = max(state.pruned_through, through)
+    db.session.commit()
+    return removed
+
+
+def init_app(app):
+    @app.cli.command('changes-prune')
+    @click.option('--days', type=int, default=None, help='Mantém só os últimos N dias.')
+    def changes_prune(days):
+        """Remove entradas antigas do feed de mudanças do Kanban."""
+        removed = prune(days if days is not None else app.config['CHANGEFEED_RETENTION_DAYS'])
+        click.echo(f"{removed} mudanças removidas")
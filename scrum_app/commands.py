@@ -0,0 +1,33 @@
+from importlib import import_module
+from flask.cli import AppGroup
+
+# Comandos de linha de comando registrados sob demanda: o init_app (ou setup)
+# de cada módulo só roda quando o `flask` pede a lista de comandos ou um
+# comando específico, então um worker WSGI não monta os grupos do click.
+#
+# Isso adia a importação só dos módulos que existem apenas para a CLI
+# (benchmark, stress e, com AUTO_MIGRATE desligado, migrations). analytics,
+# archive, changefeed, jobs, ranking e search também são usados pelas rotas
+# e entram no boot de qualquer forma; metrics entra com METRICS_ENABLED.
+
+
+class LazyCommands(AppGroup):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending = []
+
+    def defer(self, module, *args, setup="init_app"):
+        self._pending.append((module, setup, args))
+
+    def _load(self):
+        while self._pending:
+            module, setup, args = self._pending.pop(0)
+            getattr(import_module(f"{__package__}.{module}"), setup)(*args)
+
+    def get_command(self, ctx, name):
+        self._load()
+        return super().get_command(ctx, name)
+
+    def list_commands(self, ctx):
+        self._load()
+        return super().list_commands(ctx)
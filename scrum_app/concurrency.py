@@ -0,0 +1,37 @@
+from contextlib import contextmanager
+from sqlalchemy.orm.exc import StaleDataError
+from . import db
+
+# Controle de concorrência otimista para tasks, user stories e sprints.
+#
+# Cada linha tem uma coluna version declarada como version_id_col no mapper:
+# todo UPDATE do ORM nessas tabelas sai como "UPDATE ... WHERE id = ? AND
+# version = ?" e incrementa a versão, sem lock nenhum. Se outra transação
+# gravou a linha no meio, o UPDATE não encontra nada e o SQLAlchemy levanta
+# StaleDataError. Formulários e API mandam a versão que o cliente viu; se ela
+# já não é a atual, a alteração é recusada com o estado atual do item, para o
+# cliente conferir e tentar de novo. Os UPDATEs em lote (bulk.py) incrementam
+# a versão explicitamente.
+
+
+class ConflictError(Exception):
+    def __init__(self, current):
+        super().__init__("o item foi alterado por outra pessoa" if current is not None
+                         else "o item foi excluído por outra pessoa")
+        # Estado atual do item, ou None se ele foi excluído.
+        self.current = current
+
+
+@contextmanager
+def guarded(item, version=None):
+    # Envolve o flush e o commit de alterações já feitas no item. version é a
+    # versão que o cliente viu (None aceita a versão lida neste request). No
+    # conflito as alterações são descartadas e o erro leva o item recarregado.
+    model, item_id = type(item), item.id
+    try:
+        if version is not None and version != item.version:
+            raise StaleDataError()
+        yield
+    except StaleDataError:
+        db.session.rollback()
+        raise ConflictError(db.session.get(model, item_id))
@@ -0,0 +1,166 @@
+import os
+from sqlalchemy import event
+
+# Perfis de configuração. O perfil é escolhido por create_app(config_name) ou
+# pela variável SCRUM_CONFIG; depois disso, qualquer variável de ambiente com
+# prefixo SCRUM_ sobrescreve a chave correspondente (ex.: SCRUM_KANBAN_PAGE_SIZE=50)
+# e DATABASE_URL aponta o app para outro banco, inclusive um servidor.
+
+
+class Config:
+    SECRET_KEY = 'chave_super_secreta'
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///scrum.db'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+    }
+
+    # Aplicados em cada conexão SQLite nova. WAL deixa leitores e um escritor
+    # trabalharem ao mesmo tempo; busy_timeout faz o escritor esperar pelo lock
+    # em vez de falhar com "database is locked".
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -20000,
+        "temp_store": "MEMORY",
+    }
+
+    KANBAN_PAGE_SIZE = 25
+    DASHBOARD_PAGE_SIZE = 20
+    PERMISSION_CACHE_TTL = 0
+    PERMISSION_CACHE_SIZE = 10000
+    IDENTITY_CACHE_TTL = 300
+    IDENTITY_CACHE_SIZE = 10000
+
+    # Cria/atualiza o esquema ao subir o app. Desligado em produção, onde
+    # `flask db-upgrade` roda uma vez no deploy, antes dos workers.
+    AUTO_MIGRATE = True
+
+    FRAGMENT_CACHE_ENABLED = True
+    FRAGMENT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+    FRAGMENT_CACHE_SHARED_PATH = None
+
+    # /metrics exige "Authorization: Bearer <METRICS_TOKEN>" quando o token
+    # está definido. Sem token, o endpoint só existe se METRICS_PUBLIC.
+    METRICS_ENABLED = True
+    METRICS_TOKEN = None
+    METRICS_PUBLIC = True
+    SLOW_REQUEST_MS = None
+
+    CHANGEFEED_POLL_INTERVAL = 1.0
+    CHANGEFEED_HEARTBEAT = 15
+    CHANGEFEED_STREAM_SECONDS = 300
+    CHANGEFEED_RETENTION_DAYS = 7
+
+    ARCHIVE_DONE_AFTER_DAYS = 30
+    ARCHIVE_PAGE_SIZE = 50
+
+    RANK_REBALANCE_LENGTH = 24
+
+    # "thread": workers dentro do processo web, iniciados no primeiro request;
+    # "external": só `flask jobs-worker` executa; "manual": só run_pending().
+    JOBS_MODE = "thread"
+    JOBS_WORKERS = 2
+    JOBS_POLL_INTERVAL = 2.0
+    JOBS_MAX_ATTEMPTS = 3
+    JOBS_RETRY_SECONDS = 10
+    JOBS_LEASE_SECONDS = 600
+
+    # Registro de atividade com escrita adiada: as entradas vão para o banco
+    # em lotes de até ACTIVITY_BATCH_SIZE, no máximo ACTIVITY_FLUSH_INTERVAL
+    # segundos depois da ação (0 grava cada entrada na hora).
+    ACTIVITY_BATCH_SIZE = 200
+    ACTIVITY_FLUSH_INTERVAL = 2.0
+    ACTIVITY_MAX_BUFFER = 10000
+
+    # Assets com hash no nome (ver assets.py) podem ficar em cache por um ano.
+    # Sem `flask assets-build`, os arquivos de vendor/ e static/ são servidos
+    # como estão (o CDN só se faltar o de vendor/); com ASSETS_REQUIRE_BUILD
+    # o app se recusa a subir.
+    ASSETS_MAX_AGE = 365 * 24 * 3600
+    ASSETS_CDN_FALLBACK = True
+    ASSETS_REQUIRE_BUILD = False
+
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+
+
+class ProductionConfig(Config):
+    # Janela em que outros workers ainda enxergam um membro removido (ver
+    # permissions.py).
+    PERMISSION_CACHE_TTL = 30
+    AUTO_MIGRATE = False
+    ASSETS_CDN_FALLBACK = False
+    ASSETS_REQUIRE_BUILD = True
+    METRICS_PUBLIC = False
+
+
+class TestingConfig(Config):
+    TESTING = True
+    FRAGMENT_CACHE_ENABLED = False
+    JOBS_MODE = "manual"
+    ACTIVITY_FLUSH_INTERVAL = 0
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+
+
+PROFILES = {
+    "development": DevelopmentConfig,
+    "production": ProductionConfig,
+    "testing": TestingConfig,
+}
+
+
+def load_config(app, config_name=None, overrides=None):
+    config_name = config_name or os.environ.get('SCRUM_CONFIG', 'development')
+    if config_name not in PROFILES:
+        raise ValueError(f"Perfil de configuração desconhecido: {config_name}")
+
+    app.config.from_object(PROFILES[config_name])
+    app.config.from_prefixed_env('SCRUM')
+    if os.environ.get('DATABASE_URL'):
+        app.config['SQLALCHEMY_DATABASE_URI'] = os.environ['DATABASE_URL']
+    if overrides:
+        app.config.update(overrides)
+
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        options = dict(app.config['SQLALCHEMY_ENGINE_OPTIONS'])
+        options.setdefault("connect_args", {})
+        options["connect_args"] = {
+            "timeout": app.config['SQLITE_PRAGMAS'].get("busy_timeout", 5000) / 1000,
+            "check_same_thread": False,
+            **options["connect_args"],
+        }
+        if _is_memory(app.config['SQLALCHEMY_DATABASE_URI']):
+            # Banco em memória não aceita pool com várias conexões.
+            for key in ("pool_size", "max_overflow", "pool_timeout", "pool_recycle"):
+                options.pop(key, None)
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    return config_name
+
+
+def configure_engine(app, engine):
+    if engine.dialect.name != 'sqlite':
+        return
+
+    pragmas = dict(app.config.get('SQLITE_PRAGMAS') or {})
+    if _is_memory(str(engine.url)):
+        pragmas.pop("journal_mode", None)
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def _is_memory(uri):
+    return uri in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in uri
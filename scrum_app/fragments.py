@@ -0,0 +1,163 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from markupsafe import Markup
+
+# Cache de fragmentos renderizados (listas do projeto e colunas do Kanban).
+#
+# A chave leva o id e a versão do projeto (ver versioning.bump), então
+# qualquer mutação invalida os fragmentos do projeto sem apagar nada: as
+# entradas antigas apenas deixam de ser lidas e saem pelo LRU. Cada app tem o
+# seu cache em app.extensions['fragment_cache'] (benchmark, stress e testes
+# sobem vários apps no mesmo processo, com bancos próprios e os mesmos ids).
+# O LRU é limitado em bytes; com FRAGMENT_CACHE_SHARED_PATH os workers de uma
+# mesma máquina também compartilham um arquivo SQLite, e por isso a chave
+# começa por um prefixo derivado do build e do banco.
+
+
+class LRUCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        cost = len(value)
+        if cost > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._items[key] = value
+            self.size += cost
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SharedCache:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fragments ("
+                "key TEXT PRIMARY KEY, project_id INTEGER NOT NULL, "
+                "version INTEGER NOT NULL, value TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_fragments_project ON fragments (project_id, version)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        try:
+            row = self._connect().execute("SELECT value FROM fragments WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def set(self, prefix, key, project_id, version, value):
+        # Ao gravar uma versão nova, remove as versões antigas do mesmo projeto
+        # (só as do mesmo prefixo: outro banco pode ter um projeto com este id).
+        try:
+            conn = self._connect()
+            conn.execute(
+                "DELETE FROM fragments WHERE project_id = ? AND version < ? AND key LIKE ?",
+                (project_id, version, prefix + ":%")
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO fragments (key, project_id, version, value) VALUES (?, ?, ?, ?)",
+                (key, project_id, version, value)
+            )
+        except sqlite3.Error:
+            pass
+
+
+class FragmentCache:
+    def __init__(self, app):
+        from .versioning import BUILD_ID
+        self.enabled = app.config['FRAGMENT_CACHE_ENABLED']
+        self.local = LRUCache(app.config['FRAGMENT_CACHE_MAX_BYTES'])
+        path = app.config.get('FRAGMENT_CACHE_SHARED_PATH')
+        self.shared = SharedCache(path) if path else None
+        database = app.config['SQLALCHEMY_DATABASE_URI']
+        self.prefix = hashlib.sha1(f"{BUILD_ID}|{database}".encode()).hexdigest()[:12]
+        self.stats = {"hits": 0, "shared_hits": 0, "misses": 0, "render_seconds": 0.0}
+        self._stats_lock = threading.Lock()
+
+    def render(self, project, name, renderer, *parts):
+        if not self.enabled:
+            return Markup(renderer())
+
+        key = ":".join(str(p) for p in (self.prefix, project.id, project.version, name, *parts))
+
+        value = self.local.get(key)
+        if value is not None:
+            self._count("hits")
+            return Markup(value)
+
+        if self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self._count("shared_hits")
+                self.local.set(key, value)
+                return Markup(value)
+
+        self._count("misses")
+        started = time.perf_counter()
+        value = str(renderer())
+        self._count("render_seconds", time.perf_counter() - started)
+
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(self.prefix, key, project.id, project.version, value)
+        return Markup(value)
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def snapshot(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["entries"] = len(self.local)
+        stats["bytes"] = self.local.size
+        stats["max_bytes"] = self.local.max_bytes
+        lookups = stats["hits"] + stats["shared_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["hits"] + stats["shared_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+def render_fragment(project, name, renderer, *parts):
+    return current_app.extensions['fragment_cache'].render(project, name, renderer, *parts)
+
+
+def init_app(app):
+    app.extensions['fragment_cache'] = FragmentCache(app)
@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from flask import current_app, has_app_context
+from flask_login import UserMixin
+from sqlalchemy import event
+from . import db
+from .models import User
+
+# Identidade do usuário logado sem ida ao banco a cada request.
+#
+# O user_loader devolve um Identity (id, username, role) imutável em vez da
+# linha do ORM. Os snapshots ficam num LRU do processo, limitado em entradas
+# (IDENTITY_CACHE_SIZE) e com validade de IDENTITY_CACHE_TTL segundos.
+# Alterações e exclusões de User pelo ORM invalidam a entrada na hora; em
+# outros workers o TTL limita quanto tempo um snapshot antigo sobrevive.
+
+
+class Identity(UserMixin, namedtuple("Identity", ["id", "username", "role"])):
+    __slots__ = ()
+
+
+class IdentityCache:
+    def __init__(self):
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._items.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._items[user_id]
+                return None
+            self._items.move_to_end(user_id)
+            return entry[1]
+
+    def set(self, user_id, identity, ttl, max_size):
+        with self._lock:
+            self._items[user_id] = (time.monotonic() + ttl, identity)
+            self._items.move_to_end(user_id)
+            while len(self._items) > max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._items.clear()
+            else:
+                self._items.pop(user_id, None)
+
+    def __len__(self):
+        return len(self._items)
+
+
+def _cache():
+    # Um cache por app: benchmark e stress sobem outros apps no mesmo
+    # processo, com bancos próprios e os mesmos ids de usuário.
+    return current_app.extensions.setdefault("identity_cache", IdentityCache())
+
+
+def load_identity(user_id):
+    ttl = current_app.config.get("IDENTITY_CACHE_TTL", 0)
+    if ttl:
+        identity = _cache().get(user_id)
+        if identity is not None:
+            return identity
+
+    row = db.session.query(User.id, User.username, User.role).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    identity = Identity(*row)
+    if ttl:
+        _cache().set(user_id, identity, ttl, current_app.config["IDENTITY_CACHE_SIZE"])
+    return identity
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    if has_app_context():
+        _cache().invalidate(target.id)
@@ -0,0 +1,320 @@
+import json
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from sqlalchemy import exists, select, update
+from sqlalchemy.orm import aliased
+from . import db
+from .models import Job
+
+# Fila de jobs em segundo plano.
+#
+# Trabalho pesado (arquivamento, exportações, reindexação, snapshots de
+# analytics, redistribuição de ranks) vira uma linha na tabela jobs, então
+# sobrevive a restarts. Workers pegam o job mais antigo pronto para rodar com
+# um UPDATE condicional (status = 'queued'), que no SQLite é atômico; o mesmo
+# UPDATE exige que nenhum outro job do projeto esteja rodando, o que
+# serializa os jobs de cada projeto. Falhas voltam para a fila com espera
+# crescente até max_attempts; jobs presos em "running" além de
+# JOBS_LEASE_SECONDS (worker morto) voltam para a fila.
+#
+# Os workers são threads do próprio processo web (JOBS_MODE = "thread",
+# iniciadas no primeiro request) ou de um processo separado com
+# `flask jobs-worker`.
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+HANDLERS = {}
+
+
+def handler(kind):
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def enqueue(kind, project_id=None, user_id=None, dedupe=False, **payload):
+    if kind not in HANDLERS:
+        raise KeyError(f"job desconhecido: {kind}")
+    encoded = json.dumps(payload, sort_keys=True)
+
+    if dedupe:
+        pending = db.session.scalar(select(Job).where(
+            Job.kind == kind,
+            Job.project_id.is_(None) if project_id is None else Job.project_id == project_id,
+            Job.payload == encoded,
+            Job.status == QUEUED
+        ).limit(1))
+        if pending is not None:
+            return pending
+
+    job = Job(
+        kind=kind,
+        project_id=project_id,
+        user_id=user_id,
+        payload=encoded,
+        max_attempts=current_app.config['JOBS_MAX_ATTEMPTS']
+    )
+    db.session.add(job)
+    db.session.flush()
+
+    runner = current_app.extensions.get('jobs')
+    if runner is not None:
+        runner.wake()
+    return job
+
+
+def claim(worker):
+    now = datetime.utcnow()
+    running = aliased(Job)
+    busy = exists().where(running.status == RUNNING, running.project_id == Job.project_id)
+
+    ready = (
+        select(Job.id)
+        .where(Job.status == QUEUED, Job.run_after <= now, ~busy)
+        .order_by(Job.id)
+        .limit(5)
+    )
+    for job_id in db.session.scalars(ready).all():
+        claimed = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == QUEUED, ~busy)
+            .values(status=RUNNING, started_at=now, attempts=Job.attempts + 1, worker=worker)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return db.session.get(Job, job_id)
+    return None
+
+
+def run_job(job):
+    job_id, kind, attempts, max_attempts = job.id, job.kind, job.attempts, job.max_attempts
+    try:
+        fn = HANDLERS.get(kind)
+        if fn is None:
+            raise LookupError(f"job desconhecido: {kind}")
+        result = fn(job, **json.loads(job.payload))
+        db.session.commit()
+    except Exception as error:
+        db.session.rollback()
+        current_app.logger.exception("job %s (%s) falhou", job_id, kind)
+        values = {"error": f"{type(error).__name__}: {error}", "started_at": None}
+        if attempts < max_attempts:
+            delay = current_app.config['JOBS_RETRY_SECONDS'] * 2 ** (attempts - 1)
+            values.update(status=QUEUED, run_after=datetime.utcnow() + timedelta(seconds=delay))
+        else:
+            values.update(status=FAILED, finished_at=datetime.utcnow())
+        _finish(job_id, values)
+        return False
+
+    _finish(job_id, {
+        "status": DONE,
+        "result": json.dumps(result) if result is not None else None,
+        "error": None,
+        "finished_at": datetime.utcnow(),
+    })
+    return True
+
+
+def _finish(job_id, values):
+    db.session.execute(
+        update(Job)
+        .where(Job.id == job_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def requeue_stale(lease_seconds):
+    limit = datetime.utcnow() - timedelta(seconds=lease_seconds)
+    count = db.session.execute(
+        update(Job)
+        .where(Job.status == RUNNING, Job.started_at < limit)
+        .values(status=QUEUED, started_at=None, run_after=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return count
+
+
+def run_pending(worker="manual", limit=None):
+    done = 0
+    while limit is None or done < limit:
+        job = claim(worker)
+        if job is None:
+            break
+        run_job(job)
+        done += 1
+    return done
+
+
+def as_dict(job):
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "project_id": job.project_id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+class JobRunner:
+    def __init__(self, app):
+        self.app = app
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.threads = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self, workers=None):
+        with self._lock:
+            if self.threads:
+                return
+            with self.app.app_context():
+                requeue_stale(self.app.config['JOBS_LEASE_SECONDS'])
+            for i in range(workers or self.app.config['JOBS_WORKERS']):
+                thread = threading.Thread(target=self._loop, name=f"jobs-{i}", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        for thread in self.threads:
+            thread.join()
+
+    def _loop(self):
+        worker = f"{self.name}:{threading.current_thread().name}"
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    job = claim(worker)
+                    if job is not None:
+                        run_job(job)
+            except Exception:
+                self.app.logger.exception("erro no worker de jobs")
+                job = None
+            if job is None:
+                self._wake.wait(self.app.config['JOBS_POLL_INTERVAL'])
+                self._wake.clear()
+
+
+def export_dir():
+    return os.path.join(current_app.instance_path, 'exports')
+
+
+@handler("archive")
+def _archive(job, days=None):
+    from .archive import archive
+    return archive(job.project_id, done_after_days=days)
+
+
+@handler("analytics-snapshot")
+def _analytics_snapshot(job):
+    from .analytics import snapshot_all
+    return {"sprints": snapshot_all(project_id=job.project_id)}
+
+
+@handler("search-reindex")
+def _search_reindex(job):
+    from .search import install, reindex
+    with db.engine.begin() as conn:
+        install(conn)
+        reindex(conn)
+
+
+@handler("rank-rebalance")
+def _rank_rebalance(job, items):
+    from .ranking import SOURCES, rebalance
+    from .versioning import bump
+    count = rebalance(SOURCES[items], job.project_id)
+    bump(job.project_id)
+    return {"items": count}
+
+
+@handler("export")
+def _export(job, items, fmt):
+    from .transfer import export
+    os.makedirs(export_dir(), exist_ok=True)
+    name = f"projeto-{job.project_id}-{items}-{uuid.uuid4().hex[:8]}.{fmt}"
+    path = os.path.join(export_dir(), name)
+    with open(path + ".tmp", "w", encoding="utf-8", newline="") as f:
+        for chunk in export(job.project_id, items, fmt):
+            f.write(chunk)
+    os.replace(path + ".tmp", path)
+    return {"file": name}
+
+
+def init_app(app):
+    mode = app.config['JOBS_MODE']
+    if mode not in ("thread", "external", "manual"):
+        raise ValueError(f"JOBS_MODE inválido: {mode}")
+    runner = JobRunner(app)
+    app.extensions['jobs'] = runner
+
+    if mode == "thread":
+        # Só no primeiro request: comandos da CLI (db-upgrade, bench...)
+        # também chamam create_app e não devem subir workers.
+        @app.before_request
+        def start_job_runner():
+            if not runner.threads:
+                runner.start()
+
+
+def init_cli(app):
+    @app.cli.command('jobs-worker')
+    @click.option('--workers', type=int, default=None, help='Threads de execução.')
+    @click.option('--once', is_flag=True, help='Executa os jobs prontos e sai.')
+    def jobs_worker(workers, once):
+        """Executa jobs da fila (em primeiro plano)."""
+        if once:
+            requeue_stale(app.config['JOBS_LEASE_SECONDS'])
+            click.echo(f"{run_pending(f'cli:{os.getpid()}')} jobs executados")
+            return
+        runner = app.extensions['jobs']
+        runner.start(workers)
+        click.echo(f"{len(runner.threads)} workers de jobs rodando (Ctrl+C para sair)")
+        try:
+            for thread in runner.threads:
+                thread.join()
+        except KeyboardInterrupt:
+            runner.stop()
+
+    @app.cli.command('jobs-enqueue')
+    @click.argument('kind', type=click.Choice(sorted(HANDLERS)))
+    @click.option('--project', type=int, default=None)
+    @click.option('--param', 'params', multiple=True, help='chave=valor (repetível).')
+    def jobs_enqueue(kind, project, params):
+        """Coloca um job na fila."""
+        payload = dict(_param(p) for p in params)
+        job = enqueue(kind, project, **payload)
+        db.session.commit()
+        click.echo(f"job {job.id} ({kind}) na fila")
+
+
+def _param(raw):
+    name, _, value = raw.partition('=')
+    try:
+        return name, json.loads(value)
+    except ValueError:
+        return name, value
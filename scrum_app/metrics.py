@@ -0,0 +1,193 @@
+import threading
+import time
+from collections import defaultdict
+from flask import Response, abort, current_app, g, has_request_context, request, before_render_template, template_rendered
+from sqlalchemy import event
+
+# Instrumentação por endpoint, exposta em /metrics no formato texto do
+# Prometheus: histograma de latência, número e tempo de statements SQL (via
+# eventos do engine) e tempo de renderização de templates. Os valores são por
+# app (app.extensions["metrics"]) e por processo; com vários workers, o
+# Prometheus soma os alvos.
+#
+# Com SLOW_REQUEST_MS definido, requests mais lentos que o limite são
+# registrados no log junto com os statements SQL que executaram.
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_LOGGED_STATEMENTS = 50
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = defaultdict(int)
+        self.histograms = defaultdict(lambda: [0] * (len(BUCKETS) + 1))
+        self.durations = defaultdict(float)
+        self.sql_statements = defaultdict(int)
+        self.sql_seconds = defaultdict(float)
+        self.template_seconds = defaultdict(float)
+
+    def observe(self, endpoint, method, status, seconds, sql_count, sql_seconds, template_seconds):
+        key = (endpoint, method)
+        with self._lock:
+            self.requests[(endpoint, method, status)] += 1
+            buckets = self.histograms[key]
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+            buckets[-1] += 1
+            self.durations[key] += seconds
+            self.sql_statements[endpoint] += sql_count
+            self.sql_seconds[endpoint] += sql_seconds
+            self.template_seconds[endpoint] += template_seconds
+
+    def render(self):
+        with self._lock:
+            lines = [
+                "# HELP scrum_http_requests_total Requests atendidos.",
+                "# TYPE scrum_http_requests_total counter",
+            ]
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(f'scrum_http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+
+            lines += [
+                "# HELP scrum_http_request_duration_seconds Latência dos requests.",
+                "# TYPE scrum_http_request_duration_seconds histogram",
+            ]
+            for (endpoint, method), buckets in sorted(self.histograms.items()):
+                labels = f'endpoint="{endpoint}",method="{method}"'
+                for bound, count in zip(BUCKETS, buckets):
+                    lines.append(f'scrum_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'scrum_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {buckets[-1]}')
+                lines.append(f'scrum_http_request_duration_seconds_sum{{{labels}}} {self.durations[(endpoint, method)]:.6f}')
+                lines.append(f'scrum_http_request_duration_seconds_count{{{labels}}} {buckets[-1]}')
+
+            for name, help_text, values, fmt in (
+                ("scrum_sql_statements_total", "Statements SQL executados.", self.sql_statements, "{}"),
+                ("scrum_sql_duration_seconds_total", "Tempo gasto em SQL.", self.sql_seconds, "{:.6f}"),
+                ("scrum_template_render_seconds_total", "Tempo de renderização de templates.",
+                 self.template_seconds, "{:.6f}"),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for endpoint, value in sorted(values.items()):
+                    lines.append(f'{name}{{endpoint="{endpoint}"}} ' + fmt.format(value))
+
+        return lines
+
+
+def _state():
+    if not has_request_context():
+        return None
+    return g.get("_metrics")
+
+
+def _before_request():
+    g._metrics = {
+        "started": time.perf_counter(),
+        "sql_count": 0,
+        "sql_seconds": 0.0,
+        "statements": [] if current_app.config.get('SLOW_REQUEST_MS') else None,
+        "template_seconds": 0.0,
+        "template_stack": [],
+    }
+
+
+def _after_request(response):
+    state = _state()
+    if state is None:
+        return response
+    elapsed = time.perf_counter() - state["started"]
+    endpoint = request.endpoint or "unknown"
+    current_app.extensions["metrics"].observe(
+        endpoint, request.method, response.status_code, elapsed,
+        state["sql_count"], state["sql_seconds"], state["template_seconds"]
+    )
+
+    threshold = current_app.config.get('SLOW_REQUEST_MS')
+    if threshold and elapsed * 1000 >= threshold:
+        statements = "\n".join(
+            f"  {ms:8.2f} ms  {sql}" for sql, ms in (state["statements"] or [])[:MAX_LOGGED_STATEMENTS]
+        )
+        current_app.logger.warning(
+            "Request lento: %s %s (%s) %.1f ms, %d statements SQL em %.1f ms, templates %.1f ms\n%s",
+            request.method, request.path, endpoint, elapsed * 1000,
+            state["sql_count"], state["sql_seconds"] * 1000, state["template_seconds"] * 1000,
+            statements
+        )
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["_metrics_started"].pop()
+    state = _state()
+    if state is None:
+        return
+    elapsed = time.perf_counter() - started
+    state["sql_count"] += 1
+    state["sql_seconds"] += elapsed
+    if state["statements"] is not None and len(state["statements"]) < MAX_LOGGED_STATEMENTS:
+        state["statements"].append((" ".join(statement.split())[:500], elapsed * 1000))
+
+
+def _handle_error(context):
+    stack = context.connection.info.get("_metrics_started") if context.connection is not None else None
+    if stack:
+        stack.pop()
+
+
+def _before_render(sender, template, context, **extra):
+    state = _state()
+    if state is not None:
+        state["template_stack"].append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    state = _state()
+    if state is None or not state["template_stack"]:
+        return
+    started = state["template_stack"].pop()
+    # Templates renderizados dentro de outro (fragmentos) já entram no tempo
+    # do template externo.
+    if not state["template_stack"]:
+        state["template_seconds"] += time.perf_counter() - started
+
+
+def metrics_view():
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f"Bearer {token}":
+        abort(401)
+
+    lines = current_app.extensions["metrics"].render()
+    cache = current_app.extensions.get('fragment_cache')
+    if cache is not None:
+        stats = cache.snapshot()
+        for name in ("hits", "shared_hits", "misses"):
+            lines += [f"# TYPE scrum_fragment_cache_{name}_total counter",
+                      f"scrum_fragment_cache_{name}_total {stats[name]}"]
+        for name in ("entries", "bytes"):
+            lines += [f"# TYPE scrum_fragment_cache_{name} gauge",
+                      f"scrum_fragment_cache_{name} {stats[name]}"]
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+
+def init_app(app, engine):
+    if not app.config.get('METRICS_ENABLED'):
+        return
+    app.extensions["metrics"] = Registry()
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    # A instrumentação (inclusive o log de requests lentos) vale sempre; o
+    # endpoint, que expõe rotas e volumes, não fica aberto sem token em produção.
+    if not app.config.get('METRICS_TOKEN') and not app.config.get('METRICS_PUBLIC'):
+        app.logger.warning("METRICS_TOKEN não definido: /metrics desativado")
+        return
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
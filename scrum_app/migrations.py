@@ -0,0 +1,334 @@
+import sys
+import click
+from datetime import datetime
+from sqlalchemy import create_engine, inspect, text
+
+# Migrações versionadas do esquema. db.create_all() só cria tabelas que ainda
+# não existem, então qualquer mudança em tabelas já existentes (índices,
+# colunas, constraints) entra aqui com um número de versão novo. Cada migração
+# precisa ser idempotente, porque bancos novos já nascem com o esquema atual
+# dos models e mesmo assim passam por todas elas.
+
+MIGRATIONS = []
+
+
+def migration(version, name):
+    def register(fn):
+        MIGRATIONS.append((version, name, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return register
+
+
+@migration(1, "indices das consultas principais")
+def _access_path_indexes(conn):
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_task_project_status "
+        "ON task (project_id, status)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_user_stories_project_sprint "
+        "ON user_stories (project_id, sprint_id)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_sprint_project "
+        "ON sprint (project_id)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_project_memberships_project "
+        "ON project_memberships (project_id)"
+    ))
+
+    # Remove vínculos duplicados (mantendo o mais antigo) antes de criar a
+    # constraint única de (user_id, project_id).
+    conn.execute(text(
+        "DELETE FROM project_memberships WHERE id NOT IN ("
+        "SELECT MIN(id) FROM project_memberships GROUP BY user_id, project_id)"
+    ))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_project_memberships_user_project "
+        "ON project_memberships (user_id, project_id)"
+    ))
+
+
+@migration(2, "indice de paginacao das tasks")
+def _task_keyset_index(conn):
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_task_project_created "
+        "ON task (project_id, created_at, id)"
+    ))
+
+
+@migration(3, "historico de status e snapshots de sprint")
+def _analytics_tables(conn):
+    from .models import StatusTransition, SprintSnapshot
+    StatusTransition.__table__.create(conn, checkfirst=True)
+    SprintSnapshot.__table__.create(conn, checkfirst=True)
+
+
+@migration(4, "indice de busca textual (FTS5)")
+def _search_index(conn):
+    if conn.dialect.name != 'sqlite':
+        return
+    from .search import install, reindex
+    install(conn)
+    reindex(conn)
+
+
+@migration(5, "feed de mudancas do kanban")
+def _project_changes(conn):
+    from .models import ProjectChange
+    ProjectChange.__table__.create(conn, checkfirst=True)
+
+
+@migration(6, "versao dos projetos para GET condicional")
+def _project_version(conn):
+    add_column(conn, "projects", "version", "INTEGER NOT NULL DEFAULT 1")
+    add_column(conn, "projects", "updated_at", "DATETIME")
+    conn.execute(text("UPDATE projects SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL"))
+
+
+@migration(7, "tabelas de arquivo")
+def _archive_tables(conn):
+    from .models import ArchivedTask, ArchivedStory
+    ArchivedTask.__table__.create(conn, checkfirst=True)
+    ArchivedStory.__table__.create(conn, checkfirst=True)
+
+
+@migration(8, "ordem do backlog (rank)")
+def _backlog_rank(conn):
+    from .ranking import keys_between
+    for table in ("task", "user_stories", "archived_tasks", "archived_user_stories"):
+        add_column(conn, table, "rank", "VARCHAR(64)")
+
+    # Itens existentes recebem a ordem atual (por id) dentro de cada projeto.
+    for table in ("task", "user_stories"):
+        rows = conn.execute(text(
+            f"SELECT id, project_id FROM {table} WHERE rank IS NULL ORDER BY project_id, id"
+        )).all()
+        by_project = {}
+        for row in rows:
+            by_project.setdefault(row.project_id, []).append(row.id)
+        for project_id, ids in by_project.items():
+            last = conn.execute(
+                text(f"SELECT MAX(rank) FROM {table} WHERE project_id = :project_id"),
+                {"project_id": project_id}
+            ).scalar()
+            keys = keys_between(last, None, len(ids))
+            conn.execute(
+                text(f"UPDATE {table} SET rank = :rank WHERE id = :id"),
+                [{"id": i, "rank": key} for i, key in zip(ids, keys)]
+            )
+
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_task_project_rank ON task (project_id, rank)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_user_stories_project_rank "
+        "ON user_stories (project_id, rank)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_user_stories_project_sprint_rank "
+        "ON user_stories (project_id, sprint_id, rank)"
+    ))
+
+
+@migration(9, "fila de jobs")
+def _jobs_table(conn):
+    from .models import Job
+    Job.__table__.create(conn, checkfirst=True)
+
+
+@migration(10, "registro de atividade")
+def _activity_log(conn):
+    from .models import ActivityEntry
+    ActivityEntry.__table__.create(conn, checkfirst=True)
+
+
+@migration(11, "versao das linhas (concorrencia otimista)")
+def _row_versions(conn):
+    for table in ("task", "user_stories", "sprint", "archived_tasks", "archived_user_stories"):
+        add_column(conn, table, "version", "INTEGER NOT NULL DEFAULT 1")
+
+
+@migration(12, "indice das colunas do kanban")
+def _kanban_column_index(conn):
+    # (project_id, status, id) serve as buscas "ORDER BY id DESC LIMIT n" de
+    # cada coluna e as contagens por status; o índice antigo é prefixo dele.
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_task_project_status_id "
+        "ON task (project_id, status, id)"
+    ))
+    conn.execute(text("DROP INDEX IF EXISTS ix_task_project_status"))
+
+
+@migration(13, "filtro por projeto dentro do indice de busca")
+def _search_project_column(conn):
+    if conn.dialect.name != 'sqlite':
+        return
+    # project_id deixa de ser UNINDEXED; tabela FTS5 não tem ALTER, então o
+    # índice é recriado (os triggers continuam valendo).
+    from .search import install, reindex
+    conn.execute(text("DROP TABLE IF EXISTS search_index"))
+    install(conn)
+    reindex(conn)
+
+
+@migration(14, "totais das colunas do kanban")
+def _kanban_counts(conn):
+    if conn.dialect.name != 'sqlite':
+        return
+    from .models import TaskStatusCount
+    from .queries import install_kanban_counts, recount_kanban
+    TaskStatusCount.__table__.create(conn, checkfirst=True)
+    install_kanban_counts(conn)
+    recount_kanban(conn)
+
+
+@migration(15, "ids de tasks e user stories sem reaproveitamento")
+def _item_autoincrement(conn):
+    from .models import Task, UserStory
+    from .queries import install_kanban_counts
+    from .search import install as install_search
+    rebuild_autoincrement(conn, Task.__table__, reserved=("archived_tasks",),
+                          triggers=(install_search, install_kanban_counts))
+    rebuild_autoincrement(conn, UserStory.__table__, reserved=("archived_user_stories",),
+                          triggers=(install_search,))
+
+
+@migration(16, "versoes do feed de mudancas sem reaproveitamento")
+def _changefeed_low_water(conn):
+    from .models import ChangefeedState, ProjectChange
+    rebuild_autoincrement(conn, ProjectChange.__table__)
+    ChangefeedState.__table__.create(conn, checkfirst=True)
+    # O que já foi limpo antes daqui é tudo abaixo do menor id restante.
+    conn.execute(text(
+        "INSERT INTO changefeed_state (id, pruned_through) "
+        "SELECT 1, COALESCE(MIN(id) - 1, 0) FROM project_changes "
+        "WHERE NOT EXISTS (SELECT 1 FROM changefeed_state)"
+    ))
+
+
+def rebuild_autoincrement(conn, table, reserved=(), triggers=()):
+    # Sem AUTOINCREMENT o SQLite reaproveita o maior id depois de um DELETE.
+    # Como não há ALTER para isso, a tabela é recriada a partir do model (que
+    # tem sqlite_autoincrement) e a sequência parte do maior id já usado,
+    # contando as tabelas em `reserved` (ex.: o arquivo). Índices e triggers
+    # de `table` somem com o DROP; `triggers` são as funções que os recriam.
+    if conn.dialect.name != 'sqlite':
+        return
+    from sqlalchemy.schema import CreateTable
+
+    name = table.name
+    sql = conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": name}
+    ).scalar()
+    if "AUTOINCREMENT" not in sql.upper():
+        ddl = str(CreateTable(table).compile(dialect=conn.dialect))
+        columns = ", ".join(c.name for c in table.columns)
+        conn.execute(text(ddl.replace(f"CREATE TABLE {name} ", f"CREATE TABLE {name}_new ", 1)))
+        conn.execute(text(f"INSERT INTO {name}_new ({columns}) SELECT {columns} FROM {name}"))
+        conn.execute(text(f"DROP TABLE {name}"))
+        conn.execute(text(f"ALTER TABLE {name}_new RENAME TO {name}"))
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+        for install in triggers:
+            install(conn)
+
+    used = " UNION ALL ".join(f"SELECT MAX(id) AS id FROM {t}" for t in (name, *reserved))
+    conn.execute(text("DELETE FROM sqlite_sequence WHERE name = :name"), {"name": name})
+    conn.execute(
+        text(f"INSERT INTO sqlite_sequence (name, seq) SELECT :name, COALESCE(MAX(id), 0) FROM ({used})"),
+        {"name": name}
+    )
+
+
+def add_column(conn, table, column, ddl):
+    columns = [c['name'] for c in inspect(conn).get_columns(table)]
+    if column not in columns:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def _ensure_version_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, "
+        "name VARCHAR(200) NOT NULL, "
+        "applied_at DATETIME NOT NULL)"
+    ))
+
+
+def current_version(engine):
+    with engine.begin() as conn:
+        _ensure_version_table(conn)
+        return conn.execute(
+            text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+        ).scalar()
+
+
+def latest_version():
+    return MIGRATIONS[-1][0]
+
+
+def install(db, target=None, echo=None):
+    # Tabelas que ainda não existem saem dos models; o resto vem das migrações.
+    db.create_all()
+    return upgrade(db.engine, target=target, echo=echo)
+
+
+def ensure_current(db):
+    # Caminho rápido do boot: com o banco em dia, só uma consulta à versão.
+    if current_version(db.engine) < latest_version():
+        install(db)
+
+
+def upgrade(engine, target=None, echo=None):
+    applied = []
+    version = current_version(engine)
+
+    for number, name, fn in MIGRATIONS:
+        if number <= version or (target is not None and number > target):
+            continue
+        with engine.begin() as conn:
+            fn(conn)
+            conn.execute(
+                text(
+                    "INSERT INTO schema_migrations (version, name, applied_at) "
+                    "VALUES (:version, :name, :applied_at)"
+                ),
+                {"version": number, "name": name, "applied_at": datetime.utcnow()}
+            )
+        applied.append((number, name))
+        if echo:
+            echo(f"{number:03d} {name}")
+
+    return applied
+
+
+def init_app(app, db):
+    @app.cli.command('db-upgrade')
+    @click.option('--target', type=int, default=None, help='Versão máxima a aplicar.')
+    def db_upgrade(target):
+        """Cria as tabelas que faltam e aplica as migrações pendentes."""
+        applied = install(db, target=target, echo=click.echo)
+        if not applied:
+            click.echo(f"Banco já está na versão {current_version(db.engine)}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("uso: python -m scrum_app.migrations <caminho do banco | URI>")
+        return 2
+
+    uri = argv[0] if "://" in argv[0] else f"sqlite:///{argv[0]}"
+    engine = create_engine(uri)
+    applied = upgrade(engine, echo=print)
+    if not applied:
+        print("Banco já está na versão", current_version(engine))
+    engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
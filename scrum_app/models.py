@@ -2,6 +2,9 @@ from . import db
 from flask_login import UserMixin
 from datetime import datetime
 
+KANBAN_STATUSES = ["To Do", "Doing", "Done"]
+STORY_STATUSES = ["To Do", "In Progress", "Done"]
+
 class User(db.Model, UserMixin):
     __tablename__ = "user"
 
@@ -13,11 +16,6 @@ class User(db.Model, UserMixin):
     owned_projects = db.relationship("Project", backref="owner", lazy=True)
     tasks = db.relationship("Task", backref="assigned_user", lazy=True)
     memberships = db.relationship("ProjectMembership", back_populates="user")
-    @property
-    def all_projects(self):
-        owned = set(self.owned_projects)
-        member = set([m.project for m in self.memberships])
-        return list(owned.union(member))
 
 
 
@@ -29,6 +27,8 @@ class Project(db.Model):
     name = db.Column(db.String(120), nullable=False)
     description = db.Column(db.Text)
     owner_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
     sprints = db.relationship("Sprint", backref="project", lazy=True)
     tasks = db.relationship("Task", backref="project", lazy=True)
     user_stories = db.relationship("UserStory", backref="project", lazy=True)
@@ -39,6 +39,9 @@ class Project(db.Model):
 
 class Sprint(db.Model):
     __tablename__ = "sprint"
+    __table_args__ = (
+        db.Index("ix_sprint_project", "project_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(150), nullable=False)
@@ -46,14 +49,25 @@ class Sprint(db.Model):
     end_date = db.Column(db.Date)
     goal = db.Column(db.Text)
     project_id = db.Column(db.Integer, db.ForeignKey("projects.id"), nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
     tasks = db.relationship("Task", backref="sprint", lazy=True)
     user_stories = db.relationship("UserStory", backref="sprint", lazy=True)
 
+    __mapper_args__ = {"version_id_col": version}
+
 
 
 
 class Task(db.Model):
     __tablename__ = "task"
+    __table_args__ = (
+        db.Index("ix_task_project_status_id", "project_id", "status", "id"),
+        db.Index("ix_task_project_created", "project_id", "created_at", "id"),
+        db.Index("ix_task_project_rank", "project_id", "rank"),
+        # Ids nunca são reaproveitados: o arquivo, o histórico de status, a
+        # atividade e o feed do Kanban guardam ids de tasks que já saíram daqui.
+        {"sqlite_autoincrement": True},
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(150), nullable=False)
@@ -63,10 +77,32 @@ class Task(db.Model):
     project_id = db.Column(db.Integer, db.ForeignKey("projects.id"), nullable=False)
     sprint_id = db.Column(db.Integer, db.ForeignKey("sprint.id"), nullable=True)
     assigned_to = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
+    rank = db.Column(db.String(64))
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
+    # UPDATEs do ORM saem com "AND version = ?" (ver concurrency.py).
+    __mapper_args__ = {"version_id_col": version}
+
+
+class TaskStatusCount(db.Model):
+    # Totais das colunas do Kanban, mantidos por triggers em task (ver
+    # queries.install_kanban_counts); sprint_id 0 = sem sprint.
+    __tablename__ = "task_status_counts"
+
+    project_id = db.Column(db.Integer, primary_key=True)
+    sprint_id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
 
 
 class UserStory(db.Model):
     __tablename__ = "user_stories"
+    __table_args__ = (
+        db.Index("ix_user_stories_project_sprint", "project_id", "sprint_id"),
+        db.Index("ix_user_stories_project_rank", "project_id", "rank"),
+        db.Index("ix_user_stories_project_sprint_rank", "project_id", "sprint_id", "rank"),
+        {"sqlite_autoincrement": True},
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(120), nullable=False)
@@ -74,13 +110,20 @@ class UserStory(db.Model):
     status = db.Column(db.String(20), nullable=False, default="To Do")
     project_id = db.Column(db.Integer, db.ForeignKey("projects.id"), nullable=False)
     sprint_id = db.Column(db.Integer, db.ForeignKey('sprint.id'))
+    rank = db.Column(db.String(64))
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
 
+    __mapper_args__ = {"version_id_col": version}
 
     def __repr__(self):
         return f"<UserStory {self.title}>"
 
 class ProjectMembership(db.Model):
     __tablename__ = "project_memberships"
+    __table_args__ = (
+        db.Index("uq_project_memberships_user_project", "user_id", "project_id", unique=True),
+        db.Index("ix_project_memberships_project", "project_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
@@ -90,3 +133,141 @@ class ProjectMembership(db.Model):
     project = db.relationship("Project", back_populates="memberships")
 
 
+class StatusTransition(db.Model):
+    __tablename__ = "status_transitions"
+    __table_args__ = (
+        db.Index("ix_status_transitions_item", "item_type", "item_id"),
+        db.Index("ix_status_transitions_sprint", "sprint_id", "changed_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    item_type = db.Column(db.String(10), nullable=False)
+    item_id = db.Column(db.Integer, nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey("projects.id"), nullable=False)
+    sprint_id = db.Column(db.Integer, nullable=True)
+    from_status = db.Column(db.String(50), nullable=True)
+    to_status = db.Column(db.String(50), nullable=True)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class SprintSnapshot(db.Model):
+    __tablename__ = "sprint_snapshots"
+    __table_args__ = (
+        db.UniqueConstraint("sprint_id", "day", name="uq_sprint_snapshots_sprint_day"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    sprint_id = db.Column(db.Integer, nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    tasks_total = db.Column(db.Integer, nullable=False, default=0)
+    tasks_done = db.Column(db.Integer, nullable=False, default=0)
+    stories_total = db.Column(db.Integer, nullable=False, default=0)
+    stories_done = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ProjectChange(db.Model):
+    __tablename__ = "project_changes"
+    __table_args__ = (
+        db.Index("ix_project_changes_project", "project_id", "id"),
+        # O id é a versão do feed: não pode voltar depois de uma limpeza.
+        {"sqlite_autoincrement": True},
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, nullable=False)
+    item_type = db.Column(db.String(10), nullable=False)
+    item_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ChangefeedState(db.Model):
+    # Linha única: maior id de project_changes já removido pela limpeza.
+    __tablename__ = "changefeed_state"
+
+    id = db.Column(db.Integer, primary_key=True)
+    pruned_through = db.Column(db.Integer, nullable=False, default=0)
+
+
+# Fila de jobs em segundo plano (ver jobs.py).
+class Job(db.Model):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        db.Index("ix_jobs_status_run_after", "status", "run_after", "id"),
+        db.Index("ix_jobs_project_status", "project_id", "status"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    project_id = db.Column(db.Integer, nullable=True)
+    user_id = db.Column(db.Integer, nullable=True)
+    payload = db.Column(db.Text, nullable=False, default="{}")
+    status = db.Column(db.String(10), nullable=False, default="queued")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    worker = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    run_after = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+
+# Registro de atividade por projeto, só de inserção (ver activity.py).
+class ActivityEntry(db.Model):
+    __tablename__ = "activity_log"
+    __table_args__ = (
+        db.Index("ix_activity_log_project", "project_id", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+    action = db.Column(db.String(50), nullable=False)
+    item_type = db.Column(db.String(10), nullable=True)
+    item_id = db.Column(db.Integer, nullable=True)
+    detail = db.Column(db.Text, nullable=False, default="{}")
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+# Tasks e user stories arquivadas (ver archive.py). Mesmas colunas da tabela
+# ativa, com o id original preservado sempre que estiver livre no arquivo,
+# mais a data do arquivamento.
+class ArchivedTask(db.Model):
+    __tablename__ = "archived_tasks"
+    __table_args__ = (
+        db.Index("ix_archived_tasks_project", "project_id", "id"),
+        db.Index("ix_archived_tasks_sprint", "sprint_id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(150), nullable=False)
+    description = db.Column(db.Text)
+    status = db.Column(db.String(50))
+    created_at = db.Column(db.DateTime)
+    project_id = db.Column(db.Integer, nullable=False)
+    sprint_id = db.Column(db.Integer, nullable=True)
+    assigned_to = db.Column(db.Integer, nullable=True)
+    rank = db.Column(db.String(64))
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ArchivedStory(db.Model):
+    __tablename__ = "archived_user_stories"
+    __table_args__ = (
+        db.Index("ix_archived_user_stories_project", "project_id", "id"),
+        db.Index("ix_archived_user_stories_sprint", "sprint_id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(120), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    project_id = db.Column(db.Integer, nullable=False)
+    sprint_id = db.Column(db.Integer, nullable=True)
+    rank = db.Column(db.String(64))
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
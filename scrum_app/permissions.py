@@ -0,0 +1,136 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from flask import current_app, flash, g, redirect, url_for
+from flask_login import current_user
+from . import db
+from .models import Project, ProjectMembership
+
+# Autorização por projeto. Cada par (usuário, projeto) é resolvido com uma
+# única consulta indexada e memorizado em flask.g até o fim do request.
+# Com PERMISSION_CACHE_TTL > 0 o resultado também fica num LRU do app,
+# limitado a PERMISSION_CACHE_SIZE pares.
+#
+# invalidate() só limpa o cache do processo que atendeu a mudança de membros.
+# Nos outros workers a entrada antiga vale até expirar: um membro removido
+# mantém acesso por até PERMISSION_CACHE_TTL segundos ali (e um adicionado
+# pode esperar o mesmo tanto). Para revogação imediata, use TTL 0.
+
+Access = namedtuple("Access", ["is_owner", "role"])
+
+_MISSING = object()
+
+
+class AccessCache:
+    def __init__(self):
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] < time.monotonic():
+                del self._items[key]
+                return _MISSING
+            self._items.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, access, ttl, max_size):
+        with self._lock:
+            self._items[key] = (time.monotonic() + ttl, access)
+            self._items.move_to_end(key)
+            while len(self._items) > max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, project_id, user_id=None):
+        with self._lock:
+            for key in list(self._items):
+                if key[1] == project_id and (user_id is None or key[0] == user_id):
+                    del self._items[key]
+
+    def __len__(self):
+        return len(self._items)
+
+
+def _cache():
+    # Um cache por app, como o de identidade: apps no mesmo processo
+    # (benchmark, stress, testes) têm bancos próprios com os mesmos ids.
+    return current_app.extensions.setdefault("permission_cache", AccessCache())
+
+
+def project_access(project_id, user_id=None):
+    if user_id is None:
+        if not current_user.is_authenticated:
+            return None
+        user_id = current_user.id
+
+    key = (user_id, project_id)
+    memo = g.setdefault("_project_access", {})
+    if key in memo:
+        return memo[key]
+
+    ttl = current_app.config.get("PERMISSION_CACHE_TTL", 0)
+    access = _cache().get(key) if ttl else _MISSING
+    if access is _MISSING:
+        access = _query_access(project_id, user_id)
+        if ttl:
+            _cache().set(key, access, ttl, current_app.config["PERMISSION_CACHE_SIZE"])
+
+    memo[key] = access
+    return access
+
+
+def _query_access(project_id, user_id):
+    row = (
+        db.session.query(Project.owner_id, ProjectMembership.role)
+        .outerjoin(
+            ProjectMembership,
+            (ProjectMembership.project_id == Project.id)
+            & (ProjectMembership.user_id == user_id)
+        )
+        .filter(Project.id == project_id)
+        .first()
+    )
+    if row is None:
+        return None
+
+    owner_id, role = row
+    if owner_id == user_id:
+        return Access(True, role or "Product Owner")
+    if role is None:
+        return None
+    return Access(False, role)
+
+
+def has_membership(project_id, user_id):
+    return db.session.query(
+        db.exists().where(
+            (ProjectMembership.project_id == project_id)
+            & (ProjectMembership.user_id == user_id)
+        )
+    ).scalar()
+
+
+def user_has_access(project):
+    if current_user.is_authenticated and project.owner_id == current_user.id:
+        return True
+    return project_access(project.id) is not None
+
+
+def is_project_owner(project):
+    return current_user.is_authenticated and project.owner_id == current_user.id
+
+
+def access_denied():
+    flash("Acesso negado.", "danger")
+    return redirect(url_for('main.dashboard'))
+
+
+def invalidate(project_id, user_id=None):
+    memo = g.get("_project_access") or {}
+    for key in list(memo):
+        if key[1] == project_id and (user_id is None or key[0] == user_id):
+            del memo[key]
+    _cache().invalidate(project_id, user_id)
@@ -0,0 +1,274 @@
+from datetime import date
+from sqlalchemy import func, or_, select, text, union_all
+from sqlalchemy.orm import aliased, joinedload, selectinload
+from . import db
+from .models import User, Project, Sprint, Task, TaskStatusCount, UserStory, ProjectMembership, KANBAN_STATUSES
+
+# Camada de carregamento das páginas de listagem: cada função busca tudo o que
+# o template precisa num número fixo de queries, independente do tamanho do
+# projeto, para que o Jinja nunca dispare lazy loads por linha.
+
+
+def load_project_sprints(project_id):
+    return (
+        Sprint.query
+        .filter_by(project_id=project_id)
+        .order_by(Sprint.id)
+        .all()
+    )
+
+
+def load_project_stories(project_id):
+    return (
+        UserStory.query
+        .filter_by(project_id=project_id)
+        .order_by(UserStory.rank, UserStory.id)
+        .all()
+    )
+
+
+def load_project_tasks(project_id):
+    return (
+        Task.query
+        .filter_by(project_id=project_id)
+        .options(joinedload(Task.sprint), joinedload(Task.assigned_user))
+        .order_by(Task.rank, Task.id)
+        .all()
+    )
+
+
+def load_sprint(sprint_id):
+    return (
+        Sprint.query
+        .options(joinedload(Sprint.project))
+        .filter_by(id=sprint_id)
+        .first_or_404()
+    )
+
+
+def load_sprint_stories(project_id, sprint_id):
+    sprint_stories = (
+        UserStory.query
+        .filter_by(project_id=project_id, sprint_id=sprint_id)
+        .order_by(UserStory.rank, UserStory.id)
+        .all()
+    )
+    available_stories = (
+        UserStory.query
+        .filter_by(project_id=project_id, sprint_id=None)
+        .order_by(UserStory.rank, UserStory.id)
+        .all()
+    )
+    return sprint_stories, available_stories
+
+
+def load_project_with_members(project_id):
+    return (
+        Project.query
+        .options(
+            selectinload(Project.memberships).joinedload(ProjectMembership.user)
+        )
+        .filter_by(id=project_id)
+        .first_or_404()
+    )
+
+
+def _kanban_filter(query, project_id, sprint_id):
+    query = query.filter(Task.project_id == project_id)
+    if sprint_id:
+        query = query.filter(Task.sprint_id == sprint_id)
+    return query
+
+
+def load_kanban_columns(project_id, page_size, sprint_id=None):
+    # As três colunas numa query só: um UNION ALL de um "ORDER BY id DESC
+    # LIMIT page_size + 1" por status, cada um uma busca no índice
+    # (project_id, status, id) que para na primeira página. O custo não
+    # depende de quantas tasks a coluna tem (Done só cresce), e os totais
+    # também não (ver count_kanban_columns).
+    heads = []
+    for status in KANBAN_STATUSES:
+        head = (
+            _kanban_filter(select(Task), project_id, sprint_id)
+            .where(Task.status == status)
+            .order_by(Task.id.desc())
+            .limit(page_size + 1)
+            .subquery()
+        )
+        heads.append(select(head))
+    board = union_all(*heads).subquery()
+    ranked = aliased(Task, board)
+
+    columns = {status: KanbanColumn(status) for status in KANBAN_STATUSES}
+    for task in db.session.query(ranked).order_by(board.c.id.desc()):
+        columns[task.status].tasks.append(task)
+
+    for status, total in count_kanban_columns(project_id, sprint_id).items():
+        columns[status].total = total
+    for column in columns.values():
+        column.paginate(page_size)
+    return columns
+
+
+def count_kanban_columns(project_id, sprint_id=None):
+    # No SQLite os totais vêm de task_status_counts: uma linha por (sprint,
+    # status) do projeto, então o custo não cresce com a coluna Done. Nos
+    # outros bancos, o GROUP BY no índice (project_id, status, id).
+    if db.engine.dialect.name != 'sqlite':
+        rows = (
+            _kanban_filter(db.session.query(Task.status, func.count()), project_id, sprint_id)
+            .filter(Task.status.in_(KANBAN_STATUSES))
+            .group_by(Task.status)
+            .all()
+        )
+        return dict(rows)
+
+    query = db.session.query(TaskStatusCount.status, func.sum(TaskStatusCount.count)).filter(
+        TaskStatusCount.project_id == project_id,
+        TaskStatusCount.status.in_(KANBAN_STATUSES)
+    )
+    if sprint_id:
+        query = query.filter(TaskStatusCount.sprint_id == sprint_id)
+    return {status: total for status, total in query.group_by(TaskStatusCount.status) if total}
+
+
+def install_kanban_counts(conn):
+    # Triggers em task mantêm task_status_counts na mesma transação, então
+    # valem também para inserts em lote, importação, arquivamento e SQL direto.
+    key_new = "NEW.project_id, COALESCE(NEW.sprint_id, 0), COALESCE(NEW.status, '')"
+    key_old = (
+        "project_id = OLD.project_id AND sprint_id = COALESCE(OLD.sprint_id, 0) "
+        "AND status = COALESCE(OLD.status, '')"
+    )
+    increment = (
+        f"INSERT INTO task_status_counts (project_id, sprint_id, status, count) "
+        f"VALUES ({key_new}, 1) "
+        f"ON CONFLICT (project_id, sprint_id, status) DO UPDATE SET count = count + 1; "
+    )
+    decrement = f"UPDATE task_status_counts SET count = count - 1 WHERE {key_old}; "
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS task_counts_insert AFTER INSERT ON task BEGIN "
+        f"{increment}END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS task_counts_update "
+        f"AFTER UPDATE OF project_id, sprint_id, status ON task BEGIN "
+        f"{decrement}{increment}END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS task_counts_delete AFTER DELETE ON task BEGIN "
+        f"{decrement}END"
+    ))
+
+
+def recount_kanban(conn):
+    conn.execute(text("DELETE FROM task_status_counts"))
+    conn.execute(text(
+        "INSERT INTO task_status_counts (project_id, sprint_id, status, count) "
+        "SELECT project_id, COALESCE(sprint_id, 0), COALESCE(status, ''), COUNT(*) "
+        "FROM task GROUP BY 1, 2, 3"
+    ))
+
+
+def load_kanban_column(project_id, status, page_size, before_id=None, sprint_id=None):
+    query = _kanban_filter(Task.query, project_id, sprint_id).filter(Task.status == status)
+    if before_id:
+        query = query.filter(Task.id < before_id)
+
+    column = KanbanColumn(status)
+    column.tasks = query.order_by(Task.id.desc()).limit(page_size + 1).all()
+    column.paginate(page_size)
+    return column
+
+
+class KanbanColumn:
+    def __init__(self, status):
+        self.status = status
+        self.tasks = []
+        self.total = 0
+        self.next_cursor = None
+
+    def paginate(self, page_size):
+        if len(self.tasks) > page_size:
+            self.tasks = self.tasks[:page_size]
+            self.next_cursor = self.tasks[-1].id
+
+
+def search_users(project_id, prefix, limit, members=True):
+    # Busca por prefixo como intervalo (username >= p AND username < p + U+FFFF)
+    # para usar o índice único de user.username, diferente de LIKE no SQLite.
+    query = db.session.query(User.id, User.username)
+    if prefix:
+        query = query.filter(User.username >= prefix, User.username < prefix + '\uffff')
+
+    is_member = db.exists().where(
+        (ProjectMembership.user_id == User.id)
+        & (ProjectMembership.project_id == project_id)
+    )
+    query = query.filter(is_member if members else ~is_member)
+
+    return query.order_by(User.username).limit(limit).all()
+
+
+def user_project_ids(user_id):
+    owned = db.session.query(Project.id.label('project_id')).filter(Project.owner_id == user_id)
+    member = db.session.query(ProjectMembership.project_id).filter(ProjectMembership.user_id == user_id)
+    return owned.union(member).subquery()
+
+
+def load_dashboard(user_id, page, page_size):
+    # Projetos do usuário (dono ou membro) numa única query com UNION. A
+    # subquery interna ordena e pagina só os ids (com o total ao lado); os
+    # contadores saem na query externa, só para os projetos da página, então
+    # quem participa de centenas de projetos não paga as contagens de todos.
+    ids = user_project_ids(user_id)
+    today = date.today()
+
+    page_ids = (
+        db.session.query(Project.id, func.count().over().label('total'))
+        .join(ids, ids.c.project_id == Project.id)
+        .order_by(Project.name, Project.id)
+        .limit(page_size)
+        .offset((page - 1) * page_size)
+        .subquery()
+    )
+
+    open_tasks = (
+        db.session.query(func.count(Task.id))
+        .filter(Task.project_id == Project.id, Task.status != 'Done')
+        .correlate(Project)
+        .scalar_subquery()
+    )
+    stories = (
+        db.session.query(func.count(UserStory.id))
+        .filter(UserStory.project_id == Project.id)
+        .correlate(Project)
+        .scalar_subquery()
+    )
+    active_sprints = (
+        db.session.query(func.count(Sprint.id))
+        .filter(
+            Sprint.project_id == Project.id,
+            or_(Sprint.start_date.is_(None), Sprint.start_date <= today),
+            or_(Sprint.end_date.is_(None), Sprint.end_date >= today)
+        )
+        .correlate(Project)
+        .scalar_subquery()
+    )
+    rows = (
+        db.session.query(
+            Project.id,
+            Project.name,
+            Project.description,
+            Project.owner_id,
+            open_tasks.label('open_tasks'),
+            stories.label('stories'),
+            active_sprints.label('active_sprints'),
+            page_ids.c.total
+        )
+        .join(page_ids, page_ids.c.id == Project.id)
+        .order_by(Project.name, Project.id)
+        .all()
+    )
+
+    return rows, (rows[0].total if rows else 0)
@@ -0,0 +1,270 @@
+import click
+from flask import current_app
+from sqlalchemy import bindparam, event, func, select, update
+from sqlalchemy.orm import Session
+from . import db, jobs
+from .models import Task, UserStory
+
+# Ordem explícita do backlog com chaves fracionárias (fractional indexing).
+#
+# Cada task e user story tem um rank textual; a ordem é a ordem lexicográfica
+# (binária) dessas chaves. Mover um item para entre outros dois gera uma chave
+# nova entre as chaves vizinhas, então reordenar é um UPDATE de uma linha,
+# sem renumerar o backlog. A chave é uma parte inteira de tamanho variável
+# (o primeiro caractere diz o tamanho) seguida de uma fração em base 62:
+# itens novos entram no fim incrementando a parte inteira, e só inserções
+# repetidas no mesmo ponto alongam a fração. Quando uma chave passa de
+# RANK_REBALANCE_LENGTH, um job redistribui o backlog com chaves curtas.
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+SMALLEST_INTEGER = "A" + DIGITS[0] * 26
+
+SOURCES = {
+    "tasks": Task,
+    "stories": UserStory,
+}
+
+
+class RankError(ValueError):
+    pass
+
+
+def key_between(a, b):
+    if a is not None:
+        _validate(a)
+    if b is not None:
+        _validate(b)
+    if a is not None and b is not None and a >= b:
+        raise RankError(f"{a} >= {b}")
+
+    if a is None:
+        if b is None:
+            return "a" + DIGITS[0]
+        int_b = _integer_part(b)
+        frac_b = b[len(int_b):]
+        if int_b == SMALLEST_INTEGER:
+            return int_b + _midpoint("", frac_b)
+        if int_b < b:
+            return int_b
+        result = _decrement(int_b)
+        if result is None:
+            raise RankError("não há chave antes de " + b)
+        return result
+
+    int_a = _integer_part(a)
+    frac_a = a[len(int_a):]
+    if b is None:
+        result = _increment(int_a)
+        return int_a + _midpoint(frac_a, None) if result is None else result
+
+    int_b = _integer_part(b)
+    frac_b = b[len(int_b):]
+    if int_a == int_b:
+        return int_a + _midpoint(frac_a, frac_b)
+    result = _increment(int_a)
+    if result is not None and result < b:
+        return result
+    return int_a + _midpoint(frac_a, None)
+
+
+def keys_between(a, b, n):
+    if n <= 0:
+        return []
+    if n == 1:
+        return [key_between(a, b)]
+    if b is None:
+        keys = [key_between(a, None)]
+        for _ in range(n - 1):
+            keys.append(key_between(keys[-1], None))
+        return keys
+    if a is None:
+        keys = [key_between(None, b)]
+        for _ in range(n - 1):
+            keys.append(key_between(None, keys[-1]))
+        return keys[::-1]
+    middle = n // 2
+    key = key_between(a, b)
+    return keys_between(a, key, middle) + [key] + keys_between(key, b, n - middle - 1)
+
+
+def _midpoint(a, b):
+    # a < b como frações em base 62 ("" = 0, None = 1), sem zeros à direita.
+    if b is not None:
+        n = 0
+        while (a[n] if n < len(a) else DIGITS[0]) == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else len(DIGITS)
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b + 1) // 2]
+    if b is not None and len(b) > 1:
+        return b[:1]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def _integer_length(head):
+    if "a" <= head <= "z":
+        return ord(head) - ord("a") + 2
+    if "A" <= head <= "Z":
+        return ord("Z") - ord(head) + 2
+    raise RankError("chave inválida: " + head)
+
+
+def _integer_part(key):
+    length = _integer_length(key[0])
+    if length > len(key):
+        raise RankError("chave inválida: " + key)
+    return key[:length]
+
+
+def _validate(key):
+    if not key or key == SMALLEST_INTEGER:
+        raise RankError("chave inválida: " + repr(key))
+    fraction = key[len(_integer_part(key)):]
+    if fraction.endswith(DIGITS[0]):
+        raise RankError("chave inválida: " + key)
+
+
+def _increment(integer):
+    head, digits = integer[0], list(integer[1:])
+    for i in range(len(digits) - 1, -1, -1):
+        position = DIGITS.index(digits[i]) + 1
+        if position < len(DIGITS):
+            digits[i] = DIGITS[position]
+            return head + "".join(digits)
+        digits[i] = DIGITS[0]
+    if head == "Z":
+        return "a" + DIGITS[0]
+    if head == "z":
+        return None
+    head = chr(ord(head) + 1)
+    if head > "a":
+        digits.append(DIGITS[0])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+
+def _decrement(integer):
+    head, digits = integer[0], list(integer[1:])
+    for i in range(len(digits) - 1, -1, -1):
+        position = DIGITS.index(digits[i]) - 1
+        if position >= 0:
+            digits[i] = DIGITS[position]
+            return head + "".join(digits)
+        digits[i] = DIGITS[-1]
+    if head == "a":
+        return "Z" + DIGITS[-1]
+    if head == "A":
+        return None
+    head = chr(ord(head) - 1)
+    if head < "Z":
+        digits.append(DIGITS[-1])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+
+def last_rank(model, project_id, connection=None):
+    query = select(func.max(model.rank)).where(model.project_id == project_id)
+    return (connection or db.session).scalar(query)
+
+
+def append_keys(model, project_id, n, connection=None):
+    return keys_between(last_rank(model, project_id, connection), None, n)
+
+
+@event.listens_for(Session, "before_flush")
+def _assign_ranks(session, flush_context, instances):
+    # Itens novos sem rank entram no fim do backlog do projeto, na ordem em
+    # que foram adicionados à sessão. Uma consulta de max(rank) por projeto.
+    pending = {}
+    for obj in session.new:
+        if isinstance(obj, (Task, UserStory)) and obj.rank is None:
+            pending.setdefault((type(obj), obj.project_id), []).append(obj)
+    for (model, project_id), items in pending.items():
+        with session.no_autoflush:
+            keys = append_keys(model, project_id, len(items), session)
+        for item, key in zip(items, keys):
+            item.rank = key
+
+
+def move(kind, project_id, item_id, after_id=None, before_id=None):
+    model = SOURCES[kind]
+    if after_id is None and before_id is None:
+        raise RankError("informe after_id ou before_id")
+    if item_id in (after_id, before_id):
+        raise RankError("o item não pode ser vizinho de si mesmo")
+
+    wanted = [i for i in (item_id, after_id, before_id) if i is not None]
+    ranks = dict(db.session.execute(
+        select(model.id, model.rank).where(model.project_id == project_id, model.id.in_(wanted))
+    ).all())
+    missing = [i for i in wanted if i not in ranks]
+    if missing:
+        raise RankError(f"itens não encontrados no projeto: {missing}")
+
+    # Com um vizinho só, o outro é o item adjacente a ele na ordem atual
+    # (uma busca no índice), ignorando o próprio item que está sendo movido.
+    lower = ranks[after_id] if after_id is not None else None
+    upper = ranks[before_id] if before_id is not None else None
+    others = (model.project_id == project_id) & (model.id != item_id)
+    if before_id is None:
+        upper = db.session.scalar(select(func.min(model.rank)).where(others, model.rank > lower))
+    elif after_id is None:
+        lower = db.session.scalar(select(func.max(model.rank)).where(others, model.rank < upper))
+    if lower is not None and upper is not None and lower >= upper:
+        raise RankError("after_id precisa vir antes de before_id")
+
+    rank = key_between(lower, upper)
+    db.session.execute(
+        update(model)
+        .where(model.id == item_id)
+        .values(rank=rank)
+        .execution_options(synchronize_session=False)
+    )
+    if len(rank) > current_app.config['RANK_REBALANCE_LENGTH']:
+        jobs.enqueue("rank-rebalance", project_id, dedupe=True, items=kind)
+    return rank
+
+
+def rebalance(model, project_id):
+    ids = db.session.scalars(
+        select(model.id).where(model.project_id == project_id).order_by(model.rank, model.id)
+    ).all()
+    keys = keys_between(None, None, len(ids))
+    if ids:
+        db.session.execute(
+            update(model.__table__)
+            .where(model.__table__.c.id == bindparam("_id"))
+            .values(rank=bindparam("_rank")),
+            [{"_id": i, "_rank": key} for i, key in zip(ids, keys)]
+        )
+    return len(ids)
+
+
+def rebalance_all(max_length=None, project_id=None):
+    done = 0
+    for model in SOURCES.values():
+        query = select(model.project_id).group_by(model.project_id)
+        if project_id is not None:
+            query = query.where(model.project_id == project_id)
+        if max_length is not None:
+            query = query.having(func.max(func.length(model.rank)) > max_length)
+        for pid in db.session.scalars(query).all():
+            rebalance(model, pid)
+            db.session.commit()
+            done += 1
+    return done
+
+
+def init_app(app):
+    @app.cli.command('rank-rebalance')
+    @click.option('--project', type=int, default=None, help='Redistribui só este projeto.')
+    @click.option('--all', 'everything', is_flag=True, help='Inclui projetos com chaves curtas.')
+    def rank_rebalance(project, everything):
+        """Redistribui as chaves de ordem do backlog quando ficam longas."""
+        limit = None if everything else app.config['RANK_REBALANCE_LENGTH']
+        click.echo(f"{rebalance_all(limit, project)} backlogs redistribuídos")
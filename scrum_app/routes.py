@@ -1,15 +1,32 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash
+from flask import (
+    Blueprint, render_template, redirect, url_for, request, flash, abort, current_app, jsonify,
+    Response, stream_with_context
+)
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from . import db, login_manager
-from .models import User, Project, UserStory, Sprint, Task, ProjectMembership
+from .models import User, Project, UserStory, Sprint, Task, ProjectMembership, KANBAN_STATUSES
+from .tracking import track, task_change, story_change, deleted
+from .versioning import bump, page_validators, is_fresh, not_modified, cacheable
+from .search import search
+from . import activity, archive, changefeed, jobs, ranking, transfer
+from .bulk import BulkError, parse_ids, plan_stories
+from .concurrency import ConflictError, guarded
+from .permissions import user_has_access, is_project_owner, access_denied, has_membership, invalidate
+from .fragments import render_fragment
+from .identity import load_identity
+from .queries import (
+    load_project_sprints, load_project_stories, load_project_tasks,
+    load_sprint, load_sprint_stories, load_project_with_members,
+    load_kanban_columns, load_kanban_column, search_users, load_dashboard
+)
 from datetime import datetime
 
 main = Blueprint('main', __name__)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return load_identity(int(user_id))
 
 @main.route('/')
 def home():
@@ -59,8 +76,11 @@ def logout():
 @main.route('/dashboard')
 @login_required
 def dashboard():
-    projects = current_user.all_projects
-    return render_template('dashboard.html', projects=projects)
+    page = max(request.args.get('page', 1, type=int), 1)
+    page_size = current_app.config['DASHBOARD_PAGE_SIZE']
+    projects, total = load_dashboard(current_user.id, page, page_size)
+    pages = max((total + page_size - 1) // page_size, 1)
+    return render_template('dashboard.html', projects=projects, page=page, pages=pages)
 
 
 
@@ -82,6 +102,7 @@ def new_project():
 )
     db.session.add(membership)
     db.session.commit()
+    activity.record("project.created", project.id, detail={"name": project.name})
     flash('Projeto criado!', 'success')
     return redirect(url_for('main.dashboard'))
 
@@ -92,30 +113,170 @@ def view_project(project_id):
     project = Project.query.get_or_404(project_id)
 
     if not user_has_access(project):
-        flash("Acesso negado.", "danger")
-        return redirect(url_for('main.dashboard'))
+        return access_denied()
+
+    etag, modified = page_validators(project)
+    if is_fresh(etag, modified):
+        return not_modified(etag, modified)
+
+    fragments = {
+        'sprints': render_fragment(project, 'sprints', lambda: render_template(
+            '_project_sprints.html', project=project, sprints=load_project_sprints(project.id))),
+        'stories': render_fragment(project, 'stories', lambda: render_template(
+            '_project_stories.html', project=project, user_stories=load_project_stories(project.id))),
+        'tasks': render_fragment(project, 'tasks', lambda: render_template(
+            '_project_tasks.html', project=project, tasks=load_project_tasks(project.id))),
+    }
+
+    return cacheable(render_template(
+        'project.html',
+        project=project,
+        fragments=fragments
+    ), etag, modified)
+
+
+@main.route('/project/<int:project_id>/search')
+@login_required
+def search_project(project_id):
+    project = Project.query.get_or_404(project_id)
+
+    if not user_has_access(project):
+        return access_denied()
 
-    sprints = project.sprints
-    user_stories = project.user_stories
-    tasks = project.tasks
+    query = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    results, has_next = search(project_id, query, page) if query else ([], False)
 
     return render_template(
-        'project.html',
+        'search.html',
         project=project,
-        sprints=sprints,
-        user_stories=user_stories,
-        tasks=tasks
+        query=query,
+        results=results,
+        page=page,
+        has_next=has_next,
+        is_owner=is_project_owner(project)
+    )
+
+
+@main.route('/project/<int:project_id>/export/<kind>.<fmt>')
+@login_required
+def export_items(project_id, kind, fmt):
+    project = Project.query.get_or_404(project_id)
+
+    if not user_has_access(project):
+        return access_denied()
+
+    try:
+        transfer.check(kind, fmt)
+    except transfer.TransferError:
+        abort(404)
+
+    return Response(
+        stream_with_context(transfer.export(project_id, kind, fmt)),
+        mimetype=transfer.FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename=projeto-{project_id}-{kind}.{fmt}'}
+    )
+
+
+@main.route('/project/<int:project_id>/import', methods=['POST'])
+@login_required
+def import_items(project_id):
+    project = Project.query.get_or_404(project_id)
+
+    if not user_has_access(project):
+        return access_denied()
+
+    upload = request.files.get('file')
+    kind = request.form.get('kind', '')
+    fmt = request.form.get('format') or (upload.filename.rsplit('.', 1)[-1].lower() if upload else '')
+    dry_run = bool(request.form.get('dry_run'))
+
+    try:
+        if not upload or not upload.filename:
+            raise transfer.TransferError("nenhum arquivo enviado")
+        transfer.check(kind, fmt)
+        report = transfer.import_file(project_id, kind, fmt, upload.stream, dry_run=dry_run)
+    except transfer.TransferError as error:
+        return render_template('import_report.html', project=project, error=str(error)), 400
+
+    if report["inserted"]:
+        activity.record(f"{activity.ITEM_TYPES[kind]}.imported", project_id,
+                        detail={"inserted": report["inserted"]})
+    return render_template('import_report.html', project=project, report=report)
+
+
+@main.route('/project/<int:project_id>/archive')
+@login_required
+def project_archive(project_id):
+    project = Project.query.get_or_404(project_id)
+
+    if not user_has_access(project):
+        return access_denied()
+
+    kind = request.args.get('kind', 'tasks')
+    if kind not in archive.SOURCES:
+        abort(404)
+    before = request.args.get('before', type=int)
+    items, next_cursor = archive.load_archive(
+        project_id, kind, current_app.config['ARCHIVE_PAGE_SIZE'], before)
+
+    return render_template(
+        'archive.html',
+        project=project,
+        kind=kind,
+        items=items,
+        next_cursor=next_cursor,
+        is_owner=is_project_owner(project)
     )
 
 
+@main.route('/project/<int:project_id>/archive/run', methods=['POST'])
+@login_required
+def run_archive(project_id):
+    project = Project.query.get_or_404(project_id)
+
+    if not is_project_owner(project):
+        return access_denied()
+
+    job = jobs.enqueue('archive', project_id, current_user.id, dedupe=True)
+    db.session.commit()
+    activity.record("archive.scheduled", project_id, detail={"job": job.id})
+    flash(f'Arquivamento agendado (job {job.id}).', 'info')
+    return redirect(url_for('main.project_archive', project_id=project_id))
+
+
+@main.route('/project/<int:project_id>/archive/restore', methods=['POST'])
+@login_required
+def restore_archived(project_id):
+    project = Project.query.get_or_404(project_id)
+
+    if not is_project_owner(project):
+        return access_denied()
+
+    kind = request.form.get('kind', '')
+    if kind not in archive.SOURCES:
+        abort(404)
+    try:
+        ids = parse_ids(request.form.getlist('ids'))
+    except BulkError as error:
+        flash(str(error), 'danger')
+        return redirect(url_for('main.project_archive', project_id=project_id, kind=kind))
+
+    results = archive.restore(project_id, kind, ids)
+    restored = [i for i, r in results.items() if r.startswith("restored")]
+    if restored:
+        activity.record(f"{activity.ITEM_TYPES[kind]}.restored", project_id, detail={"ids": restored})
+    flash(f'{len(restored)} item(ns) restaurado(s).', 'success')
+    return redirect(url_for('main.project_archive', project_id=project_id, kind=kind))
+
+
 @main.route('/project/<int:project_id>/sprint/new', methods=['GET', 'POST'])
 @login_required
 def new_sprint(project_id):
     project = Project.query.get_or_404(project_id)
 
     if not user_has_access(project):
-        flash("Acesso negado.", "danger")
-        return redirect(url_for('main.dashboard'))
+        return access_denied()
 
     if request.method == 'POST':
         name = request.form.get('name', '').strip()
@@ -147,7 +308,9 @@ def new_sprint(project_id):
         )
 
         db.session.add(sprint)
+        bump(project_id)
         db.session.commit()
+        activity.record("sprint.created", project_id, "sprint", sprint.id, {"name": sprint.name})
         flash("Sprint criada!", "success")
         return redirect(url_for('main.view_project', project_id=project_id))
 
@@ -160,8 +323,7 @@ def edit_sprint(sprint_id):
     project = sprint.project
 
     if not user_has_access(project):
-        flash("Acesso negado.", "danger")
-        return redirect(url_for('main.dashboard'))
+        return access_denied()
 
     if request.method == 'POST':
         sprint.name = request.form.get('name', sprint.name).strip()
@@ -182,7 +344,14 @@ def edit_sprint(sprint_id):
             flash("Formato de data inválido. Use YYYY-MM-DD.", "warning")
             return render_template('edit_sprint.html', sprint=sprint)
 
-        db.session.commit()
+        detail = activity.changes(sprint)
+        try:
+            with guarded(sprint, request.form.get('version', type=int)):
+                bump(project.id)
+                db.session.commit()
+        except ConflictError as conflict:
+            return edit_conflict(conflict, 'edit_sprint.html', project.id, sprint=sprint)
+        activity.record("sprint.updated", project.id, "sprint", sprint_id, detail)
         flash("Sprint atualizada!", "success")
         return redirect(url_for('main.view_project', project_id=project.id))
 
@@ -191,31 +360,25 @@ def edit_sprint(sprint_id):
 @main.route('/sprint/<int:sprint_id>')
 @login_required
 def sprint_details(sprint_id):
-    sprint = Sprint.query.get_or_404(sprint_id)
+    sprint = load_sprint(sprint_id)
     project = sprint.project
 
     if not user_has_access(project):
-        flash("Acesso negado.", "danger")
-        return redirect(url_for('main.dashboard'))
-
-    sprint_stories = UserStory.query.filter_by(
-        project_id=project.id,
-        sprint_id=sprint.id
-        ).all()
+        return access_denied()
 
-    available_stories = UserStory.query.filter_by(
-        project_id=project.id,
-        sprint_id=None
-        ).all()
+    etag, modified = page_validators(project, sprint.id)
+    if is_fresh(etag, modified):
+        return not_modified(etag, modified)
 
+    sprint_stories, available_stories = load_sprint_stories(project.id, sprint.id)
 
-    return render_template(
+    return cacheable(render_template(
         'sprint_details.html',
         sprint=sprint,
         sprint_stories=sprint_stories,
         available_stories=available_stories,
         project=project
-    )
+    ), etag, modified)
 
 
 @main.route('/sprint/<int:sprint_id>/delete', methods=['POST'])
@@ -224,11 +387,13 @@ def delete_sprint(sprint_id):
     sprint = Sprint.query.get_or_404(sprint_id)
     project = sprint.project
 
-    if project.owner_id != current_user.id:
-        flash("Acesso negado.", "danger")
-        return redirect(url_for('main.dashboard'))
+    if not is_project_owner(project):
+        return access_denied()
+    name = sprint.name
     db.session.delete(sprint)
+    bump(project.id)
     db.session.commit()
+    activity.record("sprint.deleted", project.id, "sprint", sprint_id, {"name": name})
     flash("Sprint excluída!", "danger")
     return redirect(url_for('main.view_project', project_id=project.id))
 
@@ -240,8 +405,7 @@ def new_userstory(project_id):
     project = Project.query.get_or_404(project_id)
 
     if not user_has_access(project):
-        flash("Acesso negado.", "danger")
-        return redirect(url_for('main.dashboard'))
+        return access_denied()
 
     if request.method == 'POST':
         title = request.form.get('title', '').strip()
@@ -253,7 +417,10 @@ def new_userstory(project_id):
 
         us = UserStory(title=title, description=desc, project_id=project_id)
         db.session.add(us)
+        db.session.flush()
+        track([story_change(us, None, None)])
         db.session.commit()
+        activity.record("story.created", project_id, "story", us.id, {"title": us.title})
 
         flash("User Story criada!", "success")
         return redirect(url_for('main.view_project', project_id=project_id))
@@ -267,11 +434,9 @@ def new_task(project_id):
     project = Project.query.get_or_404(project_id)
 
     if not user_has_access(project):
-        flash("Acesso negado.", "danger")
-        return redirect(url_for('main.dashboard'))
+        return access_denied()
 
     sprints = Sprint.query.filter_by(project_id=project_id).all()
-    users = User.query.all()
 
     if request.method == 'POST':
         title = request.form.get('title', '').strip()
@@ -279,6 +444,10 @@ def new_task(project_id):
         sprint_id = request.form.get('sprint_id') or None
         assigned_to = request.form.get('assigned_to') or None
 
+        if assigned_to and not has_membership(project_id, int(assigned_to)):
+            flash("O responsável precisa ser membro do projeto.", "warning")
+            return render_template('new_task.html', project=project, sprints=sprints)
+
         task = Task(
             title=title,
             description=desc,
@@ -288,26 +457,39 @@ def new_task(project_id):
         )
 
         db.session.add(task)
+        db.session.flush()
+        track([task_change(task, None, None)])
         db.session.commit()
+        activity.record("task.created", project_id, "task", task.id, {"title": task.title})
         flash("Task criada!", "success")
         return redirect(url_for('main.view_project', project_id=project_id))
 
-    return render_template('new_task.html', project=project, sprints=sprints, users=users)
+    return render_template('new_task.html', project=project, sprints=sprints)
 
 @main.route('/project/<int:project_id>/userstory/<int:us_id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit_userstory(project_id, us_id):
     project = Project.query.get_or_404(project_id)
-    if project.owner_id != current_user.id:
-        flash("Acesso negado.", "danger")
-        return redirect(url_for('main.dashboard'))
+    if not is_project_owner(project):
+        return access_denied()
 
     us = UserStory.query.get_or_404(us_id)
+    if us.project_id != project_id:
+        abort(404)
+
     if request.method == 'POST':
+        old_status = us.status
         us.title = request.form.get('title', us.title).strip()
         us.description = request.form.get('description', us.description).strip()
         us.status = request.form.get('status', us.status)
-        db.session.commit()
+        detail = activity.changes(us)
+        try:
+            with guarded(us, request.form.get('version', type=int)):
+                track([story_change(us, us.sprint_id, old_status)])
+                db.session.commit()
+        except ConflictError as conflict:
+            return edit_conflict(conflict, 'edit_userstory.html', project_id, project=project, us=us)
+        activity.record("story.updated", project_id, "story", us_id, detail)
         flash("User Story atualizada!", "success")
         return redirect(url_for('main.view_project', project_id=project_id))
 
@@ -317,13 +499,19 @@ def edit_userstory(project_id, us_id):
 @login_required
 def delete_userstory(project_id, us_id):
     project = Project.query.get_or_404(project_id)
-    if project.owner_id != current_user.id:
-        flash("Acesso negado.", "danger")
-        return redirect(url_for('main.dashboard'))
+    if not is_project_owner(project):
+        return access_denied()
 
     us = UserStory.query.get_or_404(us_id)
+    if us.project_id != project_id:
+        abort(404)
+
+    title = us.title
     db.session.delete(us)
+    db.session.flush()
+    track([deleted("story", us)])
     db.session.commit()
+    activity.record("story.deleted", project_id, "story", us_id, {"title": title})
     flash("User Story excluída!", "danger")
     return redirect(url_for('main.view_project', project_id=project_id))
 
@@ -331,64 +519,111 @@ def delete_userstory(project_id, us_id):
 @login_required
 def edit_task(project_id, task_id):
     project = Project.query.get_or_404(project_id)
-    if project.owner_id != current_user.id:
-        flash("Acesso negado.", "danger")
-        return redirect(url_for('main.dashboard'))
+    if not is_project_owner(project):
+        return access_denied()
 
     task = Task.query.get_or_404(task_id)
+    if task.project_id != project_id:
+        abort(404)
+
     sprints = Sprint.query.filter_by(project_id=project_id).all()
-    users = User.query.all()
 
     if request.method == 'POST':
+        assigned_to = request.form.get('assigned_to') or None
+        if assigned_to and not has_membership(project_id, int(assigned_to)):
+            flash("O responsável precisa ser membro do projeto.", "warning")
+            return render_template('edit_task.html', project=project, task=task, sprints=sprints)
+
+        old_sprint, old_status = task.sprint_id, task.status
         task.title = request.form.get('title', task.title).strip()
         task.description = request.form.get('description', task.description).strip()
         sprint_id = request.form.get('sprint_id') or None
-        assigned_to = request.form.get('assigned_to') or None
         task.sprint_id = int(sprint_id) if sprint_id else None
         task.assigned_to = int(assigned_to) if assigned_to else None
         task.status = request.form.get('status', task.status)
-        db.session.commit()
+        detail = activity.changes(task)
+        try:
+            with guarded(task, request.form.get('version', type=int)):
+                track([task_change(task, old_sprint, old_status)])
+                db.session.commit()
+        except ConflictError as conflict:
+            return edit_conflict(
+                conflict, 'edit_task.html', project_id, project=project, task=task, sprints=sprints
+            )
+        activity.record("task.updated", project_id, "task", task_id, detail)
         flash("Task atualizada!", "success")
         return redirect(url_for('main.view_project', project_id=project_id))
 
-    return render_template('edit_task.html', project=project, task=task, sprints=sprints, users=users)
+    return render_template('edit_task.html', project=project, task=task, sprints=sprints)
 
 
 @main.route('/project/<int:project_id>/task/<int:task_id>/delete', methods=['POST'])
 @login_required
 def delete_task(project_id, task_id):
     project = Project.query.get_or_404(project_id)
-    if project.owner_id != current_user.id:
-        flash("Acesso negado.", "danger")
-        return redirect(url_for('main.dashboard'))
+    if not is_project_owner(project):
+        return access_denied()
 
     task = Task.query.get_or_404(task_id)
+    if task.project_id != project_id:
+        abort(404)
+
+    title = task.title
     db.session.delete(task)
+    db.session.flush()
+    track([deleted("task", task)])
     db.session.commit()
+    activity.record("task.deleted", project_id, "task", task_id, {"title": title})
     flash("Task excluída!", "danger")
     return redirect(url_for('main.view_project', project_id=project_id))
 
 
+@main.route('/project/<int:project_id>/<kind>/<int:item_id>/move', methods=['POST'])
+@login_required
+def move_item(project_id, kind, item_id):
+    project = Project.query.get_or_404(project_id)
+    if not is_project_owner(project):
+        return access_denied()
+    if kind not in ranking.SOURCES:
+        abort(404)
+
+    try:
+        rank = ranking.move(
+            kind, project_id, item_id,
+            after_id=request.form.get('after_id', type=int),
+            before_id=request.form.get('before_id', type=int)
+        )
+    except ranking.RankError as error:
+        db.session.rollback()
+        flash(str(error), 'warning')
+        return redirect(url_for('main.view_project', project_id=project_id))
+
+    bump(project_id)
+    db.session.commit()
+    item_type = activity.ITEM_TYPES[kind]
+    activity.record(f"{item_type}.moved", project_id, item_type, item_id, {"rank": rank})
+    return redirect(request.referrer or url_for('main.view_project', project_id=project_id))
+
+
 @main.route('/sprint/<int:sprint_id>/add_us', methods=['POST'])
 @login_required
 def add_us_to_sprint(sprint_id):
     sprint = Sprint.query.get_or_404(sprint_id)
     project = sprint.project
 
-    if project.owner_id != current_user.id:
-        flash("Acesso negado.", "danger")
-        return redirect(url_for('main.dashboard'))
+    if not is_project_owner(project):
+        return access_denied()
 
-    us_id = request.form.get('userstory_id')
-
-    if not us_id:
+    try:
+        story_ids = parse_ids(request.form.getlist('userstory_id'))
+    except BulkError:
         flash("Nenhuma user story selecionada.", "warning")
         return redirect(url_for('main.sprint_details', sprint_id=sprint_id))
 
-    us = UserStory.query.get_or_404(us_id)
-    us.sprint_id = sprint_id
-
-    db.session.commit()
+    results = plan_stories(project.id, story_ids, sprint_id)
+    planned = [i for i, r in results.items() if r == "updated"]
+    if planned:
+        activity.record("story.planned", project.id, detail={"ids": planned, "sprint_id": sprint_id})
     flash("User Story adicionada à Sprint!", "success")
     return redirect(url_for('main.sprint_details', sprint_id=sprint_id))
 
@@ -399,14 +634,23 @@ def remove_us_from_sprint(sprint_id, us_id):
     sprint = Sprint.query.get_or_404(sprint_id)
     project = sprint.project
 
-    if project.owner_id != current_user.id:
-        flash("Acesso negado.", "danger")
-        return redirect(url_for('main.dashboard'))
+    if not is_project_owner(project):
+        return access_denied()
 
     us = UserStory.query.get_or_404(us_id)
-    us.sprint_id = None
+    if us.sprint_id != sprint_id:
+        abort(404)
 
-    db.session.commit()
+    old_sprint = us.sprint_id
+    us.sprint_id = None
+    try:
+        with guarded(us, request.form.get('version', type=int)):
+            track([story_change(us, old_sprint, us.status)])
+            db.session.commit()
+    except ConflictError:
+        flash("A User Story foi alterada por outra pessoa; confira o estado atual.", "warning")
+        return redirect(url_for('main.sprint_details', sprint_id=sprint_id))
+    activity.record("story.unplanned", project.id, "story", us_id, {"sprint_id": old_sprint})
     flash("User Story removida da Sprint.", "warning")
     return redirect(url_for('main.sprint_details', sprint_id=sprint_id))
 
@@ -415,59 +659,193 @@ def remove_us_from_sprint(sprint_id, us_id):
 def kanban_board(project_id):
     project = Project.query.get_or_404(project_id)
 
-    tasks_todo = Task.query.filter_by(project_id=project_id, status="To Do").all()
-    tasks_doing = Task.query.filter_by(project_id=project_id, status="Doing").all()
-    tasks_done = Task.query.filter_by(project_id=project_id, status="Done").all()
+    if not user_has_access(project):
+        return access_denied()
+
+    etag, modified = page_validators(project)
+    if is_fresh(etag, modified):
+        return not_modified(etag, modified)
+
+    sprint_id = request.args.get('sprint_id', type=int)
+    sprints = Sprint.query.filter_by(project_id=project_id).order_by(Sprint.id).all()
+    if sprint_id and sprint_id not in [s.id for s in sprints]:
+        sprint_id = None
+
+    page_size = kanban_page_size()
+    version = changefeed.latest_version(project_id)
+
+    # A query agrupada serve as três colunas; só roda se alguma não estiver
+    # em cache, e no máximo uma vez por request.
+    loaded = {}
+    def render_column(status):
+        if 'columns' not in loaded:
+            loaded['columns'] = load_kanban_columns(project_id, page_size, sprint_id)
+        return render_template(
+            '_kanban_column.html',
+            project=project,
+            sprint_id=sprint_id,
+            column=loaded['columns'][status],
+            page_size=page_size
+        )
+
+    columns = [
+        render_fragment(
+            project, 'kanban', lambda status=status: render_column(status), status, sprint_id, page_size
+        )
+        for status in KANBAN_STATUSES
+    ]
 
-    return render_template(
+    return cacheable(render_template(
         'kanban.html',
         project=project,
-        tasks_todo=tasks_todo,
-        tasks_doing=tasks_doing,
-        tasks_done=tasks_done
+        sprints=sprints,
+        sprint_id=sprint_id,
+        columns=columns,
+        page_size=page_size,
+        version=version
+    ), etag, modified)
+
+@main.route('/project/<int:project_id>/board/stream')
+@login_required
+def kanban_stream(project_id):
+    project = Project.query.get_or_404(project_id)
+
+    if not user_has_access(project):
+        abort(403)
+
+    version = request.headers.get('Last-Event-ID', type=int)
+    if version is None:
+        version = request.args.get('since', type=int)
+    if version is None:
+        version = changefeed.latest_version(project_id)
+    db.session.close()
+
+    return Response(
+        stream_with_context(changefeed.stream(project_id, version)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
     )
 
+@main.route('/project/<int:project_id>/board/changes')
+@login_required
+def kanban_changes(project_id):
+    project = Project.query.get_or_404(project_id)
+
+    if not user_has_access(project):
+        abort(403)
+
+    since = request.args.get('since', 0, type=int)
+    if changefeed.is_expired(since):
+        return jsonify({"error": "versão antiga demais, recarregue o board"}), 410
+
+    changes = changefeed.changes_since(project_id, since)
+    version = changes[-1]["version"] if changes else since
+    return jsonify({"version": version, "changes": changes})
+
+@main.route('/project/<int:project_id>/board/column')
+@login_required
+def kanban_column(project_id):
+    project = Project.query.get_or_404(project_id)
+
+    if not user_has_access(project):
+        abort(403)
+
+    status = request.args.get('status', '')
+    if status not in KANBAN_STATUSES:
+        abort(400)
+
+    sprint_id = request.args.get('sprint_id', type=int)
+    before_id = request.args.get('before', type=int)
+    page_size = kanban_page_size()
+    column = load_kanban_column(project_id, status, page_size, before_id, sprint_id)
+
+    return render_template(
+        '_kanban_cards.html',
+        project=project,
+        sprint_id=sprint_id,
+        column=column,
+        page_size=page_size
+    )
+
+def kanban_page_size():
+    default = current_app.config['KANBAN_PAGE_SIZE']
+    page_size = request.args.get('limit', default, type=int)
+    return max(1, min(page_size, 200))
+
+def edit_conflict(conflict, template, project_id, **context):
+    # Formulário de volta com o estado atual do item (já recarregado) e a
+    # versão nova, para a pessoa conferir e salvar de novo.
+    if conflict.current is None:
+        flash("O item foi excluído por outra pessoa.", "warning")
+        return redirect(url_for('main.view_project', project_id=project_id))
+    flash("Outra pessoa alterou este item enquanto você editava. "
+          "Confira os valores atuais e salve de novo.", "warning")
+    return render_template(template, **context), 409
+
 @main.route('/task/<int:task_id>/status/<string:new_status>', methods=['POST'])
 @login_required
 def update_task_status(task_id, new_status):
     task = Task.query.get_or_404(task_id)
+    if not user_has_access(task.project):
+        return access_denied()
 
-    if new_status not in ["To Do", "Doing", "Done"]:
+    back = request.referrer or url_for('main.kanban_board', project_id=task.project_id)
+
+    if new_status not in KANBAN_STATUSES:
         flash("Status inválido!", "danger")
-        return redirect(request.referrer)
+        return redirect(back)
 
+    old_status = task.status
     task.status = new_status
-    db.session.commit()
+    try:
+        with guarded(task, request.form.get('version', type=int)):
+            track([task_change(task, task.sprint_id, old_status)])
+            db.session.commit()
+    except ConflictError:
+        # O quadro recarregado já mostra o estado atual do card.
+        flash("A task foi alterada por outra pessoa; confira o quadro e tente de novo.", "warning")
+        return redirect(back)
+    activity.record("task.status", task.project_id, "task", task_id, {"status": [old_status, new_status]})
     flash("Status atualizado!", "success")
 
-    return redirect(request.referrer)
+    return redirect(back)
 
 @main.route('/project/<int:project_id>/members')
 @login_required
 def project_members(project_id):
+    project = load_project_with_members(project_id)
+
+    if not is_project_owner(project):
+        return access_denied()
+
+    return render_template('project_members.html', project=project)
+
+@main.route('/project/<int:project_id>/users/search')
+@login_required
+def search_project_users(project_id):
     project = Project.query.get_or_404(project_id)
 
-    if project.owner_id != current_user.id:
-        flash("Acesso negado.", "danger")
-        return redirect(url_for('main.dashboard'))
+    scope = request.args.get('scope', 'members')
+    if scope == 'candidates':
+        allowed = is_project_owner(project)
+    else:
+        allowed = user_has_access(project)
+    if not allowed:
+        abort(403)
 
-    existing_user_ids = [m.user_id for m in project.memberships]
-    available_users = User.query.filter(User.id.not_in(existing_user_ids)).all()
+    prefix = request.args.get('q', '').strip()
+    limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+    users = search_users(project_id, prefix, limit, members=(scope != 'candidates'))
 
-    return render_template(
-        'project_members.html',
-        project=project,
-        available_users=available_users
-    )
+    return jsonify([{"id": u.id, "username": u.username} for u in users])
 
 @main.route('/project/<int:project_id>/members/add', methods=['POST'])
 @login_required
 def add_project_member(project_id):
     project = Project.query.get_or_404(project_id)
 
-    if project.owner_id != current_user.id:
-        flash("Acesso negado.", "danger")
-        return redirect(url_for('main.dashboard'))
+    if not is_project_owner(project):
+        return access_denied()
 
     user_id = request.form.get('user_id')
     role = request.form.get('role')
@@ -476,6 +854,14 @@ def add_project_member(project_id):
         flash("Selecione usuário e papel.", "warning")
         return redirect(url_for('main.project_members', project_id=project_id))
 
+    if not db.session.get(User, int(user_id)):
+        flash("Usuário não encontrado.", "warning")
+        return redirect(url_for('main.project_members', project_id=project_id))
+
+    if has_membership(project_id, user_id):
+        flash("Usuário já é membro do projeto.", "warning")
+        return redirect(url_for('main.project_members', project_id=project_id))
+
     membership = ProjectMembership(
         project_id=project_id,
         user_id=user_id,
@@ -483,7 +869,10 @@ def add_project_member(project_id):
     )
 
     db.session.add(membership)
+    bump(project_id)
     db.session.commit()
+    invalidate(project_id, int(user_id))
+    activity.record("member.added", project_id, "user", int(user_id), {"role": role})
 
     flash("Membro adicionado!", "success")
     return redirect(url_for('main.project_members', project_id=project_id))
@@ -493,29 +882,22 @@ def add_project_member(project_id):
 def delete_project_member(project_id, member_id):
     project = Project.query.get_or_404(project_id)
 
-    if project.owner_id != current_user.id:
-        flash("Acesso negado.", "danger")
-        return redirect(url_for('main.dashboard'))
+    if not is_project_owner(project):
+        return access_denied()
 
     membership = ProjectMembership.query.get_or_404(member_id)
+    if membership.project_id != project_id:
+        abort(404)
 
     if membership.user_id == project.owner_id:
         flash("Não é possível remover o Product Owner do projeto.", "danger")
         return redirect(url_for('main.project_members', project_id=project_id))
 
     db.session.delete(membership)
+    bump(project_id)
     db.session.commit()
+    invalidate(project_id, membership.user_id)
+    activity.record("member.removed", project_id, "user", membership.user_id, {"role": membership.role})
 
     flash("Membro removido!", "warning")
     return redirect(url_for('main.project_members', project_id=project_id))
-
-def user_has_access(project):
-    return (
-        project.owner_id == current_user.id or
-        any(m.user_id == current_user.id for m in project.memberships)
-    )
-
-
-
-
-
@@ -0,0 +1,152 @@
+import re
+import click
+from markupsafe import Markup, escape
+from sqlalchemy import or_, text
+from . import db
+from .models import Task, UserStory
+
+# Busca textual em tasks e user stories com SQLite FTS5.
+#
+# O índice é a tabela virtual search_index, mantida por triggers em task e
+# user_stories (então vale também para UPDATEs em lote e SQL direto). O rowid
+# codifica o item: id * 2 para tasks e id * 2 + 1 para user stories, o que
+# permite atualizar e remover entradas pelo rowid sem varrer o índice.
+#
+# project_id também é uma coluna indexada do FTS: o filtro por projeto entra
+# no próprio MATCH (project_id : "7" AND ...), então o FTS5 cruza as listas de
+# documentos e só ranqueia as linhas do projeto, em vez de casar os termos em
+# todos os projetos e filtrar depois. Os termos do usuário ficam restritos a
+# título e descrição, e a coluna do projeto tem peso 0 no bm25.
+
+SNIPPET_OPEN = '\x02'
+SNIPPET_CLOSE = '\x03'
+
+_SOURCES = (
+    ("task", "task", 0),
+    ("story", "user_stories", 1),
+)
+
+
+def install(conn):
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+        "title, description, project_id, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    ))
+    for _, table, tag in _SOURCES:
+        rowid_new = f"NEW.id * 2 + {tag}"
+        rowid_old = f"OLD.id * 2 + {tag}"
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_insert AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO search_index (rowid, title, description, project_id) "
+            f"VALUES ({rowid_new}, NEW.title, COALESCE(NEW.description, ''), NEW.project_id); "
+            f"END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_update "
+            f"AFTER UPDATE OF title, description, project_id ON {table} BEGIN "
+            f"DELETE FROM search_index WHERE rowid = {rowid_old}; "
+            f"INSERT INTO search_index (rowid, title, description, project_id) "
+            f"VALUES ({rowid_new}, NEW.title, COALESCE(NEW.description, ''), NEW.project_id); "
+            f"END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON {table} BEGIN "
+            f"DELETE FROM search_index WHERE rowid = {rowid_old}; "
+            f"END"
+        ))
+
+
+def reindex(conn):
+    conn.execute(text("DELETE FROM search_index"))
+    for _, table, tag in _SOURCES:
+        conn.execute(text(
+            f"INSERT INTO search_index (rowid, title, description, project_id) "
+            f"SELECT id * 2 + {tag}, title, COALESCE(description, ''), project_id FROM {table}"
+        ))
+    conn.execute(text("INSERT INTO search_index (search_index) VALUES ('optimize')"))
+
+
+def build_match(query):
+    # Cada palavra vira um termo entre aspas com prefixo ("abc"*), então a
+    # entrada do usuário nunca é interpretada como sintaxe do FTS5.
+    words = re.findall(r"\w+", query, flags=re.UNICODE)
+    return " ".join(f'"{word}"*' for word in words[:16])
+
+
+def project_match(project_id, match):
+    return f'project_id : "{int(project_id)}" AND {{title description}} : ({match})'
+
+
+def search(project_id, query, page=1, page_size=20):
+    match = build_match(query)
+    if not match:
+        return [], False
+
+    if db.engine.dialect.name != 'sqlite':
+        return _search_like(project_id, query, page, page_size)
+
+    rows = db.session.execute(
+        text(
+            "SELECT rowid, title, "
+            "snippet(search_index, -1, :open, :close, '…', 16) AS snippet, "
+            "bm25(search_index, 1.0, 1.0, 0.0) AS rank FROM search_index "
+            "WHERE search_index MATCH :match "
+            "ORDER BY rank LIMIT :limit OFFSET :offset"
+        ),
+        {
+            "open": SNIPPET_OPEN,
+            "close": SNIPPET_CLOSE,
+            "match": project_match(project_id, match),
+            "limit": page_size + 1,
+            "offset": (page - 1) * page_size,
+        }
+    ).all()
+
+    results = [
+        {
+            "type": "task" if row.rowid % 2 == 0 else "story",
+            "id": row.rowid // 2,
+            "title": row.title,
+            "snippet": highlight(row.snippet),
+            "score": -row.rank,
+        }
+        for row in rows[:page_size]
+    ]
+    return results, len(rows) > page_size
+
+
+def _search_like(project_id, query, page, page_size):
+    pattern = f"%{query.strip()}%"
+    results = []
+    for kind, model in (("task", Task), ("story", UserStory)):
+        rows = (
+            db.session.query(model.id, model.title, model.description)
+            .filter(model.project_id == project_id)
+            .filter(or_(model.title.ilike(pattern), model.description.ilike(pattern)))
+            .order_by(model.id)
+            .limit(page * page_size + 1)
+            .all()
+        )
+        results += [
+            {"type": kind, "id": r.id, "title": r.title,
+             "snippet": escape((r.description or "")[:120]), "score": 0}
+            for r in rows
+        ]
+    start = (page - 1) * page_size
+    return results[start:start + page_size], len(results) > start + page_size
+
+
+def highlight(snippet):
+    escaped = str(escape(snippet or ""))
+    return Markup(escaped.replace(SNIPPET_OPEN, "<mark>").replace(SNIPPET_CLOSE, "</mark>"))
+
+
+def init_app(app, db):
+    @app.cli.command('search-reindex')
+    def search_reindex():
+        """Reconstrói o índice de busca a partir das tabelas task e user_stories."""
+        with db.engine.begin() as conn:
+            install(conn)
+            reindex(conn)
+        click.echo("Índice de busca reconstruído.")
@@ -0,0 +1,152 @@
+import random
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from werkzeug.security import generate_password_hash
+from . import db
+from .models import User, Project, ProjectMembership, Sprint, UserStory, Task, KANBAN_STATUSES, STORY_STATUSES
+from .ranking import keys_between
+
+# Gerador de bancos sintéticos para benchmark e testes de carga. Tudo é
+# determinístico a partir da semente e inserido em lote (executemany), então
+# bancos grandes saem em segundos. O primeiro projeto é o "foco": recebe a
+# maior parte das tasks e é o alvo das rotas no benchmark.
+
+Scale = namedtuple("Scale", ["users", "projects", "members", "sprints", "stories", "tasks"])
+
+SCALES = {
+    "tiny": Scale(users=20, projects=5, members=5, sprints=3, stories=50, tasks=200),
+    "small": Scale(users=200, projects=20, members=10, sprints=6, stories=500, tasks=2000),
+    "medium": Scale(users=2000, projects=100, members=20, sprints=10, stories=3000, tasks=20000),
+    "large": Scale(users=20000, projects=500, members=40, sprints=20, stories=20000, tasks=100000),
+}
+
+SeedResult = namedtuple("SeedResult", [
+    "password", "owner", "member", "project_id", "sprint_id", "story_id", "task_id", "counts"
+])
+
+WORDS = (
+    "login sessão relatório kanban sprint backlog cliente pagamento email busca "
+    "cadastro permissão exportar importar painel gráfico notificação perfil api cache"
+).split()
+
+BATCH = 5000
+
+
+def seed(scale, seed_value=42, password="bench"):
+    rng = random.Random(seed_value)
+    password_hash = generate_password_hash(password)
+    today = date.today()
+
+    users = [
+        {"id": i, "username": f"user{i:06d}", "password": password_hash, "role": "Developer"}
+        for i in range(1, scale.users + 1)
+    ]
+    _insert(User, users)
+
+    projects, memberships = [], []
+    for pid in range(1, scale.projects + 1):
+        owner = rng.randint(1, scale.users) if pid > 1 else 1
+        projects.append({
+            "id": pid, "name": f"Projeto {pid:04d}", "description": _sentence(rng),
+            "owner_id": owner, "version": 1, "updated_at": datetime.utcnow(),
+        })
+        members = {owner} | set(rng.sample(range(1, scale.users + 1), min(scale.members, scale.users)))
+        if pid == 1:
+            members.add(2)
+        for user_id in members:
+            memberships.append({
+                "user_id": user_id, "project_id": pid,
+                "role": "Product Owner" if user_id == owner else "Developer",
+            })
+    _insert(Project, projects)
+    _insert(ProjectMembership, memberships)
+
+    sprints = []
+    sprint_ids = {}
+    for pid in range(1, scale.projects + 1):
+        count = scale.sprints if pid == 1 else max(1, scale.sprints // 3)
+        start = today - timedelta(days=14 * count)
+        for n in range(count):
+            sprint_id = len(sprints) + 1
+            sprints.append({
+                "id": sprint_id, "name": f"Sprint {n + 1}", "goal": _sentence(rng),
+                "start_date": start + timedelta(days=14 * n),
+                "end_date": start + timedelta(days=14 * n + 13),
+                "project_id": pid,
+            })
+            sprint_ids.setdefault(pid, []).append(sprint_id)
+    _insert(Sprint, sprints)
+
+    stories = [
+        {
+            "id": i, "title": _title(rng), "description": _sentence(rng),
+            "status": rng.choice(STORY_STATUSES), "project_id": pid,
+            "sprint_id": rng.choice(sprint_ids[pid] + [None]),
+        }
+        for i, pid in enumerate(_distribute(rng, scale.stories, scale.projects), start=1)
+    ]
+    _rank(stories)
+    _insert(UserStory, stories)
+
+    member_ids = {}
+    for m in memberships:
+        member_ids.setdefault(m["project_id"], []).append(m["user_id"])
+    created = datetime.utcnow() - timedelta(days=365)
+    tasks = [
+        {
+            "id": i, "title": _title(rng), "description": _sentence(rng),
+            "status": rng.choice(KANBAN_STATUSES),
+            "created_at": created + timedelta(minutes=i),
+            "project_id": pid,
+            "sprint_id": rng.choice(sprint_ids[pid] + [None]),
+            "assigned_to": rng.choice(member_ids[pid] + [None]),
+        }
+        for i, pid in enumerate(_distribute(rng, scale.tasks, scale.projects), start=1)
+    ]
+    _rank(tasks)
+    _insert(Task, tasks)
+    db.session.commit()
+
+    focus_story = next(s["id"] for s in stories if s["project_id"] == 1)
+    focus_task = next(t["id"] for t in tasks if t["project_id"] == 1)
+    return SeedResult(
+        password=password,
+        owner="user000001",
+        member="user000002",
+        project_id=1,
+        sprint_id=sprint_ids[1][-1],
+        story_id=focus_story,
+        task_id=focus_task,
+        counts={
+            "users": len(users), "projects": len(projects), "memberships": len(memberships),
+            "sprints": len(sprints), "stories": len(stories), "tasks": len(tasks),
+        },
+    )
+
+
+def _distribute(rng, total, projects):
+    # Metade dos itens vai para o projeto foco; o resto se espalha.
+    focus = total // 2
+    return [1] * focus + [rng.randint(1, projects) for _ in range(total - focus)]
+
+
+def _rank(rows):
+    counts = {}
+    for row in rows:
+        counts[row["project_id"]] = counts.get(row["project_id"], 0) + 1
+    keys = {pid: iter(keys_between(None, None, n)) for pid, n in counts.items()}
+    for row in rows:
+        row["rank"] = next(keys[row["project_id"]])
+
+
+def _insert(model, rows):
+    for start in range(0, len(rows), BATCH):
+        db.session.execute(db.insert(model), rows[start:start + BATCH])
+
+
+def _title(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(3)).capitalize()
+
+
+def _sentence(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(12)).capitalize() + "."
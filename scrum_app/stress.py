@@ -0,0 +1,169 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+import click
+from werkzeug.security import generate_password_hash
+
+# Teste de estresse de concorrência: várias threads movendo cards do Kanban
+# ao mesmo tempo via update_task_status, contra um banco SQLite temporário
+# com a mesma configuração de engine do app.
+#
+# As duas respostas esperadas são redirects: "ok" quando o status foi gravado
+# e "conflict" quando o controle de concorrência otimista recusou a alteração
+# (distinguidos pela categoria da mensagem flash). No fim, cada task precisa
+# ter version - 1 transições registradas, encadeadas até o status atual:
+# uma atualização perdida quebra essa conta.
+
+STATUSES = ["To Do", "Doing", "Done"]
+OUTCOMES = {'success': 'ok', 'warning': 'conflict'}
+
+
+def run_status_stress(threads=16, iterations=50, tasks=20, config_name='production'):
+    workdir = tempfile.mkdtemp(prefix='scrum-stress-')
+    try:
+        return _run(workdir, threads, iterations, tasks, config_name)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _run(workdir, threads, iterations, tasks, config_name):
+    from . import create_app, db, migrations
+    from .models import User, Project, ProjectMembership, Task
+
+    uri = 'sqlite:///' + os.path.join(workdir, 'stress.db')
+    app = create_app(config_name, {
+        'SQLALCHEMY_DATABASE_URI': uri, 'JOBS_MODE': 'manual', 'ASSETS_REQUIRE_BUILD': False
+    })
+
+    with app.app_context():
+        migrations.install(db)
+        owner = User(username='stress-owner', password=generate_password_hash('stress'))
+        db.session.add(owner)
+        db.session.flush()
+        project = Project(name='Stress', owner_id=owner.id)
+        db.session.add(project)
+        db.session.flush()
+        db.session.add(ProjectMembership(user_id=owner.id, project_id=project.id, role='Product Owner'))
+        for i in range(threads):
+            user = User(username=f'stress-{i}', password=generate_password_hash('stress'))
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(ProjectMembership(user_id=user.id, project_id=project.id))
+        task_ids = []
+        for i in range(tasks):
+            task = Task(title=f'Task {i}', project_id=project.id)
+            db.session.add(task)
+            db.session.flush()
+            task_ids.append(task.id)
+        db.session.commit()
+        referer = f'/project/{project.id}/board'
+
+    results = Counter()
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(index):
+        client = app.test_client()
+        client.post('/login', data={'username': f'stress-{index}', 'password': 'stress'})
+        for n in range(iterations):
+            task_id = task_ids[(index + n) % len(task_ids)]
+            status = STATUSES[(index + n) % len(STATUSES)]
+            started = time.perf_counter()
+            try:
+                response = client.post(
+                    f'/task/{task_id}/status/{status}',
+                    headers={'Referer': referer}
+                )
+                outcome = _outcome(client, response)
+            except Exception as error:
+                outcome = type(error).__name__ + (": locked" if "locked" in str(error) else "")
+            elapsed = time.perf_counter() - started
+            with lock:
+                results[outcome] += 1
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    total = time.perf_counter() - started
+
+    app.extensions['activity'].close()
+    with app.app_context():
+        inconsistent = check_tasks(task_ids)
+        db.session.remove()
+        db.engine.dispose()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "seconds": total,
+        "results": dict(results),
+        "inconsistent": inconsistent,
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0,
+    }
+
+
+def _outcome(client, response):
+    if response.status_code != 302:
+        return response.status_code
+    # A rota redireciona nos dois casos; o flash diz se gravou ou não.
+    with client.session_transaction() as session:
+        flashes = session.pop('_flashes', [])
+    categories = {category for category, _ in flashes}
+    for category, outcome in OUTCOMES.items():
+        if category in categories:
+            return outcome
+    return 302
+
+
+def check_tasks(task_ids):
+    # Ids das tasks cujo histórico de transições não bate com a linha.
+    from . import db
+    from .models import StatusTransition, Task
+
+    inconsistent = []
+    for task in db.session.query(Task).filter(Task.id.in_(task_ids)).order_by(Task.id):
+        transitions = (
+            db.session.query(StatusTransition.from_status, StatusTransition.to_status)
+            .filter_by(item_type='task', item_id=task.id)
+            .order_by(StatusTransition.id)
+            .all()
+        )
+        status = 'To Do'
+        for from_status, to_status in transitions:
+            if from_status != status:
+                break
+            status = to_status
+        else:
+            if status == task.status and len(transitions) == task.version - 1:
+                continue
+        inconsistent.append(task.id)
+    return inconsistent
+
+
+def init_app(app):
+    @app.cli.command('stress-kanban')
+    @click.option('--threads', default=16, show_default=True)
+    @click.option('--iterations', default=50, show_default=True)
+    @click.option('--tasks', default=20, show_default=True)
+    def stress_kanban(threads, iterations, tasks):
+        """Move cards do Kanban em paralelo e reporta erros de lock."""
+        report = run_status_stress(threads, iterations, tasks)
+        click.echo(f"{report['requests']} requests em {report['seconds']:.2f}s "
+                   f"(p50 {report['p50_ms']:.1f} ms, p99 {report['p99_ms']:.1f} ms)")
+        for outcome, count in sorted(report['results'].items(), key=str):
+            click.echo(f"  {outcome}: {count}")
+        failures = sum(c for o, c in report['results'].items() if o not in OUTCOMES.values())
+        if failures:
+            raise click.ClickException(f"{failures} requests falharam")
+        if report['inconsistent']:
+            raise click.ClickException(
+                f"estado inconsistente nas tasks {', '.join(map(str, report['inconsistent']))}"
+            )
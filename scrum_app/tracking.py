@@ -0,0 +1,31 @@
+from collections import namedtuple
+from . import analytics, changefeed, versioning
+
+# Ponto único por onde as rotas registram mudanças em tasks e user stories,
+# antes do commit. Cada subsistema derivado (analytics, feed do Kanban)
+# recebe a mesma lista de mudanças, e a versão dos projetos afetados sobe.
+
+Change = namedtuple(
+    "Change",
+    ["kind", "item_id", "project_id", "old_sprint", "new_sprint", "old_status", "new_status"]
+)
+
+
+def task_change(task, old_sprint, old_status):
+    return Change("task", task.id, task.project_id, old_sprint, task.sprint_id, old_status, task.status)
+
+
+def story_change(story, old_sprint, old_status):
+    return Change("story", story.id, story.project_id, old_sprint, story.sprint_id, old_status, story.status)
+
+
+def deleted(kind, item):
+    return Change(kind, item.id, item.project_id, item.sprint_id, None, item.status, None)
+
+
+def track(changes):
+    if not changes:
+        return
+    analytics.record_changes(changes)
+    changefeed.record_changes(changes)
+    versioning.bump(*{c.project_id for c in changes})
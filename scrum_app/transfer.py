@@ -0,0 +1,328 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from sqlalchemy import select
+from . import db
+from .models import Sprint, Task, UserStory, ProjectMembership, KANBAN_STATUSES, STORY_STATUSES
+from .tracking import Change, track
+from .versioning import bump
+from .ranking import append_keys
+
+# Exportação e importação de tasks, user stories e sprints de um projeto em
+# CSV ou NDJSON.
+#
+# A exportação é um gerador: a query roda com yield_per (cursor no servidor)
+# e cada lote de linhas vira um pedaço da resposta, então a memória não
+# depende do tamanho do projeto. A importação lê o arquivo registro a
+# registro, valida cada um e insere em lotes com executemany; o commit
+# acontece a cada TRANSACTION_ROWS linhas para não segurar o lock de escrita
+# do SQLite durante o arquivo inteiro. Com dry_run nada é gravado e o
+# relatório traz só a validação.
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+KINDS = {
+    "tasks": Task,
+    "stories": UserStory,
+    "sprints": Sprint,
+}
+
+COLUMNS = {
+    "tasks": ("id", "title", "description", "status", "sprint_id", "assigned_to", "created_at"),
+    "stories": ("id", "title", "description", "status", "sprint_id"),
+    "sprints": ("id", "name", "goal", "start_date", "end_date"),
+}
+
+EXPORT_BATCH = 1000
+IMPORT_BATCH = 1000
+TRANSACTION_ROWS = 10000
+MAX_ERRORS = 100
+
+
+class TransferError(ValueError):
+    pass
+
+
+def check(kind, fmt):
+    if kind not in KINDS:
+        raise TransferError(f"tipo desconhecido: {kind}")
+    if fmt not in FORMATS:
+        raise TransferError(f"formato desconhecido: {fmt}")
+
+
+def export(project_id, kind, fmt):
+    model = KINDS[kind]
+    names = COLUMNS[kind]
+    result = db.session.execute(
+        select(*[getattr(model, name) for name in names])
+        .where(model.project_id == project_id)
+        .order_by(model.id)
+        .execution_options(yield_per=EXPORT_BATCH)
+    )
+    if fmt == "csv":
+        return _export_csv(names, result)
+    return _export_ndjson(names, result)
+
+
+def _export_csv(names, result):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for rows in result.partitions():
+        writer.writerows([_csv_value(value) for value in row] for row in rows)
+        yield _drain(buffer)
+    if buffer.tell():
+        yield _drain(buffer)
+
+
+def _export_ndjson(names, result):
+    for rows in result.partitions():
+        yield "".join(
+            json.dumps(
+                {name: _json_value(value) for name, value in zip(names, row)},
+                ensure_ascii=False,
+                separators=(",", ":")
+            ) + "\n"
+            for row in rows
+        )
+
+
+def _drain(buffer):
+    chunk = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return chunk
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    return _json_value(value)
+
+
+def _json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def import_file(project_id, kind, fmt, stream, dry_run=False):
+    context = _Context(project_id, kind)
+    validate = _VALIDATORS[kind]
+    report = {"dry_run": dry_run, "processed": 0, "inserted": 0, "invalid": 0, "errors": []}
+    batch = []
+    pending = 0
+
+    try:
+        for line, record in _records(stream, fmt):
+            report["processed"] += 1
+            try:
+                row = validate(record, context)
+            except TransferError as error:
+                report["invalid"] += 1
+                if len(report["errors"]) < MAX_ERRORS:
+                    report["errors"].append({"line": line, "error": str(error)})
+                continue
+
+            if dry_run:
+                continue
+            batch.append(row)
+            if len(batch) >= IMPORT_BATCH:
+                _insert(kind, project_id, batch)
+                report["inserted"] += len(batch)
+                pending += len(batch)
+                batch = []
+                if pending >= TRANSACTION_ROWS:
+                    db.session.commit()
+                    pending = 0
+    except (UnicodeDecodeError, csv.Error) as error:
+        db.session.rollback()
+        report["inserted"] -= pending
+        raise TransferError(
+            f"arquivo ilegível após {report['processed']} registros "
+            f"({report['inserted']} já importados): {error}"
+        )
+
+    if batch:
+        _insert(kind, project_id, batch)
+        report["inserted"] += len(batch)
+    db.session.commit()
+    return report
+
+
+def _records(stream, fmt):
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        if reader.fieldnames is None:
+            return
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line, raw in enumerate(text, start=1):
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            record = json.loads(raw)
+        except ValueError:
+            record = None
+        yield line, record
+
+
+def _insert(kind, project_id, rows):
+    if kind == "sprints":
+        db.session.execute(db.insert(Sprint), rows)
+        bump(project_id)
+        return
+
+    model = KINDS[kind]
+    item = "task" if kind == "tasks" else "story"
+    # Insert do Core não passa pelo before_flush: os ranks (fim do backlog,
+    # na ordem do arquivo) são gerados aqui.
+    for row, rank in zip(rows, append_keys(model, project_id, len(rows))):
+        row["rank"] = rank
+    # Insert do Core em multi-VALUES. O RETURNING traz sprint e status junto
+    # com o id, então as mudanças não dependem da ordem das linhas devolvidas
+    # (o SQLite não garante essa ordem em inserts com várias linhas).
+    table = model.__table__
+    inserted = db.session.execute(
+        table.insert().returning(table.c.id, table.c.sprint_id, table.c.status),
+        rows
+    )
+    track([
+        Change(item, row.id, project_id, None, row.sprint_id, None, row.status)
+        for row in inserted
+    ])
+
+
+class _Context:
+    # Sprints e membros do projeto são carregados uma vez por importação, para
+    # validar as referências de cada linha sem consultar o banco.
+    def __init__(self, project_id, kind):
+        self.project_id = project_id
+        self.now = datetime.utcnow()
+        self.sprint_ids = set()
+        self.member_ids = set()
+        if kind != "sprints":
+            self.sprint_ids = set(db.session.scalars(
+                select(Sprint.id).where(Sprint.project_id == project_id)
+            ))
+        if kind == "tasks":
+            self.member_ids = set(db.session.scalars(
+                select(ProjectMembership.user_id).where(ProjectMembership.project_id == project_id)
+            ))
+
+
+def _task_row(record, context):
+    _require_object(record)
+    status = _text(record, "status") or "To Do"
+    if status not in KANBAN_STATUSES:
+        raise TransferError(f"status inválido: {status}")
+    assigned_to = _int(record, "assigned_to")
+    if assigned_to is not None and assigned_to not in context.member_ids:
+        raise TransferError("responsável precisa ser membro do projeto")
+    return {
+        "title": _text(record, "title", 150, required=True),
+        "description": _text(record, "description"),
+        "status": status,
+        "created_at": _datetime(record, "created_at") or context.now,
+        "project_id": context.project_id,
+        "sprint_id": _sprint(record, context),
+        "assigned_to": assigned_to,
+    }
+
+
+def _story_row(record, context):
+    _require_object(record)
+    status = _text(record, "status") or "To Do"
+    if status not in STORY_STATUSES:
+        raise TransferError(f"status inválido: {status}")
+    return {
+        "title": _text(record, "title", 120, required=True),
+        "description": _text(record, "description") or "",
+        "status": status,
+        "project_id": context.project_id,
+        "sprint_id": _sprint(record, context),
+    }
+
+
+def _sprint_row(record, context):
+    _require_object(record)
+    start_date = _date(record, "start_date")
+    end_date = _date(record, "end_date")
+    if start_date and end_date and end_date < start_date:
+        raise TransferError("end_date anterior a start_date")
+    return {
+        "name": _text(record, "name", 150, required=True),
+        "goal": _text(record, "goal"),
+        "start_date": start_date,
+        "end_date": end_date,
+        "project_id": context.project_id,
+    }
+
+
+_VALIDATORS = {
+    "tasks": _task_row,
+    "stories": _story_row,
+    "sprints": _sprint_row,
+}
+
+
+def _require_object(record):
+    if not isinstance(record, dict):
+        raise TransferError("registro inválido")
+
+
+def _sprint(record, context):
+    sprint_id = _int(record, "sprint_id")
+    if sprint_id is not None and sprint_id not in context.sprint_ids:
+        raise TransferError("sprint não pertence ao projeto")
+    return sprint_id
+
+
+def _text(record, name, max_length=None, required=False):
+    value = record.get(name)
+    value = "" if value is None else str(value).strip()
+    if required and not value:
+        raise TransferError(f"{name} é obrigatório")
+    if max_length and len(value) > max_length:
+        raise TransferError(f"{name} excede {max_length} caracteres")
+    return value or None
+
+
+def _int(record, name):
+    value = record.get(name)
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        raise TransferError(f"valor inválido para {name}")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise TransferError(f"valor inválido para {name}")
+
+
+def _date(record, name):
+    value = _text(record, name)
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise TransferError(f"data inválida em {name}: {value}")
+
+
+def _datetime(record, name):
+    value = _text(record, name)
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise TransferError(f"data inválida em {name}: {value}")
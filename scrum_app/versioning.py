@@ -0,0 +1,76 @@
+import hashlib
+import os
+from datetime import datetime
+from flask import request, make_response
+from flask_login import current_user
+from sqlalchemy import update
+from . import db
+from .models import Project
+
+# Versão por projeto para GET condicional. Toda rota que altera algo do
+# projeto chama bump() na mesma transação; as páginas de leitura derivam
+# ETag e Last-Modified só da linha do projeto e respondem 304 sem consultar
+# sprints, stories ou tasks.
+
+
+def _build_id():
+    # Derivado dos arquivos do pacote: igual em todos os workers de um mesmo
+    # deploy e diferente quando código, templates ou o manifest dos assets
+    # mudam.
+    digest = hashlib.sha1()
+    root = os.path.dirname(os.path.abspath(__file__))
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.endswith(('.py', '.html', '.json')):
+                stat = os.stat(os.path.join(dirpath, name))
+                digest.update(f"{name}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+    return digest.hexdigest()[:12]
+
+
+BUILD_ID = _build_id()
+
+
+def bump(*project_ids):
+    ids = {pid for pid in project_ids if pid is not None}
+    if not ids:
+        return
+    db.session.execute(
+        update(Project)
+        .where(Project.id.in_(ids))
+        .values(version=Project.version + 1, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def page_validators(project, *parts):
+    version, updated_at = project.version, project.updated_at
+    user_id = current_user.get_id() if current_user.is_authenticated else ''
+    key = "|".join(str(p) for p in (
+        BUILD_ID, request.endpoint, project.id, version, user_id,
+        request.query_string.decode(), *parts
+    ))
+    etag = hashlib.sha1(key.encode()).hexdigest()
+    return etag, (updated_at.replace(microsecond=0) if updated_at else None)
+
+
+def is_fresh(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if last_modified and request.if_modified_since:
+        return last_modified <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+
+def not_modified(etag, last_modified):
+    response = make_response('', 304)
+    return cacheable(response, etag, last_modified)
+
+
+def cacheable(response, etag, last_modified):
+    response = make_response(response)
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
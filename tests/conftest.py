@@ -0,0 +1,100 @@
+import itertools
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+from scrum_app import create_app, db
+from scrum_app.models import User, Project, ProjectMembership, Sprint, UserStory, Task, KANBAN_STATUSES
+
+PASSWORD = "senha"
+_names = itertools.count(1)
+
+
+@pytest.fixture
+def app():
+    app = create_app("testing")
+    yield app
+    app.extensions["activity"].close()
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_user(app, username=None):
+    with app.app_context():
+        user = User(username=username or f"user{next(_names)}", password=generate_password_hash(PASSWORD))
+        db.session.add(user)
+        db.session.commit()
+        return user.id, user.username
+
+
+def make_project(app, owner_id, members=(), sprints=0, stories=0, tasks=0, statuses=None):
+    # Projeto com itens inseridos em lote; as tasks se distribuem pelas
+    # sprints, pelos membros e pelos status (ou só pelos de `statuses`).
+    with app.app_context():
+        project = Project(name=f"Projeto {next(_names)}", owner_id=owner_id)
+        db.session.add(project)
+        db.session.flush()
+        db.session.add(ProjectMembership(user_id=owner_id, project_id=project.id, role="Product Owner"))
+        for user_id in members:
+            db.session.add(ProjectMembership(user_id=user_id, project_id=project.id))
+        db.session.flush()
+
+        sprint_ids = []
+        for n in range(sprints):
+            sprint = Sprint(name=f"Sprint {n + 1}", project_id=project.id)
+            db.session.add(sprint)
+            db.session.flush()
+            sprint_ids.append(sprint.id)
+
+        assignees = [owner_id, *members]
+        statuses = statuses or KANBAN_STATUSES
+        if stories:
+            db.session.execute(db.insert(UserStory), [
+                {"title": f"Story {n}", "description": "", "status": "To Do", "project_id": project.id,
+                 "sprint_id": sprint_ids[n % len(sprint_ids)] if sprint_ids and n % 2 else None}
+                for n in range(stories)
+            ])
+        if tasks:
+            db.session.execute(db.insert(Task), [
+                {"title": f"Task {n}", "status": statuses[n % len(statuses)], "project_id": project.id,
+                 "sprint_id": sprint_ids[n % len(sprint_ids)] if sprint_ids else None,
+                 "assigned_to": assignees[n % len(assignees)]}
+                for n in range(tasks)
+            ])
+        db.session.commit()
+        return project.id, sprint_ids
+
+
+def make_task(app, project_id, title, description=""):
+    with app.app_context():
+        task = Task(title=title, description=description, project_id=project_id)
+        db.session.add(task)
+        db.session.commit()
+        return task.id
+
+
+def login(client, username):
+    response = client.post("/login", data={"username": username, "password": PASSWORD})
+    assert response.status_code == 302
+
+
+@contextmanager
+def count_queries(app):
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
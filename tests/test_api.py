@@ -0,0 +1,39 @@
+import pytest
+from scrum_app import db
+from scrum_app.models import Task
+from conftest import login, make_project, make_user
+
+
+def pages(client, url):
+    ids, cursor = [], None
+    while True:
+        response = client.get(url + (f"&cursor={cursor}" if cursor else ""))
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        ids += [row["id"] for row in body["data"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            return ids
+
+
+@pytest.mark.parametrize("order, column", [("rank", "rank"), ("created", "created_at")])
+def test_pages_across_null_keys(app, client, order, column):
+    owner_id, owner = make_user(app)
+    project_id, _ = make_project(app, owner_id, tasks=6)
+    with app.app_context():
+        ids = db.session.scalars(db.select(Task.id).where(Task.project_id == project_id).order_by(Task.id)).all()
+        for n, task_id in enumerate(ids):
+            db.session.execute(db.update(Task).where(Task.id == task_id).values(rank=f"m{n}"))
+        # Linhas sem chave (anteriores à migração ou inseridas por fora do ORM).
+        db.session.execute(db.update(Task).where(Task.id.in_(ids[1:4])).values({column: None}))
+        db.session.commit()
+        expected = [
+            task.id for task in db.session.query(Task).filter_by(project_id=project_id)
+            .order_by(getattr(Task, column).asc().nulls_first(), Task.id)
+        ]
+
+    login(client, owner)
+    seen = pages(client, f"/api/v1/projects/{project_id}/tasks?order={order}&limit=2&fields=id")
+
+    assert seen == expected
+    assert seen[:3] == ids[1:4]
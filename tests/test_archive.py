@@ -0,0 +1,25 @@
+from datetime import date, timedelta
+from scrum_app import archive, db
+from scrum_app.models import ArchivedTask, Task
+from conftest import make_project, make_task, make_user
+
+
+def test_archived_ids_are_never_reused(app):
+    owner_id, _ = make_user(app)
+    project_id, _ = make_project(app, owner_id)
+    make_task(app, project_id, "Aberta")
+    done_id = make_task(app, project_id, "Concluída")
+
+    with app.app_context():
+        db.session.get(Task, done_id).status = "Done"
+        db.session.commit()
+        moved = archive.archive(project_id, today=date.today() + timedelta(days=1), done_after_days=0)
+        assert moved["tasks"] == 1
+
+    new_id = make_task(app, project_id, "Nova")
+    assert new_id > done_id
+
+    with app.app_context():
+        assert archive.restore(project_id, "tasks", [done_id]) == {done_id: "restored"}
+        assert db.session.get(Task, done_id).title == "Concluída"
+        assert db.session.get(ArchivedTask, done_id) is None
@@ -0,0 +1,78 @@
+import base64
+import hashlib
+import pytest
+from scrum_app import assets, create_app
+
+BOOTSTRAP = b"/*! bootstrap */.btn{color:blue}"
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    # Um pacote de mentira: style.css em static/ e vendor/ vazio, com o hash
+    # SRI fixado para o conteúdo de BOOTSTRAP.
+    (tmp_path / "static").mkdir()
+    (tmp_path / "static" / "style.css").write_text("/* tema */\n.card { color : red ; }\n")
+    (tmp_path / "vendor").mkdir()
+    integrity = "sha384-" + base64.b64encode(hashlib.sha384(BOOTSTRAP).digest()).decode()
+    monkeypatch.setattr(assets, "VENDOR", {"bootstrap.min.css": ("https://cdn.invalid/bootstrap.min.css", integrity)})
+    monkeypatch.setattr(assets, "ROOT", str(tmp_path))
+    monkeypatch.setattr(assets, "VENDOR_DIR", str(tmp_path / "vendor"))
+    monkeypatch.setattr(assets, "DIST_DIR", str(tmp_path / "static" / "dist"))
+    monkeypatch.setattr(assets, "MANIFEST", str(tmp_path / "static" / "dist" / "manifest.json"))
+
+    def offline(*args, **kwargs):
+        raise AssertionError("o build não pode acessar a rede")
+
+    monkeypatch.setattr("urllib.request.urlopen", offline)
+    return tmp_path
+
+
+def make_app(config_name):
+    return create_app(config_name, {"SQLALCHEMY_DATABASE_URI": "sqlite://", "JOBS_MODE": "manual"})
+
+
+def test_production_refuses_to_start_without_build(root):
+    with pytest.raises(RuntimeError, match="assets-build"):
+        make_app("production")
+
+
+def test_build_is_offline_and_checks_vendor(root):
+    with pytest.raises(assets.click.ClickException, match="assets-vendor"):
+        assets.build()
+
+    (root / "vendor" / "bootstrap.min.css").write_bytes(BOOTSTRAP + b" ")
+    with pytest.raises(assets.click.ClickException, match="integridade"):
+        assets.build()
+
+    (root / "vendor" / "bootstrap.min.css").write_bytes(BOOTSTRAP)
+    assert set(assets.build()) == set(assets.ASSETS)
+
+
+def test_unbuilt_assets_are_served_from_vendor(root):
+    (root / "vendor" / "bootstrap.min.css").write_bytes(BOOTSTRAP)
+    app = make_app("development")
+    client = app.test_client()
+
+    with app.test_request_context():
+        url = assets.asset_url("bootstrap.css")
+    response = client.get(url)
+
+    assert url == "/assets/src/bootstrap.css"
+    assert response.status_code == 200 and response.data == BOOTSTRAP
+    app.extensions["activity"].close()
+
+
+def test_precompressed_asset_has_no_download_name(root):
+    (root / "vendor" / "bootstrap.min.css").write_bytes(BOOTSTRAP)
+    manifest = assets.build()
+    app = make_app("production")
+    client = app.test_client()
+
+    response = client.get(f"/assets/{manifest['style.css']}", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.mimetype == "text/css"
+    assert "Content-Disposition" not in response.headers
+    assert "immutable" in response.headers["Cache-Control"]
+    app.extensions["activity"].close()
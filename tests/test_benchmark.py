@@ -0,0 +1,9 @@
+from scrum_app.benchmark import run
+
+
+def test_tiny_profile_covers_every_route():
+    report = run("tiny", iterations=1)
+
+    assert report["uncovered"] == []
+    failed = {name: r["status"] for name, r in report["routes"].items() if r["status"] not in (200, 302)}
+    assert failed == {}
@@ -0,0 +1,52 @@
+from scrum_app import changefeed, db
+from conftest import login, make_project, make_task, make_user
+
+
+def move(client, task_id, status):
+    assert client.post(f"/task/{task_id}/status/{status}").status_code == 302
+
+
+def test_stale_version_expires_after_full_prune(app, client):
+    owner_id, owner = make_user(app)
+    project_id, _ = make_project(app, owner_id)
+    task_id = make_task(app, project_id, "Card")
+    login(client, owner)
+    move(client, task_id, "Doing")
+    move(client, task_id, "Done")
+
+    with app.app_context():
+        seen = changefeed.latest_version(project_id)
+        assert changefeed.prune(0) == 2
+        assert changefeed.is_expired(seen - 1)
+        assert not changefeed.is_expired(seen)
+
+    assert client.get(f"/project/{project_id}/board/changes?since={seen - 1}").status_code == 410
+
+    move(client, task_id, "To Do")
+    with app.app_context():
+        # O id não volta para 1 depois de esvaziar a tabela.
+        assert changefeed.latest_version(project_id) > seen
+        assert changefeed.is_expired(seen + 100)
+
+
+def test_stream_sends_reload_when_it_falls_behind(app, client, monkeypatch):
+    owner_id, owner = make_user(app)
+    project_id, _ = make_project(app, owner_id)
+    task_id = make_task(app, project_id, "Card")
+    login(client, owner)
+    move(client, task_id, "Doing")
+
+    with app.app_context():
+        version = changefeed.latest_version(project_id)
+
+    def prune_while_waiting(seconds):
+        move(client, task_id, "Done")
+        with app.app_context():
+            changefeed.prune(0)
+            db.session.remove()
+
+    monkeypatch.setattr(changefeed.time, "sleep", prune_while_waiting)
+    with app.test_request_context():
+        events = list(changefeed.stream(project_id, version))
+
+    assert events[-1] == "event: reload\ndata: {}\n\n"
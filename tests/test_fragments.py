@@ -0,0 +1,35 @@
+from scrum_app import create_app, db
+from conftest import login, make_project, make_task, make_user
+
+
+def test_apps_never_serve_each_others_fragments(tmp_path):
+    # Dois bancos com o mesmo projeto 1 (versão 1), mesmo arquivo de cache
+    # compartilhado: cada app precisa renderizar as suas próprias tasks.
+    shared = str(tmp_path / "fragments.db")
+    apps = [
+        create_app("testing", {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / f'app{n}.db'}",
+            "FRAGMENT_CACHE_ENABLED": True,
+            "FRAGMENT_CACHE_SHARED_PATH": shared,
+        })
+        for n in range(2)
+    ]
+    try:
+        for n, app in enumerate(apps):
+            owner_id, owner = make_user(app, "dono")
+            project_id, _ = make_project(app, owner_id)
+            assert project_id == 1
+            make_task(app, project_id, f"Task do app {n}")
+
+        for n, app in enumerate(apps):
+            client = app.test_client()
+            login(client, "dono")
+            page = client.get("/project/1").get_data(as_text=True)
+            assert f"Task do app {n}" in page
+            assert f"Task do app {1 - n}" not in page
+            assert app.extensions["fragment_cache"].snapshot()["misses"] == 3
+    finally:
+        for app in apps:
+            app.extensions["activity"].close()
+            with app.app_context():
+                db.engine.dispose()
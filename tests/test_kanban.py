@@ -0,0 +1,120 @@
+import pytest
+from scrum_app import db, queries
+from scrum_app.models import Task
+from conftest import count_queries, make_project, make_user
+
+
+def add_tasks(app, project_id, status, count, sprint_id=None):
+    with app.app_context():
+        db.session.execute(db.insert(Task), [
+            {"title": f"{status} {n}", "status": status, "project_id": project_id, "sprint_id": sprint_id}
+            for n in range(count)
+        ])
+        db.session.commit()
+
+
+def board_project(app, owner_id, done):
+    project_id, _ = make_project(app, owner_id)
+    add_tasks(app, project_id, "To Do", 50)
+    add_tasks(app, project_id, "Doing", 50)
+    add_tasks(app, project_id, "Done", done)
+    return project_id
+
+
+def vm_steps(fn):
+    # Instruções da VM do SQLite executadas por fn(), em blocos de 10: uma
+    # medida de custo que não depende da velocidade da máquina.
+    connection = db.session.connection().connection.driver_connection
+    steps = [0]
+
+    def tick():
+        steps[0] += 1
+        return 0
+
+    connection.set_progress_handler(tick, 10)
+    try:
+        fn()
+    finally:
+        connection.set_progress_handler(None, 10)
+    return steps[0]
+
+
+def test_columns_page_newest_first_with_totals(app):
+    owner_id, _ = make_user(app)
+    project_id = board_project(app, owner_id, done=30)
+
+    with app.app_context():
+        columns = queries.load_kanban_columns(project_id, 20)
+
+        assert [c.total for c in columns.values()] == [50, 50, 30]
+        for column in columns.values():
+            ids = [t.id for t in column.tasks]
+            assert len(ids) == 20 and ids == sorted(ids, reverse=True)
+            assert {t.status for t in column.tasks} == {column.status}
+            assert column.next_cursor == ids[-1]
+
+        rest = queries.load_kanban_column(project_id, "Done", 20, columns["Done"].next_cursor)
+        assert len(rest.tasks) == 10 and rest.next_cursor is None
+
+
+def test_columns_filtered_by_sprint(app):
+    owner_id, _ = make_user(app)
+    project_id, (sprint_id,) = make_project(app, owner_id, sprints=1)
+    add_tasks(app, project_id, "Done", 40)
+    add_tasks(app, project_id, "Done", 3, sprint_id)
+
+    with app.app_context():
+        columns = queries.load_kanban_columns(project_id, 20, sprint_id)
+        assert columns["Done"].total == 3
+        assert [t.sprint_id for t in columns["Done"].tasks] == [sprint_id] * 3
+
+
+def test_board_cost_does_not_grow_with_done_column(app):
+    owner_id, _ = make_user(app)
+    small = board_project(app, owner_id, done=200)
+    large = board_project(app, owner_id, done=10000)
+
+    with app.app_context():
+        costs = [vm_steps(lambda: queries.load_kanban_columns(pid, 25)) for pid in (small, large)]
+
+    assert costs[1] <= costs[0] * 1.2, costs
+
+
+def test_column_counts_do_not_read_tasks(app):
+    owner_id, _ = make_user(app)
+    project_id = board_project(app, owner_id, done=100)
+
+    with app.app_context():
+        with count_queries(app) as statements:
+            queries.count_kanban_columns(project_id)
+        (statement,) = statements
+        plan = db.session.connection().exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + statement, (project_id, "To Do", "Doing", "Done")
+        ).all()
+
+    assert all(" task " not in row[-1] + " " for row in plan), plan
+
+
+def test_column_counts_follow_every_write(app):
+    owner_id, _ = make_user(app)
+    project_id, (sprint_a, sprint_b) = make_project(app, owner_id, sprints=2)
+    other_id, _ = make_project(app, owner_id)
+    add_tasks(app, project_id, "To Do", 7)
+    add_tasks(app, project_id, "Doing", 5, sprint_a)
+
+    with app.app_context():
+        tasks = db.session.query(Task).filter_by(project_id=project_id).order_by(Task.id).all()
+        tasks[0].status = "Done"
+        tasks[1].sprint_id = sprint_b
+        tasks[2].project_id = other_id
+        db.session.delete(tasks[3])
+        db.session.commit()
+        db.session.execute(db.update(Task).where(Task.sprint_id == sprint_a).values(status="Done"))
+        db.session.commit()
+
+        for pid, sprint_id in ((project_id, None), (project_id, sprint_a), (project_id, sprint_b), (other_id, None)):
+            expected = dict(
+                queries._kanban_filter(db.session.query(Task.status, db.func.count()), pid, sprint_id)
+                .group_by(Task.status).all()
+            )
+            assert queries.count_kanban_columns(pid, sprint_id) == expected
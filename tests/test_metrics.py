@@ -0,0 +1,49 @@
+import pytest
+from scrum_app import create_app
+
+
+@pytest.fixture
+def make_app():
+    apps = []
+
+    def make(config_name, **config):
+        app = create_app(config_name, {"SQLALCHEMY_DATABASE_URI": "sqlite://", "JOBS_MODE": "manual",
+                                        "ASSETS_REQUIRE_BUILD": False, **config})
+        apps.append(app)
+        return app
+
+    yield make
+    for app in apps:
+        app.extensions["activity"].close()
+
+
+def test_production_without_token_has_no_endpoint(make_app):
+    client = make_app("production").test_client()
+
+    assert client.get("/metrics").status_code == 404
+
+
+def test_token_is_required_when_set(make_app):
+    client = make_app("production", METRICS_TOKEN="segredo").test_client()
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer outro"}).status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer segredo"})
+    assert response.status_code == 200
+    assert b"# TYPE" in response.data
+
+
+def test_development_endpoint_stays_public(make_app):
+    client = make_app("testing").test_client()
+
+    assert client.get("/metrics").status_code == 200
+
+
+def test_each_app_has_its_own_counters(make_app):
+    first, second = make_app("testing"), make_app("testing")
+
+    first.test_client().get("/login")
+    text = second.test_client().get("/metrics").get_data(as_text=True)
+
+    assert 'endpoint="main.login"' not in text
+    assert 'endpoint="main.login"' in first.test_client().get("/metrics").get_data(as_text=True)
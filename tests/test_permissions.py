@@ -0,0 +1,136 @@
+import time
+import pytest
+from scrum_app import create_app, db
+from scrum_app.models import ProjectMembership, Task, UserStory
+from scrum_app.permissions import project_access
+from conftest import login, make_project, make_task, make_user
+
+
+def test_owner_cannot_delete_membership_of_another_project(app, client):
+    owner_id, owner = make_user(app)
+    other_id, _ = make_user(app)
+    member_id, _ = make_user(app)
+    mine, _ = make_project(app, owner_id)
+    theirs, _ = make_project(app, other_id, members=[member_id])
+    with app.app_context():
+        membership_id = db.session.query(ProjectMembership.id).filter_by(
+            project_id=theirs, user_id=member_id).scalar()
+
+    login(client, owner)
+    response = client.post(f"/project/{mine}/members/{membership_id}/delete")
+
+    assert response.status_code == 404
+    with app.app_context():
+        assert db.session.get(ProjectMembership, membership_id) is not None
+
+
+def make_story(app, project_id, sprint_id=None):
+    with app.app_context():
+        story = UserStory(title="Story", description="", project_id=project_id, sprint_id=sprint_id)
+        db.session.add(story)
+        db.session.commit()
+        return story.id
+
+
+def test_outsider_cannot_move_task(app, client):
+    owner_id, _ = make_user(app)
+    _, outsider = make_user(app)
+    project_id, _ = make_project(app, owner_id)
+    task_id = make_task(app, project_id, "Task")
+
+    login(client, outsider)
+    response = client.post(f"/task/{task_id}/status/Done")
+
+    assert response.status_code == 302 and response.location.endswith("/dashboard")
+    with app.app_context():
+        task = db.session.get(Task, task_id)
+        assert (task.status, task.version) == ("To Do", 1)
+
+
+@pytest.mark.parametrize("path", [
+    "/project/{mine}/task/{task}/edit",
+    "/project/{mine}/task/{task}/delete",
+    "/project/{mine}/userstory/{story}/edit",
+    "/project/{mine}/userstory/{story}/delete",
+])
+def test_owner_cannot_touch_items_of_another_project(app, client, path):
+    owner_id, owner = make_user(app)
+    other_id, _ = make_user(app)
+    mine, _ = make_project(app, owner_id)
+    theirs, _ = make_project(app, other_id)
+    task_id = make_task(app, theirs, "Alheia")
+    story_id = make_story(app, theirs)
+
+    login(client, owner)
+    response = client.post(path.format(mine=mine, task=task_id, story=story_id), data={"title": "Trocada"})
+
+    assert response.status_code == 404
+    with app.app_context():
+        assert db.session.get(Task, task_id).title == "Alheia"
+        assert db.session.get(UserStory, story_id) is not None
+
+
+def test_remove_from_sprint_requires_story_in_sprint(app, client):
+    owner_id, owner = make_user(app)
+    other_id, _ = make_user(app)
+    mine, (sprint_id,) = make_project(app, owner_id, sprints=1)
+    theirs, (their_sprint,) = make_project(app, other_id, sprints=1)
+    story_id = make_story(app, theirs, their_sprint)
+
+    login(client, owner)
+    response = client.post(f"/sprint/{sprint_id}/remove_us/{story_id}")
+
+    assert response.status_code == 404
+    with app.app_context():
+        assert db.session.get(UserStory, story_id).sprint_id == their_sprint
+
+
+def test_shared_cache_is_bounded_and_per_app():
+    app = create_app("testing", {"PERMISSION_CACHE_TTL": 60, "PERMISSION_CACHE_SIZE": 3})
+    other = create_app("testing", {"PERMISSION_CACHE_TTL": 60})
+    owner_id, _ = make_user(app)
+    projects = [make_project(app, owner_id)[0] for _ in range(5)]
+
+    for project_id in projects:
+        with app.test_request_context():
+            assert project_access(project_id, owner_id).is_owner
+
+    assert len(app.extensions["permission_cache"]) == 3
+    assert "permission_cache" not in other.extensions
+    for instance in (app, other):
+        instance.extensions["activity"].close()
+
+
+def test_removed_member_keeps_access_on_other_workers_until_ttl(tmp_path, monkeypatch):
+    # Dois "workers" no mesmo banco: a remoção invalida só o cache de quem a
+    # atendeu; no outro a entrada vale até PERMISSION_CACHE_TTL.
+    config = {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'shared.db'}", "PERMISSION_CACHE_TTL": 30}
+    worker_a, worker_b = create_app("testing", config), create_app("testing", config)
+    try:
+        owner_id, owner = make_user(worker_a)
+        member_id, _ = make_user(worker_a)
+        project_id, _ = make_project(worker_a, owner_id, members=[member_id])
+        with worker_a.app_context():
+            membership_id = db.session.query(ProjectMembership.id).filter_by(
+                project_id=project_id, user_id=member_id).scalar()
+
+        def access(app):
+            with app.test_request_context():
+                return project_access(project_id, member_id)
+
+        assert access(worker_a) and access(worker_b)
+        client = worker_a.test_client()
+        login(client, owner)
+        client.post(f"/project/{project_id}/members/{membership_id}/delete")
+
+        assert access(worker_a) is None
+        assert access(worker_b) is not None
+
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 31)
+        assert access(worker_b) is None
+    finally:
+        for app in (worker_a, worker_b):
+            app.extensions["activity"].close()
+            with app.app_context():
+                db.engine.dispose()
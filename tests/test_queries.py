@@ -0,0 +1,50 @@
+import pytest
+from scrum_app.queries import load_dashboard
+from conftest import count_queries, login, make_project, make_user
+
+# As páginas de listagem carregam tudo num número fixo de queries: o total de
+# statements não pode depender de quantos itens o projeto tem.
+
+
+@pytest.fixture
+def projects(app, client):
+    owner_id, owner = make_user(app)
+    members = [make_user(app)[0] for _ in range(5)]
+    small, small_sprints = make_project(app, owner_id, members[:1], sprints=1, stories=2, tasks=3)
+    large, large_sprints = make_project(app, owner_id, members, sprints=8, stories=120, tasks=300)
+    login(client, owner)
+    client.get("/dashboard")
+    return (small, small_sprints[0]), (large, large_sprints[0])
+
+
+@pytest.mark.parametrize("url", [
+    "/project/{project}",
+    "/project/{project}/board",
+    "/sprint/{sprint}",
+])
+def test_statement_count_does_not_grow_with_project(app, client, projects, url):
+    counts = []
+    for project, sprint in projects:
+        with count_queries(app) as statements:
+            response = client.get(url.format(project=project, sprint=sprint))
+        assert response.status_code == 200
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1], counts
+
+
+def test_dashboard_counts_only_the_requested_page(app):
+    user_id, _ = make_user(app)
+    other_id, _ = make_user(app)
+    for n in range(5):
+        make_project(app, user_id, sprints=1, stories=n, tasks=3 * n)
+    make_project(app, other_id, members=[user_id], tasks=4)
+    make_project(app, other_id, tasks=4)
+
+    with app.app_context():
+        with count_queries(app) as statements:
+            rows, total = load_dashboard(user_id, 2, 4)
+
+    assert len(statements) == 1
+    assert total == 6
+    assert [(r.open_tasks, r.stories, r.active_sprints) for r in rows] == [(8, 4, 1), (3, 0, 0)]
@@ -0,0 +1,36 @@
+import re
+from scrum_app.search import search
+from conftest import login, make_project, make_task, make_user
+
+
+def test_results_are_scoped_to_the_project(app):
+    owner_id, _ = make_user(app)
+    mine, _ = make_project(app, owner_id)
+    other, _ = make_project(app, owner_id)
+    task_id = make_task(app, mine, "Relatório de pagamentos")
+    make_task(app, other, "Relatório de vendas")
+
+    with app.app_context():
+        results, has_next = search(mine, "relat")
+        assert [(r["type"], r["id"]) for r in results] == [("task", task_id)]
+        assert not has_next
+        # O id do projeto é indexado, mas os termos só casam título e descrição.
+        assert search(mine, str(mine)) == ([], False)
+
+
+def test_member_results_link_to_pages_they_can_open(app, client):
+    owner_id, owner = make_user(app)
+    member_id, member = make_user(app)
+    project_id, _ = make_project(app, owner_id, members=[member_id])
+    task_id = make_task(app, project_id, "Exportar backlog")
+
+    login(client, member)
+    page = client.get(f"/project/{project_id}/search?q=backlog").get_data(as_text=True)
+    (href,) = re.findall(r'<a href="([^"]+)">Exportar backlog</a>', page)
+
+    assert href == f"/project/{project_id}#task-{task_id}"
+    assert f'id="task-{task_id}"' in client.get(href).get_data(as_text=True)
+
+    login(client, owner)
+    page = client.get(f"/project/{project_id}/search?q=backlog").get_data(as_text=True)
+    assert f"/project/{project_id}/task/{task_id}/edit" in page
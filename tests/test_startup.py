@@ -0,0 +1,20 @@
+import subprocess
+import sys
+
+PROBE = """
+import sys
+from scrum_app import create_app
+app = create_app("production", {"SQLALCHEMY_DATABASE_URI": "sqlite://", "JOBS_MODE": "manual",
+                                  "ASSETS_REQUIRE_BUILD": False})
+app.extensions["activity"].close()
+print(" ".join(sorted(m for m in sys.modules if m.startswith("scrum_app."))))
+"""
+
+
+def test_cli_only_modules_are_not_imported_by_a_worker():
+    # Processo novo: no processo do pytest outros testes já importaram tudo.
+    output = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True)
+    loaded = set(output.stdout.split())
+
+    assert "scrum_app.routes" in loaded
+    assert not loaded & {"scrum_app.benchmark", "scrum_app.stress", "scrum_app.migrations"}
@@ -0,0 +1,16 @@
+import glob
+import os
+import tempfile
+from scrum_app.stress import run_status_stress
+
+
+def test_concurrent_status_moves_keep_tasks_consistent():
+    before = set(glob.glob(os.path.join(tempfile.gettempdir(), "scrum-stress-*")))
+    report = run_status_stress(threads=4, iterations=10, tasks=3)
+
+    results = dict(report["results"])
+    assert results.pop("ok", 0) > 0
+    results.pop("conflict", None)
+    assert results == {}
+    assert report["inconsistent"] == []
+    assert set(glob.glob(os.path.join(tempfile.gettempdir(), "scrum-stress-*"))) == before